@@ -0,0 +1,135 @@
+import os
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from itertools import islice
+from typing import Deque, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from board import Board
+from budget import SolveBudget
+from rendering import format_puzzle_line
+from solver import Solver
+
+
+class BatchResult(NamedTuple):
+    """
+    Outcome of solving one puzzle of a batch
+    """
+    # Position of the puzzle in the input iterable
+    index: int
+    puzzle: str
+    # 81-character solution, or None if the puzzle was not solved
+    solution: Optional[str]
+    # "solved", "unsolved", "incomplete" when a limit of the solve budget was reached, or "invalid" when the puzzle
+    # could not be parsed
+    status: str
+    # Rounds for the "singles" engine, search nodes otherwise
+    rounds: int
+    # Seconds spent parsing and solving the puzzle
+    time: float
+
+
+def solve_puzzle(index: int, puzzle: str, engine: str = "dlx", budget: Optional[SolveBudget] = None) -> BatchResult:
+    """
+    Solve a single one-line puzzle without printing anything
+    :param index: Position of the puzzle in the batch
+    :param puzzle: 81-character puzzle, using ".", "0", or "-" for blank cells
+    :param engine: Solver engine to use
+    :param budget: Limits on the time, rounds, and search nodes of the solve. Optional
+    :return: Outcome of the solve
+    """
+    start = time.perf_counter()
+
+    try:
+        board = Board.from_string(puzzle)
+    except ValueError:
+        return BatchResult(index, puzzle, None, "invalid", 0, time.perf_counter() - start)
+
+    solver = Solver(board, engine, budget=budget)
+    is_solved, rounds = solver.solve_board()
+    solution = format_puzzle_line(board.get_cell_values()) if is_solved else None
+    status = "solved" if is_solved else "unsolved" if solver.limit_reached is None else "incomplete"
+
+    return BatchResult(index, puzzle, solution, status, rounds, time.perf_counter() - start)
+
+
+def _solve_chunk(chunk: List[Tuple[int, str]], engine: str, budget: Optional[SolveBudget]) -> List[BatchResult]:
+    """
+    Helper function run in the worker processes to solve one chunk of puzzles
+    :param chunk: Pairs of batch index and puzzle
+    :param engine: Solver engine to use
+    :param budget: Limits applied to every solve. Optional
+    :return: Outcomes in the same order as the chunk
+    """
+    return [solve_puzzle(index, puzzle, engine, budget) for index, puzzle in chunk]
+
+
+def _iter_chunks(puzzles: Iterable[str], chunksize: int) -> Iterator[List[Tuple[int, str]]]:
+    """
+    Helper function used to split the puzzles into numbered chunks without reading the whole iterable
+    :param puzzles: Puzzles to split
+    :param chunksize: Number of puzzles per chunk
+    :return: Chunks of (batch index, puzzle) pairs
+    """
+    numbered = enumerate(puzzles)
+    while True:
+        chunk = list(islice(numbered, chunksize))
+        if not chunk:
+            return
+        yield chunk
+
+
+def solve_batch(puzzles: Iterable[str], engine: str = "dlx", workers: Optional[int] = None, chunksize: int = 64,
+                ordered: bool = True, budget: Optional[SolveBudget] = None) -> Iterator[BatchResult]:
+    """
+    Solve many one-line puzzles across a pool of worker processes. Puzzles are read lazily and at most a few chunks
+    per worker are in flight, so the input can be an arbitrarily long stream
+    :param puzzles: 81-character puzzles to solve
+    :param engine: Solver engine to use
+    :param workers: Number of worker processes. Defaults to the CPU count. With 1 the puzzles are solved in this
+     process
+    :param chunksize: Number of puzzles sent to a worker at a time
+    :param ordered: Yield results in input order if True, otherwise as soon as each chunk completes
+    :param budget: Limits applied to every solve, so one slow puzzle cannot hold up its chunk. Optional
+    :return: Outcome of every puzzle
+    """
+    if chunksize < 1:
+        raise ValueError("chunksize must be at least 1")
+
+    if workers == 1:
+        for index, puzzle in enumerate(puzzles):
+            yield solve_puzzle(index, puzzle, engine, budget)
+        return
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        in_flight = deque()
+
+        for chunk in _iter_chunks(puzzles, chunksize):
+            in_flight.append(executor.submit(_solve_chunk, chunk, engine, budget))
+            if len(in_flight) >= workers * 2:
+                yield from _collect_results(in_flight, ordered)
+
+        while in_flight:
+            yield from _collect_results(in_flight, ordered)
+
+
+def _collect_results(in_flight: Deque[Future], ordered: bool) -> List[BatchResult]:
+    """
+    Helper function used to wait for chunks to finish and remove them from the in-flight queue
+    :param in_flight: Futures of the submitted chunks, oldest first
+    :param ordered: Wait for the oldest chunk if True, otherwise for whichever chunks finish first
+    :return: Outcomes of the finished chunks
+    """
+    if ordered:
+        return in_flight.popleft().result()
+
+    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+    results = []
+    for future in done:
+        in_flight.remove(future)
+        results.extend(future.result())
+
+    return results
@@ -0,0 +1,220 @@
+import time
+from itertools import islice
+from typing import Iterable, Iterator, NamedTuple, Tuple
+
+import numpy as np
+
+from batch import BatchResult
+from board import parse_puzzle_bytes
+from layout import LAYOUT
+from rendering import format_puzzle_line
+from solver import Solver
+
+DIGITS = np.arange(1, 9 + 1, dtype=np.uint8)
+
+# Cells of every row, column, and box, shape (27, 9), and the row, column, and box of every cell, shape (81, 3), as
+# indices into the first
+UNIT_CELLS = np.array(LAYOUT.units, dtype=np.intp)
+CELL_UNITS = np.array([[LAYOUT.row_of_cell[cell], 9 + LAYOUT.column_of_cell[cell], 18 + LAYOUT.box_of_cell[cell]]
+                       for cell in range(LAYOUT.cell_count)], dtype=np.intp)
+
+
+class BatchPropagation(NamedTuple):
+    """
+    Outcome of propagating naked and hidden singles over a batch of grids
+    """
+    # Grids after propagation, shape (N, 81)
+    grids: np.ndarray
+    # Remaining candidates of every cell, shape (N, 81, 9), indexed by digit - 1. False for filled cells
+    candidates: np.ndarray
+    is_solved: np.ndarray
+    # Set for boards with a duplicate digit, a blank cell without candidates, or a digit with no place left in a unit
+    contradiction: np.ndarray
+    # Rounds that placed at least one digit, per board
+    rounds: np.ndarray
+
+
+class BatchSolution(NamedTuple):
+    """
+    Outcome of solving a batch of grids with solve_grids
+    """
+    # Solved grids, or the grids left by propagation for boards that could not be solved, shape (N, 81)
+    grids: np.ndarray
+    is_solved: np.ndarray
+    # Set for boards that propagation could not finish and were handed to the search engine
+    searched: np.ndarray
+    # Propagation rounds plus search nodes, per board
+    work: np.ndarray
+
+
+def _propagate_round(grids: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Helper function used to run one round of naked and hidden singles over a batch of grids
+    :param grids: Array of shape (N, 81)
+    :return: Digits placed this round (0 where nothing was placed), candidates, and contradiction flags
+    """
+    blank = grids == 0
+
+    # count every digit in every unit; a count above 1 is a duplicate
+    placed = grids[..., np.newaxis] == DIGITS
+    unit_counts = placed[:, UNIT_CELLS].sum(axis=2, dtype=np.uint8)
+    unit_used = unit_counts > 0
+
+    candidates = ~unit_used[:, CELL_UNITS].any(axis=2) & blank[..., np.newaxis]
+    candidate_counts = candidates.sum(axis=2, dtype=np.uint8)
+
+    # places left for every digit in every unit
+    unit_places = candidates[:, UNIT_CELLS].sum(axis=2, dtype=np.uint8)
+
+    contradiction = ((unit_counts > 1).any(axis=(1, 2)) | (blank & (candidate_counts == 0)).any(axis=1)
+                     | (~unit_used & (unit_places == 0)).any(axis=(1, 2)))
+
+    # naked singles: a blank cell with one candidate
+    naked = blank & (candidate_counts == 1) & ~contradiction[:, np.newaxis]
+    new_digits = np.where(naked, candidates.argmax(axis=2) + 1, 0).astype(np.uint8)
+
+    # hidden singles: a digit with one place left in a unit. Two singles can only disagree on an unsolvable board,
+    # which the next round reports as a contradiction
+    boards, units, digit_indices = np.nonzero((unit_places == 1) & ~contradiction[:, np.newaxis, np.newaxis])
+    unit_cells = UNIT_CELLS[units]
+    places = candidates[boards[:, np.newaxis], unit_cells, digit_indices[:, np.newaxis]].argmax(axis=1)
+    new_digits[boards, unit_cells[np.arange(len(units)), places]] = digit_indices + 1
+
+    return new_digits, candidates, contradiction
+
+
+def _propagate_chunk(grids: np.ndarray) -> BatchPropagation:
+    """
+    Helper function used to propagate singles over one chunk of the batch until every board is solved, stalled, or
+    contradictory. Only the boards that changed in the previous round are processed in the next one
+    :param grids: Array of shape (N, 81), updated in place
+    :return: Outcome of the propagation
+    """
+    candidates = np.zeros(grids.shape + (9,), dtype=bool)
+    contradiction = np.zeros(len(grids), dtype=bool)
+    rounds = np.zeros(len(grids), dtype=np.uint16)
+
+    active = np.arange(len(grids))
+    while len(active):
+        active_grids = grids[active]
+        new_digits, active_candidates, active_contradiction = _propagate_round(active_grids)
+
+        candidates[active] = active_candidates
+        contradiction[active] = active_contradiction
+
+        changed = new_digits.any(axis=1)
+        rounds[active[changed]] += 1
+        grids[active] = active_grids + new_digits
+
+        active = active[changed]
+
+    is_solved = ~contradiction & (grids != 0).all(axis=1)
+
+    return BatchPropagation(grids, candidates, is_solved, contradiction, rounds)
+
+
+def propagate_grids(grids: np.ndarray, chunk_size: int = 4096) -> BatchPropagation:
+    """
+    Place naked and hidden singles over a batch of grids with vectorized operations, repeating until no board makes
+    progress. Boards are propagated together, so the cost of the Python loop is shared by the whole batch
+    :param grids: Array of shape (N, 9, 9) or (N, 81) with values 0-9, where 0 represents a blank cell
+    :param chunk_size: Number of boards processed at a time, which bounds the temporary memory used
+    :return: Grids, candidates, and verdicts after propagation
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+
+    # the range is checked before the cast to uint8, which would wrap values such as 256 or -1 into valid cells. The
+    # cast copies the grids, which are then filled in place
+    grids = np.asarray(grids)
+    if ((grids < 0) | (grids > 9)).any():
+        raise ValueError("grid values must be between 0 and 9")
+    grids = grids.astype(np.uint8).reshape(-1, 81)
+
+    chunks = [_propagate_chunk(grids[start:start + chunk_size]) for start in range(0, len(grids), chunk_size)]
+    if not chunks:
+        return BatchPropagation(grids, np.zeros((0, 81, 9), dtype=bool), np.zeros(0, dtype=bool),
+                                np.zeros(0, dtype=bool), np.zeros(0, dtype=np.uint16))
+
+    return BatchPropagation(
+        grids=grids,
+        candidates=np.concatenate([chunk.candidates for chunk in chunks]),
+        is_solved=np.concatenate([chunk.is_solved for chunk in chunks]),
+        contradiction=np.concatenate([chunk.contradiction for chunk in chunks]),
+        rounds=np.concatenate([chunk.rounds for chunk in chunks])
+    )
+
+
+def solve_grids(grids: np.ndarray, engine: str = "backtracking", chunk_size: int = 4096) -> BatchSolution:
+    """
+    Solve a batch of grids by propagating singles over the whole batch at once, then handing only the boards still
+    unsolved to a search engine one at a time. Boards found contradictory by propagation are not searched
+    :param grids: Array of shape (N, 9, 9) or (N, 81) with values 0-9, where 0 represents a blank cell
+    :param engine: Search engine used for the boards propagation cannot finish, a key of Solver.SEARCH_ENGINES
+    :param chunk_size: Number of boards propagated at a time
+    :return: Solved grids and verdicts for every board
+    """
+    if engine not in Solver.SEARCH_ENGINES:
+        raise ValueError(f"engine must be one of: {', '.join(Solver.SEARCH_ENGINES)}")
+
+    propagation = propagate_grids(grids, chunk_size)
+    grids = propagation.grids
+    is_solved = propagation.is_solved.copy()
+    searched = ~propagation.is_solved & ~propagation.contradiction
+    work = propagation.rounds.astype(np.int64)
+
+    for index in np.flatnonzero(searched):
+        search = Solver.SEARCH_ENGINES[engine](grids[index].tolist())
+        solutions = search.find_solutions(1)
+        if solutions:
+            grids[index] = solutions[0]
+            is_solved[index] = True
+        work[index] += search.nodes
+
+    return BatchSolution(grids, is_solved, searched, work)
+
+
+def solve_puzzles(puzzles: Iterable[str], engine: str = "backtracking",
+                  chunk_size: int = 4096) -> Iterator[BatchResult]:
+    """
+    Solve a stream of one-line puzzles with solve_grids, a chunk at a time, producing the same results as
+    batch.solve_puzzle. Puzzles are read lazily, so the input can be an arbitrarily long stream
+    :param puzzles: 81-character puzzles to solve
+    :param engine: Search engine used for the boards propagation cannot finish
+    :param chunk_size: Number of puzzles solved together
+    :return: Outcome of every puzzle in input order. The time of each is its share of the time of its chunk, and its
+     rounds are the propagation rounds plus search nodes
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+
+    numbered = enumerate(puzzles)
+    while True:
+        chunk = list(islice(numbered, chunk_size))
+        if not chunk:
+            return
+
+        start = time.perf_counter()
+        values = []
+        valid = []
+        for index, puzzle in chunk:
+            try:
+                values.append(parse_puzzle_bytes(puzzle.encode("ascii", "replace")))
+                valid.append((index, puzzle))
+            except ValueError:
+                pass
+
+        solution = solve_grids(np.frombuffer(b"".join(values), dtype=np.uint8).reshape(-1, 81), engine,
+                               chunk_size)
+        seconds = (time.perf_counter() - start) / len(chunk)
+
+        outcomes = {}
+        for position, (index, puzzle) in enumerate(valid):
+            if solution.is_solved[position]:
+                outcomes[index] = BatchResult(index, puzzle, format_puzzle_line(solution.grids[position].tolist()),
+                                              "solved", int(solution.work[position]), seconds)
+            else:
+                outcomes[index] = BatchResult(index, puzzle, None, "unsolved", int(solution.work[position]), seconds)
+
+        for index, puzzle in chunk:
+            yield outcomes.get(index) or BatchResult(index, puzzle, None, "invalid", 0, seconds)
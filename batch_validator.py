@@ -0,0 +1,128 @@
+from typing import Iterable, Iterator, NamedTuple, Tuple
+
+import numpy as np
+
+from board import Board
+from solver import Solver
+
+DuplicateDataStructure = Solver.DuplicateDataStructure
+
+DIGITS = np.arange(1, 9 + 1, dtype=np.uint8)
+
+
+class BatchValidation(NamedTuple):
+    """
+    Verdicts for a batch of grids. The duplicate arrays only hold the boards listed in failing, indexed by
+    (failing position, unit number, digit - 1)
+    """
+    is_solved: np.ndarray
+    has_duplicates: np.ndarray
+    has_blanks: np.ndarray
+    failing: np.ndarray
+    box_duplicates: np.ndarray
+    row_duplicates: np.ndarray
+    column_duplicates: np.ndarray
+
+    def duplicate_details(self) -> Iterator[Tuple[int, DuplicateDataStructure]]:
+        """
+        Yield the duplicates of every failing board, in the structure returned by Solver.find_duplicates so it can be
+        passed to Solver.print_duplicates
+        :return: Pairs of board index and duplicates found
+        """
+        for position, board_index in enumerate(self.failing):
+            duplicates = {}
+            for element, unit_duplicates in (("boxes", self.box_duplicates), ("rows", self.row_duplicates),
+                                             ("columns", self.column_duplicates)):
+                duplicates[element] = {}
+                for unit_number, digit_index in zip(*np.nonzero(unit_duplicates[position])):
+                    duplicates[element].setdefault(int(unit_number), set()).add(str(digit_index + 1))
+
+            yield int(board_index), duplicates
+
+
+def _count_digits(units: np.ndarray) -> np.ndarray:
+    """
+    Helper function used to count every digit in every unit of a batch
+    :param units: Array of shape (N, 9, 9) holding the cells of 9 units per board
+    :return: Array of shape (N, 9, 9) holding the count of each digit in each unit
+    """
+    return (units[..., np.newaxis] == DIGITS).sum(axis=2, dtype=np.uint8)
+
+
+def _validate_chunk(grids: np.ndarray) -> Tuple[np.ndarray, ...]:
+    """
+    Helper function used to validate one chunk of the batch
+    :param grids: Array of shape (N, 9, 9)
+    :return: Blank flags and the box, row, and column duplicate flags of every board
+    """
+    boxes = grids.reshape(-1, 3, 3, 3, 3).transpose(0, 1, 3, 2, 4).reshape(-1, 9, 9)
+
+    box_duplicates = _count_digits(boxes) > 1
+    row_duplicates = _count_digits(grids) > 1
+    column_duplicates = _count_digits(grids.transpose(0, 2, 1)) > 1
+    has_blanks = (grids == 0).any(axis=(1, 2))
+
+    return has_blanks, box_duplicates, row_duplicates, column_duplicates
+
+
+def validate_grids(grids: np.ndarray, chunk_size: int = 65536) -> BatchValidation:
+    """
+    Check a batch of grids for duplicates and blank cells with vectorized operations. A board is solved when it has
+    neither, matching Solver.check_solve
+    :param grids: Array of shape (N, 9, 9) or (N, 81) with values 0-9, where 0 represents a blank cell
+    :param chunk_size: Number of boards processed at a time, which bounds the temporary memory used
+    :return: Verdicts for every board and duplicate details for the failing ones
+    """
+    # the range is checked before the cast to uint8, which would wrap values such as 256 or -1 into valid cells
+    grids = np.asarray(grids)
+    if ((grids < 0) | (grids > 9)).any():
+        raise ValueError("grid values must be between 0 and 9")
+    grids = grids.astype(np.uint8, copy=False).reshape(-1, 9, 9)
+
+    has_blanks_chunks = []
+    has_duplicates_chunks = []
+    failing_chunks = []
+    detail_chunks = []
+
+    for start in range(0, len(grids), chunk_size):
+        has_blanks, box_duplicates, row_duplicates, column_duplicates = _validate_chunk(grids[start:start + chunk_size])
+
+        has_duplicates = box_duplicates.any(axis=(1, 2)) | row_duplicates.any(axis=(1, 2)) \
+            | column_duplicates.any(axis=(1, 2))
+        failing = np.flatnonzero(has_duplicates | has_blanks)
+
+        has_blanks_chunks.append(has_blanks)
+        has_duplicates_chunks.append(has_duplicates)
+        failing_chunks.append(failing + start)
+        detail_chunks.append((box_duplicates[failing], row_duplicates[failing], column_duplicates[failing]))
+
+    if not has_blanks_chunks:
+        empty_flags = np.zeros(0, dtype=bool)
+        empty_details = np.zeros((0, 9, 9), dtype=bool)
+        return BatchValidation(empty_flags, empty_flags, empty_flags, np.zeros(0, dtype=np.intp),
+                               empty_details, empty_details, empty_details)
+
+    has_blanks = np.concatenate(has_blanks_chunks)
+    has_duplicates = np.concatenate(has_duplicates_chunks)
+
+    return BatchValidation(
+        is_solved=~(has_blanks | has_duplicates),
+        has_duplicates=has_duplicates,
+        has_blanks=has_blanks,
+        failing=np.concatenate(failing_chunks),
+        box_duplicates=np.concatenate([details[0] for details in detail_chunks]),
+        row_duplicates=np.concatenate([details[1] for details in detail_chunks]),
+        column_duplicates=np.concatenate([details[2] for details in detail_chunks])
+    )
+
+
+def validate_boards(boards: Iterable[Board], chunk_size: int = 65536) -> BatchValidation:
+    """
+    Check a batch of Board objects for duplicates and blank cells with vectorized operations
+    :param boards: Boards to check
+    :param chunk_size: Number of boards processed at a time
+    :return: Verdicts for every board and duplicate details for the failing ones
+    """
+    grids = np.array([board.get_cell_values() for board in boards], dtype=np.uint8).reshape(-1, 81)
+
+    return validate_grids(grids, chunk_size)
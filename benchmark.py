@@ -0,0 +1,419 @@
+import argparse
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional, Type
+
+from tabulate import tabulate
+
+from board import Board
+from corpus import CorpusReader
+from flat_board import FlatBoard
+from solver import Solver
+
+CORPORA_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "puzzles", "corpora")
+TIERS = ["easy", "medium", "hard", "pathological"]
+STAGES = ["parse_file", "parse_text", "parse", "generate_candidates", "implement_candidates", "check_solve", "solve"]
+
+# Board backends the stages can run on
+BOARD_CLASSES = {
+    "board": Board,
+    "flat": FlatBoard
+}
+
+# Command line entry point whose startup is measured, and the most its imports may take before the run counts as a
+# regression. Short-lived solver processes pay this on every job
+STARTUP_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sudoku.py")
+STARTUP_MODULE = "sudoku"
+STARTUP_BUDGET_MS = 60.0
+
+BenchmarkResults = Dict
+
+# Directory holding the board files read by the "parse_file" stage, created on first use and removed at exit
+_board_file_directory = None
+
+
+def load_corpus(tier: str) -> List[str]:
+    """
+    Load the bundled puzzles of a difficulty tier
+    :param tier: Name of the tier, one of TIERS
+    :return: 81-character puzzles
+    """
+    corpus_path = os.path.join(CORPORA_DIRECTORY, f"{tier}.txt")
+    return [puzzle.decode("ascii") for _, puzzle in CorpusReader(corpus_path)]
+
+
+def to_board_text(puzzle: str) -> str:
+    """
+    Convert a one-line puzzle into the comma-separated text of board files
+    :param puzzle: 81-character puzzle
+    :return: Board text, one row per line
+    """
+    symbols = ["-" if symbol in ".0" else symbol for symbol in puzzle]
+    return "\n".join(",".join(symbols[row_start:row_start + 9]) for row_start in range(0, 81, 9)) + "\n"
+
+
+def write_board_file(puzzle: str) -> str:
+    """
+    Write a puzzle as a board file in a temporary directory, reusing the file if it was already written
+    :param puzzle: 81-character puzzle
+    :return: Path to the board file
+    """
+    global _board_file_directory
+    if _board_file_directory is None:
+        _board_file_directory = tempfile.TemporaryDirectory(prefix="sudoku-benchmark-")
+
+    board_file_path = os.path.join(_board_file_directory.name, f"{puzzle}.txt")
+    if not os.path.exists(board_file_path):
+        with open(board_file_path, "w") as board_file:
+            board_file.write(to_board_text(puzzle))
+
+    return board_file_path
+
+
+def prepare_stage(stage: str, puzzle: str, engine: str, board_class: Type[Board] = Board) -> Callable[[], object]:
+    """
+    Do the untimed setup of a stage for one puzzle and return the call to time
+    :param stage: Stage name, one of STAGES
+    :param puzzle: 81-character puzzle
+    :param engine: Solver engine used by the solve stage
+    :param board_class: Board backend to load the puzzle into, a value of BOARD_CLASSES
+    :return: Function running the timed part of the stage
+    """
+    if stage == "parse_file":
+        board_file_path = write_board_file(puzzle)
+        return lambda: board_class(board_file_path)
+    if stage == "parse_text":
+        board_text = to_board_text(puzzle)
+        return lambda: board_class.from_text(board_text)
+    if stage == "parse":
+        return lambda: board_class.from_string(puzzle)
+
+    solver = Solver(board_class.from_string(puzzle), engine)
+    if stage == "generate_candidates":
+        return solver.generate_candidates
+    if stage == "implement_candidates":
+        solver.generate_candidates()
+        return solver.implement_candidates
+    if stage == "check_solve":
+        return solver.check_solve
+    if stage == "solve":
+        return solver.solve_board
+
+    raise ValueError(f"stage must be one of: {', '.join(STAGES)}")
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """
+    Return the nearest-rank percentile of already sorted values
+    :param sorted_values: Values sorted in ascending order
+    :param fraction: Percentile as a fraction, e.g. 0.99
+    :return: Value at the percentile
+    """
+    rank = max(0, math.ceil(fraction * len(sorted_values)) - 1)
+    return sorted_values[rank]
+
+
+def measure_peak_memory(stage: str, puzzles: List[str], engine: str, board_class: Type[Board] = Board) -> int:
+    """
+    Measure the largest memory allocated while running a stage on any single puzzle. Run separately from the timing
+    pass because tracing allocations slows everything down
+    :param stage: Stage name, one of STAGES
+    :param puzzles: Puzzles to run
+    :param engine: Solver engine used by the solve stage
+    :param board_class: Board backend to load the puzzles into
+    :return: Peak bytes allocated by the stage, including its setup
+    """
+    peak = 0
+
+    tracemalloc.start()
+    try:
+        for puzzle in puzzles:
+            tracemalloc.reset_peak()
+            baseline, _ = tracemalloc.get_traced_memory()
+            prepare_stage(stage, puzzle, engine, board_class)()
+            _, puzzle_peak = tracemalloc.get_traced_memory()
+            peak = max(peak, puzzle_peak - baseline)
+    finally:
+        tracemalloc.stop()
+
+    return peak
+
+
+def measure_instance_memory(puzzles: List[str], engine: str, board_class: Type[Board] = Board) -> Dict:
+    """
+    Measure the memory held by each live Board and Solver, with the candidates of every solver generated. Many
+    instances are kept alive at once, as in batch and service runs, and the total is averaged
+    :param puzzles: Puzzles to load
+    :param engine: Solver engine of the solvers
+    :param board_class: Board backend to load the puzzles into
+    :return: Average bytes held per board and per solver
+    """
+    tracemalloc.start()
+    try:
+        start, _ = tracemalloc.get_traced_memory()
+        boards = [board_class.from_string(puzzle) for puzzle in puzzles]
+        boards_allocated, _ = tracemalloc.get_traced_memory()
+
+        solvers = [Solver(board, engine) for board in boards]
+        for solver in solvers:
+            solver.generate_candidates()
+        solvers_allocated, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "board_bytes": (boards_allocated - start) / len(boards),
+        "solver_bytes": (solvers_allocated - boards_allocated) / len(solvers)
+    }
+
+
+def benchmark_stage(stage: str, puzzles: List[str], engine: str, repeat: int,
+                    board_class: Type[Board] = Board) -> Dict:
+    """
+    Time a stage over every puzzle of a corpus
+    :param stage: Stage name, one of STAGES
+    :param puzzles: Puzzles to run
+    :param engine: Solver engine used by the solve stage
+    :param repeat: Number of timed passes over the puzzles
+    :param board_class: Board backend to load the puzzles into
+    :return: Throughput, latency, and memory figures for the stage
+    """
+    latencies = []
+    solved = 0
+
+    for _ in range(repeat):
+        for puzzle in puzzles:
+            timed_call = prepare_stage(stage, puzzle, engine, board_class)
+            start = time.perf_counter()
+            outcome = timed_call()
+            latencies.append(time.perf_counter() - start)
+
+            if stage == "solve" and outcome[0]:
+                solved += 1
+
+    latencies.sort()
+    total_time = sum(latencies)
+
+    stage_results = {
+        "puzzles": len(latencies),
+        "puzzles_per_second": len(latencies) / total_time if total_time else 0.0,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "peak_memory_kb": measure_peak_memory(stage, puzzles, engine, board_class) / 1024
+    }
+    if stage == "solve":
+        stage_results["solved"] = solved // repeat
+
+    return stage_results
+
+
+def measure_import_time() -> float:
+    """
+    Measure the cumulative import time of the command line entry point in a fresh interpreter, using -X importtime
+    :return: Milliseconds spent importing the entry point and everything it imports
+    """
+    completed = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {STARTUP_MODULE}"],
+                               cwd=os.path.dirname(STARTUP_SCRIPT), capture_output=True, text=True, check=True)
+
+    # lines look like "import time:  self [us] | cumulative | imported package", with the entry point last
+    for line in reversed(completed.stderr.splitlines()):
+        fields = line.split("|")
+        if len(fields) == 3 and fields[2].strip() == STARTUP_MODULE:
+            return int(fields[1]) / 1000
+
+    raise RuntimeError(f"-X importtime did not report {STARTUP_MODULE}")
+
+
+def measure_startup(puzzle: str, repeat: int) -> Dict:
+    """
+    Measure how long a fresh process takes to import the entry point, and to start, solve one puzzle, and exit
+    :param puzzle: 81-character puzzle solved by the cold-start run
+    :param repeat: Number of fresh processes started for each measurement. The fastest is kept
+    :return: Import and cold-start times in milliseconds
+    """
+    import_times = []
+    cold_start_times = []
+
+    for _ in range(repeat):
+        import_times.append(measure_import_time())
+
+        start = time.perf_counter()
+        subprocess.run([sys.executable, STARTUP_SCRIPT, "solve", "--format", "line", puzzle], capture_output=True,
+                       check=True)
+        cold_start_times.append((time.perf_counter() - start) * 1000)
+
+    return {
+        "import_ms": min(import_times),
+        "cold_start_ms": min(cold_start_times)
+    }
+
+
+def run_benchmark(tiers: List[str], stages: List[str], engine: str, repeat: int, startup: bool = True,
+                  board_class_name: str = "board") -> BenchmarkResults:
+    """
+    Run every stage over the bundled corpus of every tier
+    :param tiers: Tiers to run
+    :param stages: Stages to run
+    :param engine: Solver engine used by the solve stage
+    :param repeat: Number of timed passes over each corpus
+    :param startup: Also measure the startup time of the command line entry point
+    :param board_class_name: Board backend the stages run on, a key of BOARD_CLASSES
+    :return: Results keyed by tier and stage, with details of the run
+    """
+    board_class = BOARD_CLASSES[board_class_name]
+    results = {
+        "engine": engine,
+        "board_class": board_class_name,
+        "repeat": repeat,
+        "python": platform.python_version(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "tiers": {}
+    }
+
+    for tier in tiers:
+        puzzles = load_corpus(tier)
+        results["tiers"][tier] = {stage: benchmark_stage(stage, puzzles, engine, repeat, board_class)
+                                  for stage in stages}
+
+    easy_puzzles = load_corpus("easy")
+    results["instance_memory"] = measure_instance_memory(easy_puzzles, engine, board_class)
+    if startup:
+        results["startup"] = measure_startup(easy_puzzles[0], repeat)
+
+    return results
+
+
+def compare_to_baseline(results: BenchmarkResults, baseline: BenchmarkResults, tolerance: float) -> List[str]:
+    """
+    Compare results with a stored baseline and describe every regression beyond the tolerance
+    :param results: Results of the current run
+    :param baseline: Results of the baseline run
+    :param tolerance: Allowed relative slowdown, e.g. 0.2 for 20%
+    :return: Regressions found
+    """
+    regressions = []
+
+    for tier, tier_results in results["tiers"].items():
+        for stage, stage_results in tier_results.items():
+            baseline_stage = baseline.get("tiers", {}).get(tier, {}).get(stage)
+            if baseline_stage is None:
+                continue
+
+            if stage_results["puzzles_per_second"] < baseline_stage["puzzles_per_second"] * (1 - tolerance):
+                regressions.append(f"{tier}/{stage}: throughput {stage_results['puzzles_per_second']:.1f}/s, "
+                                   f"baseline {baseline_stage['puzzles_per_second']:.1f}/s")
+            if stage_results["p99_ms"] > baseline_stage["p99_ms"] * (1 + tolerance):
+                regressions.append(f"{tier}/{stage}: p99 {stage_results['p99_ms']:.3f} ms, "
+                                   f"baseline {baseline_stage['p99_ms']:.3f} ms")
+
+    instance_memory = results.get("instance_memory")
+    baseline_instance_memory = baseline.get("instance_memory")
+    if instance_memory is not None and baseline_instance_memory is not None:
+        for measure in ("board_bytes", "solver_bytes"):
+            if instance_memory[measure] > baseline_instance_memory[measure] * (1 + tolerance):
+                regressions.append(f"instance memory: {measure} {instance_memory[measure]:.0f}, "
+                                   f"baseline {baseline_instance_memory[measure]:.0f}")
+
+    startup = results.get("startup")
+    baseline_startup = baseline.get("startup")
+    if startup is not None and baseline_startup is not None:
+        for measure in ("import_ms", "cold_start_ms"):
+            if startup[measure] > baseline_startup[measure] * (1 + tolerance):
+                regressions.append(f"startup: {measure} {startup[measure]:.1f}, "
+                                   f"baseline {baseline_startup[measure]:.1f}")
+
+    return regressions
+
+
+def check_startup_budget(results: BenchmarkResults, budget_ms: float) -> List[str]:
+    """
+    Check the measured import time of the entry point against the startup budget
+    :param results: Results of the current run
+    :param budget_ms: Most milliseconds the imports may take
+    :return: Description of the overrun, or an empty list if within budget or startup was not measured
+    """
+    startup = results.get("startup")
+    if startup is None or startup["import_ms"] <= budget_ms:
+        return []
+
+    return [f"startup: import_ms {startup['import_ms']:.1f}, budget {budget_ms:.1f}"]
+
+
+def print_results(results: BenchmarkResults) -> None:
+    """
+    Print the results as a table
+    :param results: Results to print
+    :return: None
+    """
+    rows = []
+    for tier, tier_results in results["tiers"].items():
+        for stage, stage_results in tier_results.items():
+            rows.append([tier, stage, stage_results["puzzles"], f"{stage_results['puzzles_per_second']:.1f}",
+                         f"{stage_results['p50_ms']:.3f}", f"{stage_results['p99_ms']:.3f}",
+                         f"{stage_results['peak_memory_kb']:.1f}", stage_results.get("solved", "")])
+
+    headers = ["Tier", "Stage", "Puzzles", "Puzzles/s", "p50 ms", "p99 ms", "Peak KiB", "Solved"]
+    print(f"Engine: {results['engine']}, board class: {results.get('board_class', 'board')}, "
+          f"Python {results['python']}")
+    print(tabulate(rows, headers=headers, tablefmt="pretty"))
+
+    instance_memory = results["instance_memory"]
+    print(f"Instance memory: board {instance_memory['board_bytes']:.0f} bytes, "
+          f"solver {instance_memory['solver_bytes']:.0f} bytes")
+
+    startup = results.get("startup")
+    if startup is not None:
+        print(f"Startup: import {startup['import_ms']:.1f} ms, cold start {startup['cold_start_ms']:.1f} ms")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the Sudoku solver over the bundled corpora")
+    parser.add_argument("--tiers", nargs="+", choices=TIERS, default=TIERS)
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=STAGES)
+    parser.add_argument("--engine", choices=Solver.ENGINES, default="backtracking")
+    parser.add_argument("--board-class", choices=BOARD_CLASSES, default="board",
+                        help="board backend to run the stages on, e.g. to compare FlatBoard against Board")
+    parser.add_argument("--repeat", type=int, default=3, help="timed passes over each corpus")
+    parser.add_argument("--output", help="save the results as JSON to this path")
+    parser.add_argument("--baseline", help="compare against results saved by an earlier run")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative slowdown against the baseline")
+    parser.add_argument("--startup-budget", type=float, default=STARTUP_BUDGET_MS,
+                        help="most milliseconds the entry point imports may take")
+    parser.add_argument("--skip-startup", action="store_true", help="do not measure startup time")
+    arguments = parser.parse_args(argv)
+
+    results = run_benchmark(arguments.tiers, arguments.stages, arguments.engine, arguments.repeat,
+                            not arguments.skip_startup, arguments.board_class)
+    print_results(results)
+
+    over_budget = check_startup_budget(results, arguments.startup_budget)
+    for overrun in over_budget:
+        print(f"Over budget: {overrun}")
+
+    if arguments.output:
+        with open(arguments.output, "w") as output_file:
+            json.dump(results, output_file, indent=2)
+
+    if arguments.baseline:
+        with open(arguments.baseline) as baseline_file:
+            regressions = compare_to_baseline(results, json.load(baseline_file), arguments.tolerance)
+
+        if regressions:
+            print("Regressions against baseline:")
+            for regression in regressions:
+                print(f"  {regression}")
+            return 1
+        print("No regressions against baseline")
+
+    return 1 if over_budget else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
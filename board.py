@@ -1,23 +1,251 @@
 import math
-from typing import List, Union
+from functools import lru_cache
+from typing import List, Optional, Sequence, Tuple, Union
+
+from layout import LAYOUT, get_layout
+from rendering import render_box, render_grid
+from validator import IncrementalValidator
+
+# Occupancy masks use bit (digit - 1) to record that a digit is present in a row, column, or box. These are the
+# tables of the standard 9x9 board; other sizes use the tables of their Layout
+FULL_MASK = LAYOUT.full_mask
+DIGIT_TO_BIT = LAYOUT.digit_to_bit
+MASK_TO_DIGITS = LAYOUT.mask_to_digits
+
+# Characters accepted as blank cells in one-line puzzles, and the only blank symbol of board files
+LINE_BLANK_CHARACTERS = ".0-"
+BOARD_BLANK_CHARACTER = "-"
+
+
+@lru_cache(maxsize=None)
+def get_line_tables(box_size: int = 3) -> Tuple[bytes, bytes]:
+    """
+    Return the tables used to parse one-line puzzles of a board size with bytes.translate
+    :param box_size: Number of rows and columns in a box
+    :return: The bytes accepted in a puzzle, and the table translating them into cell values (0 for blank)
+    """
+    layout = get_layout(box_size)
+    if layout.size > 9:
+        raise ValueError("one-line puzzles are only supported up to 9x9")
+
+    valid_bytes = "".join(layout.symbols).encode("ascii") + LINE_BLANK_CHARACTERS.encode("ascii")
+    values = bytes(range(1, layout.size + 1)) + bytes(len(LINE_BLANK_CHARACTERS))
+
+    return valid_bytes, bytes.maketrans(valid_bytes, values)
+
+
+@lru_cache(maxsize=None)
+def _get_symbol_table(box_size: int = 3) -> bytes:
+    """
+    Helper function used to look up the bytes.translate table turning cell values (0 for blank) into board symbols
+    :param box_size: Number of rows and columns in a box
+    :return: Translation table
+    """
+    symbols = BOARD_BLANK_CHARACTER + "".join(get_layout(box_size).symbols)
+    return bytes.maketrans(bytes(range(len(symbols))), symbols.encode("ascii"))
+
+
+def parse_puzzle_bytes(puzzle: bytes, box_size: int = 3) -> bytes:
+    """
+    Parse a one-line puzzle held in bytes in row-major order, one character per cell, using ".", "0", or "-" for
+    blank cells. Only boards whose symbols are single characters (up to 9x9) have a one-line form
+    :param puzzle: Puzzle bytes, or any buffer such as a memoryview. Surrounding whitespace is ignored
+    :param box_size: Number of rows and columns in a box
+    :return: One byte per cell holding its value, 0 for blank
+    """
+    valid_bytes, value_table = get_line_tables(box_size)
+    cell_count = get_layout(box_size).cell_count
+
+    puzzle = bytes(puzzle).strip()
+    if len(puzzle) != cell_count:
+        raise ValueError(f"puzzle must have {cell_count} cells, got {len(puzzle)}")
+
+    invalid = puzzle.translate(None, valid_bytes)
+    if invalid:
+        raise ValueError(f"{chr(invalid[0])!r} is not a valid cell")
+
+    return puzzle.translate(value_table)
+
+
+def parse_puzzle_line(puzzle: str, box_size: int = 3) -> List[int]:
+    """
+    Parse a one-line puzzle in row-major order, one character per cell, using ".", "0", or "-" for blank cells.
+    Only boards whose symbols are single characters (up to 9x9) have a one-line form
+    :param puzzle: Puzzle text. Surrounding whitespace is ignored
+    :param box_size: Number of rows and columns in a box
+    :return: Flat list of integers, 0 for blank
+    """
+    return list(parse_puzzle_bytes(_encode_puzzle_line(puzzle), box_size))
+
+
+def _encode_puzzle_line(puzzle: str) -> bytes:
+    """
+    Helper function used to encode a one-line puzzle as ASCII, reporting other characters as invalid cells
+    :param puzzle: Puzzle text
+    :return: Puzzle bytes
+    """
+    try:
+        return puzzle.encode("ascii")
+    except UnicodeEncodeError as error:
+        raise ValueError(f"{puzzle[error.start]!r} is not a valid cell") from None
+
+
+def parse_board_text(text: str, box_size: int = 3) -> List[List[str]]:
+    """
+    Parse the comma-separated board text used by board files: one row per line, one symbol per cell, using "-" for
+    blank cells. Blank lines are ignored
+    :param text: Board text
+    :param box_size: Number of rows and columns in a box
+    :return: 2D array of cell symbols
+    """
+    layout = get_layout(box_size)
+    valid_symbols = {BOARD_BLANK_CHARACTER, *layout.symbols}
+
+    rows = [line.split(",") for line in text.split("\n") if line.strip()]
+    if len(rows) != layout.size:
+        raise ValueError(f"board must have {layout.size} rows, got {len(rows)}")
+
+    for row_index, row in enumerate(rows):
+        if len(row) != layout.size:
+            raise ValueError(f"row {row_index} must have {layout.size} cells, got {len(row)}")
+
+        if not valid_symbols.issuperset(row):
+            row[:] = [symbol.strip() for symbol in row]
+            for column_index, symbol in enumerate(row):
+                if symbol not in valid_symbols:
+                    raise ValueError(f"{symbol!r} at row {row_index}, column {column_index} is not a valid cell")
+
+    return rows
 
 
 class Board:
     """
-    Class used to represent and interact with the Sudoku puzzle board
+    Class used to represent and interact with the Sudoku puzzle board. The board is made of box_size x box_size boxes,
+    so the standard 9x9 board has a box_size of 3. Digits are written as the strings "1" to str(size)
     """
     TwoDBoard = List[List[str]]
     Box = TwoDBoard
 
-    def __init__(self, input_file_path: str) -> None:
+    # Instances hold no __dict__, which keeps thousands of boards in one process small
+    __slots__ = ("input_file_path", "layout", "box_size", "size", "digit_to_bit", "box_of_cell", "full_mask", "board",
+                 "row_masks", "column_masks", "box_masks", "row_counts", "column_counts", "box_counts", "validator")
+
+    def __init__(self, input_file_path: Optional[str] = None, box_size: int = 3) -> None:
         """
         Initialize the Board object by loading the puzzle at the file name specified
-        :param input_file_path: Path to the file with the board text
+        :param input_file_path: Path to the file with the board text. An empty board is created if not given
+        :param box_size: Number of rows and columns in a box
+        """
+        self._set_attributes(input_file_path, box_size)
+
+        if input_file_path is None:
+            self.initialize_empty_board()
+        else:
+            self.initialize_board(input_file_path)
+
+    def _set_attributes(self, input_file_path: Optional[str], box_size: int) -> None:
+        """
+        Helper function used to set every attribute of a board before its grid is loaded
+        :param input_file_path: Path to the file with the board text. Optional
+        :param box_size: Number of rows and columns in a box
+        :return: None
         """
         self.input_file_path = input_file_path
 
+        self.layout = get_layout(box_size)
+        self.box_size = box_size
+        self.size = self.layout.size
+        self.digit_to_bit = self.layout.digit_to_bit
+        self.box_of_cell = self.layout.box_of_cell
+        self.full_mask = self.layout.full_mask
+
         self.board = None
-        self.initialize_board(input_file_path)
+
+        # Masks of the digits already placed in each row, column, and box
+        self.row_masks = [0] * self.size
+        self.column_masks = [0] * self.size
+        self.box_masks = [0] * self.size
+
+        # Number of cells holding each digit in each row, column, and box, at index unit * size + digit - 1. A mask bit
+        # is cleared once its count drops to 0, which keeps boards with duplicates right. The counts are only needed
+        # to take digits out, so they are built by the first removal after the masks are rebuilt, and None until then
+        self.row_counts = None
+        self.column_counts = None
+        self.box_counts = None
+
+        # Incremental validator updated on every insert and remove, only when attached with attach_validator
+        self.validator = None
+
+    @classmethod
+    def from_string(cls, puzzle: str, box_size: int = 3) -> "Board":
+        """
+        Create a board from a one-line puzzle, e.g. 81 characters for 9x9, using ".", "0", or "-" for blank cells
+        :param puzzle: Puzzle text
+        :param box_size: Number of rows and columns in a box
+        :return: Board holding the puzzle
+        """
+        return cls.from_bytes(_encode_puzzle_line(puzzle), box_size)
+
+    @classmethod
+    def from_bytes(cls, puzzle: Union[bytes, bytearray, memoryview], box_size: int = 3) -> "Board":
+        """
+        Create a board from a one-line puzzle held in bytes or any other buffer, e.g. a line of a memory-mapped corpus
+        :param puzzle: Puzzle bytes, using ".", "0", or "-" for blank cells
+        :param box_size: Number of rows and columns in a box
+        :return: Board holding the puzzle
+        """
+        values = parse_puzzle_bytes(puzzle, box_size)
+
+        # the parsed values are already checked, so the board is built from them directly instead of starting from an
+        # empty board and checking them again in load_cell_values
+        board = cls.__new__(cls)
+        board._set_attributes(None, box_size)
+        board._load_parsed_values(values)
+
+        return board
+
+    @classmethod
+    def from_text(cls, text: str, box_size: int = 3) -> "Board":
+        """
+        Create a board from the comma-separated text used by board files, without writing it to a file
+        :param text: Board text, one row per line
+        :param box_size: Number of rows and columns in a box
+        :return: Board holding the puzzle
+        """
+        board = cls(box_size=box_size)
+        board.initialize_board_from_text(text)
+
+        return board
+
+    @classmethod
+    def from_array(cls, array, box_size: int = 3) -> "Board":
+        """
+        Create a board from a NumPy array of cell values, e.g. a row of a batch of puzzles
+        :param array: Integer array with one value per cell in any shape, e.g. (81,) or (9, 9), using 0 for blank
+        :param box_size: Number of rows and columns in a box
+        :return: Board holding the puzzle
+        """
+        board = cls(box_size=box_size)
+        board.load_cell_values(array.ravel().tolist())
+
+        return board
+
+    def initialize_empty_board(self) -> None:
+        """
+        Set the board class variable to a board with every cell blank
+        :return: None
+        """
+        self._replace_rows([[BOARD_BLANK_CHARACTER] * self.size for _ in range(self.size)])
+
+        # every mask of a blank board is empty, so there is nothing to scan
+        self.row_masks = [0] * self.size
+        self.column_masks = [0] * self.size
+        self.box_masks = [0] * self.size
+        self.row_counts = None
+        self.column_counts = None
+        self.box_counts = None
+        if self.validator is not None:
+            self.validator.rebuild()
 
     def initialize_board(self, input_file_path: str) -> None:
         """
@@ -25,14 +253,217 @@ class Board:
         :param input_file_path: Path to the file with the board text
         :return: None
         """
-        board = []
-
         with open(input_file_path, 'r') as puzzle:
-            for line in puzzle:
-                line = line.strip()
-                board.append(line.split(","))
+            self.initialize_board_from_text(puzzle.read())
 
-        self.board = board
+    def initialize_board_from_text(self, text: str) -> None:
+        """
+        Set the board class variable from comma-separated board text
+        :param text: Board text, one row per line
+        :return: None
+        """
+        self._replace_rows(parse_board_text(text, self.box_size))
+        self.initialize_masks()
+
+    def load_cell_values(self, values: Sequence[int]) -> None:
+        """
+        Replace the whole board with a flat sequence of integers in row-major order, using 0 for blank cells. Faster
+        than set_cell_values since the board is rebuilt at once instead of one insert per cell
+        :param values: Flat sequence of cell values, e.g. a list or bytes
+        :return: None
+        """
+        self._check_cell_values(values)
+
+        size = self.size
+        cell_symbols = [BOARD_BLANK_CHARACTER, *self.layout.symbols]
+        self._replace_rows([[cell_symbols[value] for value in values[row_start:row_start + size]]
+                            for row_start in range(0, self.layout.cell_count, size)])
+        self._set_masks_from_values(values)
+
+    def _load_parsed_values(self, values: bytes) -> None:
+        """
+        Helper function used to fill the board from cell values returned by parse_puzzle_bytes, which are known to be
+        valid. The rows are decoded with one bytes.translate and the masks are built from the values
+        :param values: One byte per cell holding its value, 0 for blank
+        :return: None
+        """
+        size = self.size
+        text = values.translate(_get_symbol_table(self.box_size)).decode("ascii")
+
+        self._replace_rows([list(text[row_start:row_start + size]) for row_start in range(0, len(text), size)])
+        self._set_masks_from_values(values)
+
+    def _replace_rows(self, rows: TwoDBoard) -> None:
+        """
+        Helper function used to replace the contents of the board with new rows. Once the board exists its row lists
+        are updated in place, so the 2D array returned by get_board, e.g. the one cached by a Solver, stays current
+        :param rows: New rows of the board
+        :return: None
+        """
+        if self.board is None:
+            self.board = rows
+            return
+
+        for current_row, row in zip(self.board, rows):
+            current_row[:] = row
+
+    def _check_cell_values(self, values: Sequence[int]) -> None:
+        """
+        Helper function used to validate a flat sequence of cell values before loading it
+        :param values: Flat sequence of cell values
+        :return: None
+        """
+        if len(values) != self.layout.cell_count:
+            raise ValueError(f"values must have {self.layout.cell_count} cells, got {len(values)}")
+        if values and (min(values) < 0 or max(values) > self.size):
+            raise ValueError(f"cell values must be between 0 and {self.size}")
+
+    def initialize_masks(self) -> None:
+        """
+        Rebuild the row, column, and box occupancy masks from the current board
+        :return: None
+        """
+        self._set_masks_from_values(self.get_cell_values())
+
+    def _set_masks_from_values(self, values: Sequence[int]) -> None:
+        """
+        Helper function used to rebuild the row, column, and box occupancy masks from a flat sequence of cell values.
+        The digit counts are dropped, to be rebuilt by the next removal
+        :param values: Flat sequence of cell values in row-major order, 0 for blank
+        :return: None
+        """
+        row_masks = [0] * self.size
+        column_masks = [0] * self.size
+        box_masks = [0] * self.size
+
+        row_of_cell = self.layout.row_of_cell
+        column_of_cell = self.layout.column_of_cell
+        box_of_cell = self.box_of_cell
+        for cell, value in enumerate(values):
+            if value:
+                bit = 1 << (value - 1)
+                row_masks[row_of_cell[cell]] |= bit
+                column_masks[column_of_cell[cell]] |= bit
+                box_masks[box_of_cell[cell]] |= bit
+
+        self.row_masks = row_masks
+        self.column_masks = column_masks
+        self.box_masks = box_masks
+        self.row_counts = None
+        self.column_counts = None
+        self.box_counts = None
+        if self.validator is not None:
+            self.validator.rebuild()
+
+    def _count_digits(self) -> None:
+        """
+        Helper function used to build the number of cells holding each digit in each row, column, and box
+        :return: None
+        """
+        size = self.size
+        row_counts = [0] * self.layout.cell_count
+        column_counts = [0] * self.layout.cell_count
+        box_counts = [0] * self.layout.cell_count
+
+        row_of_cell = self.layout.row_of_cell
+        column_of_cell = self.layout.column_of_cell
+        box_of_cell = self.box_of_cell
+        for cell, value in enumerate(self.get_cell_values()):
+            if value:
+                row_counts[row_of_cell[cell] * size + value - 1] += 1
+                column_counts[column_of_cell[cell] * size + value - 1] += 1
+                box_counts[box_of_cell[cell] * size + value - 1] += 1
+
+        self.row_counts = row_counts
+        self.column_counts = column_counts
+        self.box_counts = box_counts
+
+    def attach_validator(self) -> IncrementalValidator:
+        """
+        Attach an incremental validator built from the current board, replacing any attached before. Every later
+        insert and remove updates it
+        :return: The attached validator
+        """
+        self.validator = IncrementalValidator(self)
+        return self.validator
+
+    def detach_validator(self) -> None:
+        """
+        Stop updating the attached validator
+        :return: None
+        """
+        self.validator = None
+
+    def _set_mask_bit(self, row_index: int, column_index: int, bit: int) -> None:
+        """
+        Helper function used to mark a digit bit as present in the row, column, and box of a cell, and count it once
+        the digit counts are built
+        :param row_index: Row of the cell
+        :param column_index: Column of the cell
+        :param bit: Mask bit of the digit placed in the cell
+        :return: None
+        """
+        box_index = self.box_of_cell[row_index * self.size + column_index]
+        self.row_masks[row_index] |= bit
+        self.column_masks[column_index] |= bit
+        self.box_masks[box_index] |= bit
+
+        if self.row_counts is not None:
+            digit_index = bit.bit_length() - 1
+            self.row_counts[row_index * self.size + digit_index] += 1
+            self.column_counts[column_index * self.size + digit_index] += 1
+            self.box_counts[box_index * self.size + digit_index] += 1
+
+    def _clear_mask_bit(self, row_index: int, column_index: int, bit: int) -> None:
+        """
+        Helper function used to uncount a digit about to be taken out of a cell from its row, column, and box. A unit
+        keeps the bit while its count is above 0, i.e. another of its cells still holds the digit on a board with
+        duplicates. Must be called while the cell still holds the digit, since the counts may be built from the board
+        :param row_index: Row of the cell
+        :param column_index: Column of the cell
+        :param bit: Mask bit of the digit removed from the cell
+        :return: None
+        """
+        if self.row_counts is None:
+            self._count_digits()
+
+        box_index = self.box_of_cell[row_index * self.size + column_index]
+        digit_index = bit.bit_length() - 1
+
+        row_count = row_index * self.size + digit_index
+        self.row_counts[row_count] -= 1
+        if not self.row_counts[row_count]:
+            self.row_masks[row_index] &= ~bit
+
+        column_count = column_index * self.size + digit_index
+        self.column_counts[column_count] -= 1
+        if not self.column_counts[column_count]:
+            self.column_masks[column_index] &= ~bit
+
+        box_count = box_index * self.size + digit_index
+        self.box_counts[box_count] -= 1
+        if not self.box_counts[box_count]:
+            self.box_masks[box_index] &= ~bit
+
+    def get_box_number(self, row_index: int, column_index: int) -> int:
+        """
+        Return the number of the box containing the given cell, using the same numbering as extract_box_from_box_number
+        :param row_index: Row of the cell
+        :param column_index: Column of the cell
+        :return: Box number of the cell
+        """
+        return (row_index // self.box_size) * self.box_size + column_index // self.box_size
+
+    def get_candidate_mask(self, row_index: int, column_index: int) -> int:
+        """
+        Return the mask of digits not yet used in the row, column, or box of the given cell
+        :param row_index: Row of the cell
+        :param column_index: Column of the cell
+        :return: Mask of the digits that can still be placed in the cell
+        """
+        used = (self.row_masks[row_index] | self.column_masks[column_index]
+                | self.box_masks[self.box_of_cell[row_index * self.size + column_index]])
+        return ~used & self.full_mask
 
     def insert_number_into_board(self, row_number: int, column_number: int, number: str) -> None:
         """
@@ -46,7 +477,18 @@ class Board:
             raise ValueError("number must be a string")
 
         row = self.get_board_rows(row_number)
+        previous_bit = self.digit_to_bit.get(row[column_number])
+        if previous_bit is not None:
+            self._clear_mask_bit(row_number, column_number, previous_bit)
+
         row[column_number] = number
+        bit = self.digit_to_bit.get(number)
+        if bit is not None:
+            self._set_mask_bit(row_number, column_number, bit)
+
+        if self.validator is not None:
+            self.validator.update(row_number, column_number, previous_bit.bit_length() if previous_bit else 0,
+                                  bit.bit_length() if bit else 0)
 
     def remove_number_from_board(self, row_number: int, column_number: int) -> None:
         """
@@ -56,8 +498,15 @@ class Board:
         :return: None
         """
         row = self.get_board_rows(row_number)
+        previous_bit = self.digit_to_bit.get(row[column_number])
+        if previous_bit is not None:
+            self._clear_mask_bit(row_number, column_number, previous_bit)
+
         row[column_number] = "-"
 
+        if self.validator is not None and previous_bit is not None:
+            self.validator.update(row_number, column_number, previous_bit.bit_length(), 0)
+
     def get_board_rows(self, row_start: int, row_end: int = None) -> Union[List[str], TwoDBoard]:
         """
         Return a range of rows from the class board variable. If no ending row is specified, return a singular row
@@ -108,15 +557,16 @@ class Board:
         """
         Extract the box 2D array data from the class board variable using a box number.
         General logic is to identify the top-left coordinate of each box and return the box starting at that coordinate.
-        Boxes are identified by number using the following pattern:
+        Boxes are identified by number using the following pattern on a 9x9 board, and the same left to right, top to
+        bottom order on other sizes:
         0,1,2
         3,4,5
         6,7,8
         :param box_number: Number used to identify what box to check
         :return: Box data corresponding to the number given
         """
-        starting_row = math.floor(box_number / 3) * 3
-        starting_column = box_number % 3 * 3
+        starting_row = math.floor(box_number / self.box_size) * self.box_size
+        starting_column = box_number % self.box_size * self.box_size
 
         return self.get_box_array(starting_row, starting_column)
 
@@ -129,11 +579,11 @@ class Board:
         :param column_index: Column of the cell to extract the box from
         :return: Box data corresponding to the cell coordinates given
         """
-        if column_index % 3 != 0:
-            column_index = column_index - (column_index % 3)
+        if column_index % self.box_size != 0:
+            column_index = column_index - (column_index % self.box_size)
 
-        if row_index % 3 != 0:
-            row_index = row_index - (row_index % 3)
+        if row_index % self.box_size != 0:
+            row_index = row_index - (row_index % self.box_size)
 
         return self.get_box_array(row_index, column_index)
 
@@ -146,9 +596,9 @@ class Board:
         """
         box = []
 
-        relevant_rows = self.get_board_rows(starting_row, starting_row + 3)
+        relevant_rows = self.get_board_rows(starting_row, starting_row + self.box_size)
         for row in relevant_rows:
-            columns = row[starting_column:starting_column + 3]
+            columns = row[starting_column:starting_column + self.box_size]
             box.append(columns)
 
         return box
@@ -160,7 +610,28 @@ class Board:
         :param box: Box data to flatten
         :return: Flattened box
         """
-        return sum(box, [])
+        return [element for line in box for element in line]
+
+    def get_cell_values(self) -> List[int]:
+        """
+        Return the board as a flat list of integers in row-major order, using 0 for blank cells
+        :return: Flat list of cell values
+        """
+        digit_to_bit = self.digit_to_bit
+        return [int(cell_value) if cell_value in digit_to_bit else 0 for row in self.board for cell_value in row]
+
+    def set_cell_values(self, values: List[int]) -> None:
+        """
+        Fill the board from a flat list of integers in row-major order, using 0 for blank cells
+        :param values: Flat list of cell values
+        :return: None
+        """
+        for cell, value in enumerate(values):
+            row_index, column_index = divmod(cell, self.size)
+            if value:
+                self.insert_number_into_board(row_index, column_index, str(value))
+            else:
+                self.remove_number_from_board(row_index, column_index)
 
     def get_board(self) -> TwoDBoard:
         """
@@ -174,24 +645,7 @@ class Board:
         Print the 2D board object
         :return: None
         """
-        print("+-------+-------+-------+")
-        line_count = 1
-
-        for line in self.board:
-            print("| ", end="")
-            element_count = 1
-
-            for number in line:
-                number = number.replace("-", " ")
-                print(f"{number} ", end="")
-                if element_count % 3 == 0:
-                    print("| ", end="")
-                element_count += 1
-            print()
-
-            if line_count % 3 == 0:
-                print("+-------+-------+-------+")
-            line_count += 1
+        print(render_grid(self.get_cell_values(), self.box_size))
 
     @staticmethod
     def print_box(box: Box) -> None:
@@ -200,11 +654,4 @@ class Board:
         :param box: Box to print
         :return: None
         """
-        print("+-------+")
-        for line in box:
-            print("| ", end="")
-            for element in line:
-                element = element.replace("-", " ")
-                print(f"{element} ", end="")
-            print("|")
-        print("+-------+")
\ No newline at end of file
+        print(render_box(box))
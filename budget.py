@@ -0,0 +1,95 @@
+import time
+from typing import Optional
+
+
+class BudgetExceeded(Exception):
+    """
+    Raised by the solving engines when a limit of their SolveBudget is reached
+    """
+
+    def __init__(self, limit: str) -> None:
+        """
+        Initialize the BudgetExceeded exception
+        :param limit: Limit reached: "time", "rounds", or "nodes"
+        """
+        super().__init__(f"{limit} limit reached")
+        self.limit = limit
+
+
+class SolveBudget:
+    """
+    Class used to limit the time, propagation rounds, and search nodes of one solve. The engines report their work to
+    the budget as they go, and it raises BudgetExceeded once a limit is passed. Limits left as None are not enforced.
+    A budget is restarted by Solver at the beginning of every solve, so one budget can be shared by many solvers
+    """
+
+    def __init__(self, max_seconds: Optional[float] = None, max_rounds: Optional[int] = None,
+                 max_nodes: Optional[int] = None) -> None:
+        """
+        Initialize the SolveBudget object
+        :param max_seconds: Wall-clock time allowed for the solve. Optional
+        :param max_rounds: Propagation rounds allowed, counting singles rounds and technique rule applications.
+         Optional
+        :param max_nodes: Search nodes allowed. Optional
+        """
+        for name, limit in (("max_seconds", max_seconds), ("max_rounds", max_rounds), ("max_nodes", max_nodes)):
+            if limit is not None and limit < 0:
+                raise ValueError(f"{name} must not be negative")
+
+        self.max_seconds = max_seconds
+        self.max_rounds = max_rounds
+        self.max_nodes = max_nodes
+
+        self.deadline = None
+        self.rounds = 0
+        self.nodes = 0
+        self.start()
+
+    def start(self) -> None:
+        """
+        Start the clock and set the work counters back to zero
+        :return: None
+        """
+        self.deadline = None if self.max_seconds is None else time.perf_counter() + self.max_seconds
+        self.rounds = 0
+        self.nodes = 0
+
+    def add_round(self) -> None:
+        """
+        Count one propagation round and check the round and time limits
+        :return: None
+        """
+        self.rounds += 1
+        if self.max_rounds is not None and self.rounds > self.max_rounds:
+            raise BudgetExceeded("rounds")
+        self.check_time()
+
+    def add_node(self) -> None:
+        """
+        Count one search node and check the node and time limits. Reading the clock costs far less than the
+        propagation done at every node, so it is read every time
+        :return: None
+        """
+        self.nodes += 1
+        if self.max_nodes is not None and self.nodes > self.max_nodes:
+            raise BudgetExceeded("nodes")
+        if self.deadline is not None and time.perf_counter() > self.deadline:
+            raise BudgetExceeded("time")
+
+    def check_time(self) -> None:
+        """
+        Check the time limit
+        :return: None
+        """
+        if self.deadline is not None and time.perf_counter() > self.deadline:
+            raise BudgetExceeded("time")
+
+    @property
+    def remaining_seconds(self) -> Optional[float]:
+        """
+        Time left before the time limit
+        :return: Seconds left, at least 0, or None if time is not limited
+        """
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.perf_counter())
@@ -0,0 +1,235 @@
+from functools import lru_cache
+from itertools import permutations, product
+from typing import List, NamedTuple, Optional, Tuple
+
+# Every column order allowed by the symmetry group: the 3 stacks in any order and the 3 columns of each stack in any
+# order. Row orders follow the same pattern with bands
+COLUMN_ORDERS = [
+    tuple(stack * 3 + within_stack[position][index] for position, stack in enumerate(stack_order) for index in range(3))
+    for stack_order in permutations(range(3))
+    for within_stack in product(permutations(range(3)), repeat=3)
+]
+
+
+class Transform(NamedTuple):
+    """
+    Symmetry mapping a grid onto its canonical form. Canonical cell (row, column) holds the digit of cell
+    (row_order[row], column_order[column]) of the grid, transposed first if transposed is set, relabelled through
+    labels (labels[digit] is the canonical digit and labels[0] is 0)
+    """
+    transposed: bool
+    row_order: Tuple[int, ...]
+    column_order: Tuple[int, ...]
+    labels: Tuple[int, ...]
+
+
+def transpose(values: List[int]) -> List[int]:
+    """
+    Swap the rows and columns of a grid
+    :param values: Flat list of 81 cell values
+    :return: Transposed flat list
+    """
+    return [values[(cell % 9) * 9 + cell // 9] for cell in range(81)]
+
+
+def apply_transform(values: List[int], transform: Transform) -> List[int]:
+    """
+    Map a grid through a transform
+    :param values: Flat list of 81 cell values, 0 for blank
+    :param transform: Transform to apply
+    :return: Transformed flat list
+    """
+    if transform.transposed:
+        values = transpose(values)
+
+    labels = transform.labels
+    return [labels[values[row * 9 + column]] for row in transform.row_order for column in transform.column_order]
+
+
+def invert_transform(values: List[int], transform: Transform) -> List[int]:
+    """
+    Map a grid in canonical form back through the inverse of a transform
+    :param values: Flat list of 81 canonical cell values, 0 for blank
+    :param transform: Transform that produced the canonical form
+    :return: Flat list in the original orientation and digits
+    """
+    digits = [0] * 10
+    for digit, label in enumerate(transform.labels):
+        digits[label] = digit
+
+    original = [0] * 81
+    for row_position, row in enumerate(transform.row_order):
+        for column_position, column in enumerate(transform.column_order):
+            original[row * 9 + column] = digits[values[row_position * 9 + column_position]]
+
+    return transpose(original) if transform.transposed else original
+
+
+def get_invariant_key(values: List[int]) -> Tuple[Tuple[int, ...], ...]:
+    """
+    Compute a key shared by every grid equivalent under the Sudoku symmetry group, far cheaper than canonicalize.
+    Grids with different keys are never equivalent, while grids with the same key usually are, so it can tell when a
+    canonicalization is worth running. The key holds the sorted digit counts and the sorted clue counts of the rows of
+    every band and the columns of every stack, with bands and stacks swapped if that sorts them first
+    :param values: Flat list of 81 cell values, 0 for blank
+    :return: Invariant key
+    """
+    grid = bytes(values)
+    digit_counts = tuple(sorted(grid.count(digit) for digit in range(1, 10)))
+
+    row_counts = [9 - grid.count(0, row * 9, row * 9 + 9) for row in range(9)]
+    column_counts = [9 - grid[column::9].count(0) for column in range(9)]
+    bands = tuple(sorted(tuple(sorted(row_counts[band * 3:band * 3 + 3])) for band in range(3)))
+    stacks = tuple(sorted(tuple(sorted(column_counts[stack * 3:stack * 3 + 3])) for stack in range(3)))
+
+    return (digit_counts, *min((bands, stacks), (stacks, bands)))
+
+
+@lru_cache(maxsize=None)
+def _first_row_arrangements(filled_mask: int) -> Tuple[Tuple[bool, ...], Tuple[Tuple[int, ...], ...]]:
+    """
+    Helper function used to find the column orders that put the blank cells of a first row as early as possible.
+    Digits in the first row are always relabelled in increasing order, so only the position of the blanks matters.
+    The orders are built directly instead of scanning the whole group: stacks with more blanks come first, ties in
+    any order, and within a stack its blank columns come first, each group in any order
+    :param filled_mask: Bit c is set if column c of the row holds a digit
+    :return: Smallest filled pattern and every column order producing it
+    """
+    stack_orderings = []
+    blank_counts = []
+    for stack in range(3):
+        columns = range(stack * 3, stack * 3 + 3)
+        blanks = [column for column in columns if not filled_mask >> column & 1]
+        filled = [column for column in columns if filled_mask >> column & 1]
+        stack_orderings.append([blank_order + filled_order for blank_order in permutations(blanks)
+                                for filled_order in permutations(filled)])
+        blank_counts.append(len(blanks))
+
+    best_orders = []
+    for stack_order in permutations(range(3)):
+        if any(blank_counts[first] < blank_counts[second] for first, second in zip(stack_order, stack_order[1:])):
+            continue
+        for within_stacks in product(*(stack_orderings[stack] for stack in stack_order)):
+            best_orders.append(sum(within_stacks, ()))
+
+    best_pattern = tuple(bool(filled_mask >> column & 1) for column in best_orders[0])
+    return best_pattern, tuple(best_orders)
+
+
+def _relabel_row(grid: Tuple[int, ...], row: int, column_order: Tuple[int, ...], labels: Tuple[int, ...],
+                 next_label: int, bound: Optional[Tuple[int, ...]] = None
+                 ) -> Optional[Tuple[Tuple[int, ...], Tuple[int, ...], int]]:
+    """
+    Helper function used to relabel one row, giving unseen digits the next free labels in reading order
+    :param grid: Flat grid being canonicalized
+    :param row: Row of the grid to relabel
+    :param column_order: Column order of the transform
+    :param labels: Labels assigned so far, indexed by digit (0 where unassigned)
+    :param next_label: Next free label
+    :param bound: Smallest row found so far. Relabelling stops as soon as the row is known to be larger. Optional
+    :return: Relabelled row, updated labels, and updated next free label, or None if the row is larger than bound
+    """
+    relabelled = []
+    new_labels = None
+    # index up to which the row equals the bound, or -1 once the row is known to be smaller
+    tied = -1 if bound is None else 0
+
+    for column in column_order:
+        digit = grid[row * 9 + column]
+        if not digit:
+            label = 0
+        else:
+            label = (new_labels or labels)[digit]
+            if not label:
+                if new_labels is None:
+                    new_labels = list(labels)
+                label = next_label
+                new_labels[digit] = label
+                next_label += 1
+
+        if tied >= 0:
+            if label > bound[tied]:
+                return None
+            tied = tied + 1 if label == bound[tied] else -1
+        relabelled.append(label)
+
+    return tuple(relabelled), labels if new_labels is None else tuple(new_labels), next_label
+
+
+def canonicalize(values: List[int], max_states: int = 20000) -> Optional[Tuple[Tuple[int, ...], Transform]]:
+    """
+    Find the canonical form of a grid under the Sudoku symmetry group: transposition, band and stack swaps, row and
+    column swaps within bands and stacks, and digit relabelling. The canonical form is the lexicographically smallest
+    transformed grid with digits relabelled in reading order. Grids equivalent under the group share a canonical form.
+    The search is built row by row keeping only the transforms tied for the smallest prefix
+    :param values: Flat list of 81 cell values, 0 for blank
+    :param max_states: Give up when more than this many transforms are tied, which happens for nearly empty grids
+    :return: Canonical grid and a transform producing it, or None if the search gave up
+    """
+    grids = (tuple(values), tuple(transpose(values)))
+
+    # first row: the filled pattern decides, and relabelling follows reading order
+    best_pattern = None
+    states = []
+    for transposed, grid in enumerate(grids):
+        for row in range(9):
+            filled_mask = sum(1 << column for column in range(9) if grid[row * 9 + column])
+            pattern, column_orders = _first_row_arrangements(filled_mask)
+            if best_pattern is None or pattern < best_pattern:
+                best_pattern = pattern
+                states = []
+            if pattern == best_pattern:
+                states.extend((transposed, (row,), column_order) for column_order in column_orders)
+
+    if len(states) > max_states:
+        return None
+
+    canonical = []
+    labelled_states = []
+    for transposed, row_order, column_order in states:
+        relabelled, labels, next_label = _relabel_row(grids[transposed], row_order[0], column_order, (0,) * 10, 1)
+        labelled_states.append((transposed, row_order, column_order, labels, next_label))
+    canonical.extend(relabelled)
+
+    # remaining rows: any unused band starts a new band, otherwise stay inside the current band
+    for position in range(1, 9):
+        best_row = None
+        next_states = []
+
+        for transposed, row_order, column_order, labels, next_label in labelled_states:
+            if position % 3 == 0:
+                used_bands = {row // 3 for row in row_order}
+                candidate_rows = [row for row in range(9) if row // 3 not in used_bands]
+            else:
+                band = row_order[-1] // 3
+                candidate_rows = [row for row in range(band * 3, band * 3 + 3) if row not in row_order]
+
+            for row in candidate_rows:
+                # rows already known to be larger than the best one are dropped part way through relabelling
+                relabelled_row = _relabel_row(grids[transposed], row, column_order, labels, next_label, best_row)
+                if relabelled_row is None:
+                    continue
+
+                relabelled, new_labels, new_next_label = relabelled_row
+                if best_row is None or relabelled < best_row:
+                    best_row = relabelled
+                    next_states = []
+                if relabelled == best_row:
+                    next_states.append((transposed, row_order + (row,), column_order, new_labels, new_next_label))
+
+        if len(next_states) > max_states:
+            return None
+
+        canonical.extend(best_row)
+        labelled_states = next_states
+
+    transposed, row_order, column_order, labels, next_label = labelled_states[0]
+
+    # digits missing from the grid take the remaining labels so the relabelling is a full permutation
+    labels = list(labels)
+    for digit in range(1, 10):
+        if not labels[digit]:
+            labels[digit] = next_label
+            next_label += 1
+
+    return tuple(canonical), Transform(bool(transposed), row_order, column_order, tuple(labels))
@@ -0,0 +1,133 @@
+import gzip
+import mmap
+from typing import BinaryIO, Callable, Iterator, List, NamedTuple, Optional, Tuple, Type
+
+from board import Board
+
+# Bytes accepted in a one-line puzzle, and the table translating them into cell codes (0 for blank)
+VALID_PUZZLE_BYTES = b"123456789.0-"
+CELL_CODE_TABLE = bytes.maketrans(VALID_PUZZLE_BYTES, bytes(range(1, 10)) + b"\x00\x00\x00")
+
+GZIP_MAGIC = b"\x1f\x8b"
+
+
+class MalformedLine(NamedTuple):
+    """
+    A corpus line that could not be read as a puzzle
+    """
+    line_number: int
+    text: bytes
+    error: str
+
+
+class CorpusReader:
+    """
+    Class used to stream puzzles from corpus files holding one 81-character puzzle per line, using ".", "0", or "-"
+    for blank cells. Files are read one line at a time, so memory use does not depend on the file size. Gzip files are
+    detected automatically. Blank lines and lines starting with "#" are skipped, and malformed lines are reported
+    through the error callback without stopping the stream
+    """
+
+    def __init__(self, input_file_path: str, use_mmap: bool = False,
+                 on_error: Optional[Callable[[MalformedLine], None]] = None) -> None:
+        """
+        Initialize the CorpusReader object for the file path specified
+        :param input_file_path: Path to the corpus file, optionally gzip compressed
+        :param use_mmap: Memory-map the file instead of reading it through a buffered stream. Ignored for gzip files
+        :param on_error: Called with every malformed line. Optional
+        """
+        self.input_file_path = input_file_path
+        self.use_mmap = use_mmap
+        self.on_error = on_error
+
+        # Number of malformed lines found, and of lines read, by the current or last pass over the file
+        self.malformed_count = 0
+        self.line_count = 0
+
+    def __iter__(self) -> Iterator[Tuple[int, bytes]]:
+        return self.iter_lines()
+
+    def iter_lines(self) -> Iterator[Tuple[int, bytes]]:
+        """
+        Stream the raw puzzles of the corpus
+        :return: Pairs of 1-based line number and the 81 puzzle bytes
+        """
+        self.malformed_count = 0
+        self.line_count = 0
+
+        with open(self.input_file_path, "rb") as corpus:
+            is_gzip = corpus.read(2) == GZIP_MAGIC
+            corpus.seek(0)
+
+            if is_gzip:
+                with gzip.open(corpus) as decompressed:
+                    yield from self._iter_valid_lines(decompressed)
+            elif self.use_mmap:
+                yield from self._iter_valid_lines(self._iter_mmap_lines(corpus))
+            else:
+                yield from self._iter_valid_lines(corpus)
+
+    def iter_values(self) -> Iterator[Tuple[int, List[int]]]:
+        """
+        Stream the puzzles of the corpus as flat lists of cell values
+        :return: Pairs of 1-based line number and the 81 cell values, 0 for blank
+        """
+        for line_number, puzzle in self.iter_lines():
+            yield line_number, list(puzzle.translate(CELL_CODE_TABLE))
+
+    def iter_boards(self, board_class: Type[Board] = Board) -> Iterator[Board]:
+        """
+        Stream the puzzles of the corpus as Board objects
+        :param board_class: Board class to create, e.g. Board or FlatBoard
+        :return: Boards in file order
+        """
+        for _, values in self.iter_values():
+            board = board_class()
+            board.load_cell_values(values)
+            yield board
+
+    @staticmethod
+    def _iter_mmap_lines(corpus: BinaryIO) -> Iterator[bytes]:
+        """
+        Helper function used to read the lines of a file through a read-only memory map
+        :param corpus: Open file to map
+        :return: Lines of the file
+        """
+        if corpus.seek(0, 2) == 0:
+            # empty files cannot be memory-mapped
+            return
+
+        with mmap.mmap(corpus.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            line = mapped.readline()
+            while line:
+                yield line
+                line = mapped.readline()
+
+    def _iter_valid_lines(self, lines: Iterator[bytes]) -> Iterator[Tuple[int, bytes]]:
+        """
+        Helper function used to skip blank and comment lines and report malformed ones
+        :param lines: Raw lines of the corpus
+        :return: Pairs of 1-based line number and the 81 puzzle bytes
+        """
+        for line_number, line in enumerate(lines, 1):
+            self.line_count = line_number
+            puzzle = line.strip()
+            if not puzzle or puzzle.startswith(b"#"):
+                continue
+
+            if len(puzzle) != 81:
+                self._report(MalformedLine(line_number, puzzle, f"expected 81 cells, got {len(puzzle)}"))
+            elif puzzle.translate(None, VALID_PUZZLE_BYTES):
+                self._report(MalformedLine(line_number, puzzle, "contains characters other than 1-9, '.', '0', '-'"))
+            else:
+                yield line_number, puzzle
+
+    def _report(self, malformed_line: MalformedLine) -> None:
+        """
+        Helper function used to count a malformed line and pass it to the error callback
+        :param malformed_line: Line that could not be read
+        :return: None
+        """
+        self.malformed_count += 1
+        if self.on_error is not None:
+            self.on_error(malformed_line)
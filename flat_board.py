@@ -0,0 +1,264 @@
+from typing import Iterator, List, Optional, Sequence, Union
+
+from board import Board, DIGIT_TO_BIT, parse_board_text
+from layout import BOX_CELLS, CELL_COUNT, COLUMN_CELLS
+
+# Cell codes stored in the flat grid: 0 for a blank cell, otherwise the digit itself
+SYMBOLS = "-123456789"
+SYMBOL_CODES = {symbol: code for code, symbol in enumerate(SYMBOLS)}
+# Table translating the ASCII symbols of a parsed board into cell codes with bytes.translate
+SYMBOL_CODE_TABLE = bytes.maketrans(SYMBOLS.encode("ascii"), bytes(range(len(SYMBOLS))))
+
+
+class FlatRowView:
+    """
+    List-like view of one row of a flat grid. Reads and writes go straight to the underlying bytearray
+    """
+    __slots__ = ("cells", "offset")
+
+    def __init__(self, cells: bytearray, row_index: int) -> None:
+        """
+        Initialize the view over the given row of the grid
+        :param cells: Flat grid of cell codes
+        :param row_index: Row the view represents
+        """
+        self.cells = cells
+        self.offset = row_index * 9
+
+    def _cell_index(self, column_index: int) -> int:
+        """
+        Helper function used to convert a column index, which may be negative, into an index of the flat grid
+        :param column_index: Column of the cell
+        :return: Index of the cell in the flat grid
+        """
+        if column_index < 0:
+            column_index += 9
+        if not 0 <= column_index < 9:
+            raise IndexError("row index out of range")
+
+        return self.offset + column_index
+
+    def __len__(self) -> int:
+        return 9
+
+    def __getitem__(self, column_index: Union[int, slice]) -> Union[str, List[str]]:
+        if isinstance(column_index, slice):
+            return [SYMBOLS[code] for code in self.cells[self.offset:self.offset + 9][column_index]]
+
+        return SYMBOLS[self.cells[self._cell_index(column_index)]]
+
+    def __setitem__(self, column_index: int, number: str) -> None:
+        if number not in SYMBOL_CODES:
+            raise ValueError(f"{number!r} is not a valid cell value")
+
+        self.cells[self._cell_index(column_index)] = SYMBOL_CODES[number]
+
+    def __iter__(self) -> Iterator[str]:
+        return (SYMBOLS[code] for code in memoryview(self.cells)[self.offset:self.offset + 9])
+
+    def __contains__(self, number: str) -> bool:
+        code = SYMBOL_CODES.get(number)
+        if code is None:
+            return False
+
+        return self.cells.find(code, self.offset, self.offset + 9) != -1
+
+    def __repr__(self) -> str:
+        return repr(list(self))
+
+
+class FlatGridView:
+    """
+    List-like view of a flat grid as 9 rows, so code written against the 2D board keeps working
+    """
+    __slots__ = ("rows",)
+
+    def __init__(self, cells: bytearray) -> None:
+        """
+        Initialize the view over the given grid
+        :param cells: Flat grid of cell codes
+        """
+        self.rows = [FlatRowView(cells, row_index) for row_index in range(9)]
+
+    def __len__(self) -> int:
+        return 9
+
+    def __getitem__(self, row_index: Union[int, slice]) -> Union[FlatRowView, List[FlatRowView]]:
+        return self.rows[row_index]
+
+    def __iter__(self) -> Iterator[FlatRowView]:
+        return iter(self.rows)
+
+    def __repr__(self) -> str:
+        return repr(self.rows)
+
+
+class FlatBoard(Board):
+    """
+    Board backend storing the 9x9 grid as one 81-byte bytearray in row-major order. Rows, columns, and boxes are read
+    through the precomputed cell index tables in layout.py instead of building nested lists.
+    get_board returns a FlatGridView, so the 2D indexing used by existing callers reads and writes the flat grid
+    """
+
+    __slots__ = ("cells",)
+
+    def _set_attributes(self, input_file_path: Optional[str], box_size: int) -> None:
+        """
+        Helper function used to set every attribute of a board before its grid is loaded, including a blank flat grid
+        :param input_file_path: Path to the file with the board text. Optional
+        :param box_size: Number of rows and columns in a box. Only the standard 9x9 board is supported
+        :return: None
+        """
+        if box_size != 3:
+            raise ValueError("FlatBoard only supports 9x9 boards")
+
+        self.cells = bytearray(CELL_COUNT)
+        super()._set_attributes(input_file_path, box_size)
+
+    def initialize_empty_board(self) -> None:
+        """
+        Set the flat grid to a grid with every cell blank
+        :return: None
+        """
+        self._replace_cells(bytes(CELL_COUNT))
+
+    def initialize_board_from_text(self, text: str) -> None:
+        """
+        Set the flat grid from comma-separated board text
+        :param text: Board text, one row per line
+        :return: None
+        """
+        rows = parse_board_text(text, self.box_size)
+
+        # parse_board_text only accepts the symbols of a 9x9 board, so every cell is one ASCII character
+        self._replace_cells("".join(map("".join, rows)).encode("ascii").translate(SYMBOL_CODE_TABLE))
+
+    def load_cell_values(self, values: Sequence[int]) -> None:
+        """
+        Replace the whole flat grid with a flat sequence of integers in row-major order, using 0 for blank cells
+        :param values: Flat sequence of cell values, e.g. a list or bytes
+        :return: None
+        """
+        self._check_cell_values(values)
+        self._replace_cells(bytes(values))
+
+    def _load_parsed_values(self, values: bytes) -> None:
+        """
+        Helper function used to fill the flat grid from cell values returned by parse_puzzle_bytes, which are known to
+        be valid
+        :param values: One byte per cell holding its value, 0 for blank
+        :return: None
+        """
+        self._replace_cells(values)
+
+    def _replace_cells(self, codes: bytes) -> None:
+        """
+        Helper function used to overwrite the flat grid in place and rebuild the masks. The grid and its view are kept,
+        so the view returned by get_board, e.g. the one cached by a Solver, stays current
+        :param codes: Code of every cell in row-major order
+        :return: None
+        """
+        self.cells[:] = codes
+        if self.board is None:
+            self.board = FlatGridView(self.cells)
+        self.initialize_masks()
+
+    def initialize_masks(self) -> None:
+        """
+        Rebuild the row, column, and box occupancy masks from the flat grid
+        :return: None
+        """
+        self._set_masks_from_values(self.cells)
+
+    def insert_number_into_board(self, row_number: int, column_number: int, number: str) -> None:
+        """
+        Insert a number into the flat grid at the given coordinates
+        :param row_number: Row to insert the number into
+        :param column_number: Column to insert the number into
+        :param number: Number to insert into the board
+        :return: None
+        """
+        if not isinstance(number, str):
+            raise ValueError("number must be a string")
+        if number not in SYMBOL_CODES:
+            raise ValueError(f"{number!r} is not a valid cell value")
+
+        cell = row_number * 9 + column_number
+        previous_code = self.cells[cell]
+
+        if previous_code:
+            self._clear_mask_bit(row_number, column_number, 1 << (previous_code - 1))
+
+        code = SYMBOL_CODES[number]
+        self.cells[cell] = code
+        if code:
+            self._set_mask_bit(row_number, column_number, DIGIT_TO_BIT[number])
+
+        if self.validator is not None:
+            self.validator.update(row_number, column_number, previous_code, code)
+
+    def remove_number_from_board(self, row_number: int, column_number: int) -> None:
+        """
+        Remove the number from the flat grid at the given coordinates
+        :param row_number: Row to remove number from
+        :param column_number: Column to remove number from
+        :return: None
+        """
+        cell = row_number * 9 + column_number
+        previous_code = self.cells[cell]
+
+        if previous_code:
+            self._clear_mask_bit(row_number, column_number, 1 << (previous_code - 1))
+        self.cells[cell] = 0
+
+        if self.validator is not None:
+            self.validator.update(row_number, column_number, previous_code, 0)
+
+    def get_row_view(self, row_index: int) -> memoryview:
+        """
+        Return a zero-copy view of the cell codes of a row, where 0 represents a blank cell
+        :param row_index: Row to view
+        :return: Memoryview of the 9 cell codes in the row
+        """
+        return memoryview(self.cells)[row_index * 9:row_index * 9 + 9]
+
+    def get_board_columns(self, column_start: int, column_end: int = None) -> Union[List[str], Board.TwoDBoard]:
+        """
+        Return a range of columns from the flat grid. If no ending column is specified, return a singular column
+        :param column_start: Starting column to include in range. If no ending column given, only column to
+         include in return
+        :param column_end: Ending column to include in range (exclusive). Optional
+        :return: Singular column if no ending column provided, otherwise range of columns
+        """
+        if column_end is None:
+            return self._get_unit_symbols(COLUMN_CELLS[column_start])
+
+        return [self._get_unit_symbols(COLUMN_CELLS[column_index]) for column_index in range(column_start, column_end)]
+
+    def get_box_array(self, starting_row: int, starting_column: int) -> Board.Box:
+        """
+        Get the box 2D array given the coordinate of the top-left cell of the box
+        :param starting_row: Row of the cell representing the top-left cell of the box
+        :param starting_column: Column of the cell representing the top-left cell of the box
+        :return: Box data corresponding to the top-left cell coordinates given
+        """
+        box_cells = BOX_CELLS[self.get_box_number(starting_row, starting_column)]
+
+        return [self._get_unit_symbols(box_cells[index:index + 3]) for index in range(0, 9, 3)]
+
+    def _get_unit_symbols(self, unit_cells: List[int]) -> List[str]:
+        """
+        Helper function used to decode the cells at the given flat grid indices
+        :param unit_cells: Flat grid indices of the cells to decode
+        :return: Cell values at those indices
+        """
+        cells = self.cells
+        return [SYMBOLS[cells[cell]] for cell in unit_cells]
+
+    def get_cell_values(self) -> List[int]:
+        """
+        Return the board as a flat list of 81 integers in row-major order, using 0 for blank cells
+        :return: Flat list of cell values
+        """
+        return list(self.cells)
+
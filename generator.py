@@ -0,0 +1,205 @@
+import argparse
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, NamedTuple, Optional
+
+from canonical import COLUMN_ORDERS, Transform, apply_transform
+from layout import CELL_COUNT, PEERS
+from rendering import format_puzzle_line
+from search import BacktrackingSearch, DancingLinksSearch
+from techniques import TechniqueEngine, compute_candidates
+
+# Target difficulties and the technique difficulty they correspond to. "expert" puzzles stall every technique and
+# need search
+DIFFICULTY_LEVELS = {
+    "easy": 1,
+    "medium": 2,
+    "hard": 5,
+    "expert": 6
+}
+
+# Number of random clues seeded into an empty grid before searching for a complete grid
+SEED_CLUES = 11
+
+
+class GeneratedPuzzle(NamedTuple):
+    """
+    A puzzle produced by the generator
+    """
+    puzzle: str
+    solution: str
+    difficulty: str
+    clues: int
+    seed: int
+
+
+def rate_puzzle(values: List[int]) -> int:
+    """
+    Rate a puzzle by the hardest technique needed to solve it
+    :param values: Flat list of 81 cell values, 0 for blank
+    :return: Technique difficulty from techniques.py, or 6 if the techniques stall and search is needed
+    """
+    report = TechniqueEngine().run(values, compute_candidates(values))
+    return report.difficulty if report.solved else DIFFICULTY_LEVELS["expert"]
+
+
+def get_difficulty_name(rating: int) -> str:
+    """
+    Return the name of the easiest target difficulty covering a rating
+    :param rating: Rating from rate_puzzle
+    :return: Difficulty name, a key of DIFFICULTY_LEVELS
+    """
+    for name, level in DIFFICULTY_LEVELS.items():
+        if rating <= level:
+            return name
+
+    return "expert"
+
+
+def count_solutions(values: List[int], limit: int = 2) -> int:
+    """
+    Count the solutions of a puzzle, stopping at the limit
+    :param values: Flat list of 81 cell values, 0 for blank
+    :param limit: Number of solutions to stop at. 2 is enough to tell unique puzzles apart
+    :return: Number of solutions found, at most the limit
+    """
+    return len(BacktrackingSearch(values).find_solutions(limit))
+
+
+def random_transform(rng: random.Random) -> Transform:
+    """
+    Pick a random member of the Sudoku symmetry group
+    :param rng: Random number generator
+    :return: Transform usable with canonical.apply_transform
+    """
+    bands = rng.sample(range(3), 3)
+    row_order = tuple(band * 3 + row for band in bands for row in rng.sample(range(3), 3))
+    labels = (0, *rng.sample(range(1, 10), 9))
+
+    return Transform(rng.random() < 0.5, row_order, rng.choice(COLUMN_ORDERS), labels)
+
+
+def random_solution(rng: random.Random) -> List[int]:
+    """
+    Generate a random complete grid by seeding a few random clues into an empty grid, completing it with search, and
+    shuffling the result through a random symmetry
+    :param rng: Random number generator
+    :return: Flat list of 81 cell values
+    """
+    while True:
+        values = [0] * CELL_COUNT
+        for cell in rng.sample(range(CELL_COUNT), SEED_CLUES):
+            used = {values[peer] for peer in PEERS[cell]}
+            options = [digit for digit in range(1, 10) if digit not in used]
+            if options:
+                values[cell] = rng.choice(options)
+
+        solutions = DancingLinksSearch(values).find_solutions(1)
+        if solutions:
+            return apply_transform(solutions[0], random_transform(rng))
+
+
+def remove_clues(solution: List[int], target_level: int, rng: random.Random,
+                 symmetric: bool = False) -> List[int]:
+    """
+    Remove clues from a complete grid in random order, keeping each removal only if the puzzle stays unique and does
+    not get harder than the target level
+    :param solution: Complete grid to dig clues out of
+    :param target_level: Highest rating allowed, from DIFFICULTY_LEVELS
+    :param rng: Random number generator
+    :param symmetric: Remove clues in pairs rotationally symmetric about the centre
+    :return: Puzzle values, 0 for blank
+    """
+    values = list(solution)
+    cells = list(range(CELL_COUNT))
+    rng.shuffle(cells)
+
+    for cell in cells:
+        group = {cell, CELL_COUNT - 1 - cell} if symmetric else {cell}
+        if not all(values[group_cell] for group_cell in group):
+            continue
+
+        for group_cell in group:
+            values[group_cell] = 0
+
+        # every rating is allowed at the expert level, so the puzzle only needs to stay unique
+        if count_solutions(values) != 1 or (target_level < DIFFICULTY_LEVELS["expert"]
+                                            and rate_puzzle(values) > target_level):
+            for group_cell in group:
+                values[group_cell] = solution[group_cell]
+
+    return values
+
+
+def generate_puzzle(seed: int, difficulty: str = "medium", symmetric: bool = False,
+                    max_attempts: int = 100) -> Optional[GeneratedPuzzle]:
+    """
+    Generate one unique puzzle of the target difficulty. The same seed always produces the same puzzle
+    :param seed: Seed of the random number generator
+    :param difficulty: Target difficulty, a key of DIFFICULTY_LEVELS
+    :param symmetric: Keep the clues rotationally symmetric
+    :param max_attempts: Number of complete grids to try before giving up
+    :return: Generated puzzle, or None if no grid produced the target difficulty
+    """
+    if difficulty not in DIFFICULTY_LEVELS:
+        raise ValueError(f"difficulty must be one of: {', '.join(DIFFICULTY_LEVELS)}")
+
+    target_level = DIFFICULTY_LEVELS[difficulty]
+    rng = random.Random(seed)
+
+    for _ in range(max_attempts):
+        solution = random_solution(rng)
+        values = remove_clues(solution, target_level, rng, symmetric)
+
+        if get_difficulty_name(rate_puzzle(values)) == difficulty:
+            return GeneratedPuzzle(format_puzzle_line(values), format_puzzle_line(solution), difficulty,
+                                   sum(1 for value in values if value), seed)
+
+    return None
+
+
+def generate_puzzles(count: int, difficulty: str = "medium", seed: int = 0, workers: Optional[int] = None,
+                     symmetric: bool = False, chunksize: int = 4) -> Iterator[GeneratedPuzzle]:
+    """
+    Generate puzzles across worker processes. Puzzle i uses seed + i, so the output is reproducible whatever the
+    number of workers
+    :param count: Number of puzzles to generate
+    :param difficulty: Target difficulty, a key of DIFFICULTY_LEVELS
+    :param seed: Seed of the first puzzle
+    :param workers: Number of worker processes. Defaults to the CPU count. With 1 the puzzles are generated in this
+     process
+    :param symmetric: Keep the clues rotationally symmetric
+    :param chunksize: Number of seeds sent to a worker at a time
+    :return: Generated puzzles in seed order. Seeds that failed to reach the difficulty are skipped
+    """
+    seeds = range(seed, seed + count)
+    difficulties = [difficulty] * count
+    symmetries = [symmetric] * count
+
+    if workers == 1:
+        results = map(generate_puzzle, seeds, difficulties, symmetries)
+        yield from (puzzle for puzzle in results if puzzle is not None)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+        results = executor.map(generate_puzzle, seeds, difficulties, symmetries, chunksize=chunksize)
+        yield from (puzzle for puzzle in results if puzzle is not None)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Generate unique Sudoku puzzles, one 81-character line each")
+    parser.add_argument("--count", type=int, default=10)
+    parser.add_argument("--difficulty", choices=DIFFICULTY_LEVELS, default="medium")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--symmetric", action="store_true", help="keep the clues rotationally symmetric")
+    arguments = parser.parse_args()
+
+    for generated in generate_puzzles(arguments.count, arguments.difficulty, arguments.seed, arguments.workers,
+                                      arguments.symmetric):
+        print(generated.puzzle)
+
+
+if __name__ == '__main__':
+    main()
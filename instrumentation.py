@@ -0,0 +1,154 @@
+import time
+from functools import lru_cache, wraps
+from typing import Callable, Dict, List, Tuple
+
+# Called with an event name and its details. Events are "phase" (name, seconds), "round" (round, examined, placed),
+# and "solve" (engine, solved, work, limit_reached)
+TraceHook = Callable[[str, Dict], None]
+
+
+class SolverStats:
+    """
+    Class used to collect counters and timings from an instrumented Solver
+    """
+
+    # Phases traced through the trace hook. Other timed methods are only counted and timed
+    TRACED_PHASES = ("generate_candidates", "implement_candidates", "check_solve", "search")
+
+    def __init__(self) -> None:
+        """
+        Initialize the SolverStats object with every counter at zero
+        """
+        self.phase_calls = {}
+        self.phase_times = {}
+        self.placements_per_round = []
+        self.cells_examined = 0
+        self.search_nodes = 0
+        self.solves = 0
+
+    def reset(self) -> None:
+        """
+        Set every counter back to zero
+        :return: None
+        """
+        self.__init__()
+
+    def record_phase(self, phase: str, seconds: float) -> None:
+        """
+        Record one call of a phase
+        :param phase: Name of the phase
+        :param seconds: Time the call took
+        :return: None
+        """
+        self.phase_calls[phase] = self.phase_calls.get(phase, 0) + 1
+        self.phase_times[phase] = self.phase_times.get(phase, 0.0) + seconds
+
+    def record_round(self, examined: int, placed: int) -> None:
+        """
+        Record one propagation round of the singles engine
+        :param examined: Number of cells whose candidates were generated
+        :param placed: Number of digits placed
+        :return: None
+        """
+        self.cells_examined += examined
+        self.placements_per_round.append(placed)
+
+    @property
+    def candidate_generations(self) -> int:
+        """
+        Number of cells whose candidates were generated, by generate_candidate, generate_candidates, or the singles
+        engine
+        :return: Candidate generations
+        """
+        return self.phase_calls.get("generate_candidate", 0) + self.cells_examined
+
+    @property
+    def duplicate_scans(self) -> int:
+        """
+        Number of full-board duplicate scans
+        :return: Calls of find_duplicates
+        """
+        return self.phase_calls.get("find_duplicates", 0)
+
+    @property
+    def placements(self) -> int:
+        """
+        Number of digits placed by the singles engine
+        :return: Total placements
+        """
+        return sum(self.placements_per_round)
+
+    def as_dict(self) -> Dict:
+        """
+        Return every counter as a JSON-serializable dictionary
+        :return: Counters and timings
+        """
+        return {
+            "solves": self.solves,
+            "candidate_generations": self.candidate_generations,
+            "duplicate_scans": self.duplicate_scans,
+            "placements": self.placements,
+            "placements_per_round": list(self.placements_per_round),
+            "search_nodes": self.search_nodes,
+            "phase_calls": dict(self.phase_calls),
+            "phase_times": dict(self.phase_times)
+        }
+
+
+def timed_method(phase: str, method: Callable) -> Callable:
+    """
+    Wrap a solver method so every call is counted and timed as the given phase, using the stats object and trace hook
+    of the solver it is called on
+    :param phase: Name of the phase
+    :param method: Function of the solver class to wrap
+    :return: Wrapped function
+    """
+    is_traced_phase = phase in SolverStats.TRACED_PHASES
+
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            seconds = time.perf_counter() - start
+            if self.stats is not None:
+                self.stats.record_phase(phase, seconds)
+            if is_traced_phase and self.trace_hook is not None:
+                self.trace_hook("phase", {"name": phase, "seconds": seconds})
+
+    return wrapper
+
+
+@lru_cache(maxsize=None)
+def get_instrumented_class(solver_class: type, phases: Tuple[str, ...]) -> type:
+    """
+    Return a subclass of the solver class whose phase methods are counted and timed. Solvers are switched to it by
+    assigning __class__, so the class is built once and uninstrumented solvers are left untouched
+    :param solver_class: Solver class to instrument
+    :param phases: Names of the methods to time
+    :return: Instrumented subclass, adding no instance attributes
+    """
+    namespace = {phase: timed_method(phase, getattr(solver_class, phase)) for phase in phases}
+    namespace["__slots__"] = ()
+
+    return type(f"Instrumented{solver_class.__name__}", (solver_class,), namespace)
+
+
+def summarize_stats(stats: SolverStats) -> List[str]:
+    """
+    Describe the collected counters in human-readable lines
+    :param stats: Stats to describe
+    :return: One line per counter or phase
+    """
+    lines = [
+        f"Solves: {stats.solves}",
+        f"Candidate generations: {stats.candidate_generations}",
+        f"Placements: {stats.placements} over {len(stats.placements_per_round)} rounds",
+        f"Duplicate scans: {stats.duplicate_scans}",
+        f"Search nodes: {stats.search_nodes}"
+    ]
+    for phase in sorted(stats.phase_times):
+        lines.append(f"{phase}: {stats.phase_calls[phase]} calls, {stats.phase_times[phase] * 1000:.3f} ms")
+
+    return lines
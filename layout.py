@@ -0,0 +1,132 @@
+from functools import lru_cache
+from typing import List
+
+# Precomputed cell index tables for boards made of box_size x box_size boxes, e.g. box_size 3 for the standard 9x9
+# board, 4 for 16x16, and 5 for 25x25. Cells are numbered in row-major order and boxes are numbered left to right,
+# top to bottom, using the same pattern as Board.extract_box_from_box_number:
+# 0,1,2
+# 3,4,5
+# 6,7,8
+
+# Largest board size with a precomputed table of the digits in every candidate mask. Larger boards compute them on
+# demand to avoid tables with millions of entries
+MASK_TABLE_MAX_SIZE = 9
+
+
+class MaskSizes:
+    """
+    Sequence-like view returning the number of digits in a candidate mask, used for boards too large for a table
+    """
+
+    def __getitem__(self, mask: int) -> int:
+        return bin(mask).count("1")
+
+
+class MaskDigits:
+    """
+    Sequence-like view returning the digit symbols in a candidate mask, used for boards too large for a table
+    """
+
+    def __init__(self, symbols: List[str]) -> None:
+        """
+        Initialize the view with the symbols of the board
+        :param symbols: Symbol of every digit, in digit order
+        """
+        self.symbols = symbols
+
+    def __getitem__(self, mask: int) -> List[str]:
+        return [symbol for index, symbol in enumerate(self.symbols) if mask >> index & 1]
+
+
+class Layout:
+    """
+    Class used to hold the index tables and candidate mask tables of one board size
+    """
+
+    def __init__(self, box_size: int) -> None:
+        """
+        Initialize the Layout object by building every table for the given box size
+        :param box_size: Number of rows and columns in a box
+        """
+        if box_size < 1:
+            raise ValueError("box_size must be at least 1")
+
+        self.box_size = box_size
+        self.size = box_size * box_size
+        self.cell_count = self.size * self.size
+
+        size = self.size
+        cells = range(self.cell_count)
+
+        self.row_of_cell = [cell // size for cell in cells]
+        self.column_of_cell = [cell % size for cell in cells]
+        self.box_of_cell = [(cell // (size * box_size)) * box_size + (cell % size) // box_size for cell in cells]
+
+        self.row_cells = [[row * size + column for column in range(size)] for row in range(size)]
+        self.column_cells = [[row * size + column for row in range(size)] for column in range(size)]
+        self.box_cells = [[] for _ in range(size)]
+        for cell in cells:
+            self.box_cells[self.box_of_cell[cell]].append(cell)
+
+        # Every row, column, and box as a list of cell indices
+        self.units = self.row_cells + self.column_cells + self.box_cells
+
+        # The row, column, and box containing each cell, in that order
+        self.units_of_cell = [[self.row_cells[self.row_of_cell[cell]], self.column_cells[self.column_of_cell[cell]],
+                               self.box_cells[self.box_of_cell[cell]]] for cell in cells]
+
+        self.peers = [self._build_peers(cell) for cell in cells]
+
+        # Candidate masks use bit (digit - 1) for each digit. Symbols can be several characters long on large boards
+        self.full_mask = (1 << size) - 1
+        self.symbols = [str(digit) for digit in range(1, size + 1)]
+        self.digit_to_bit = {symbol: 1 << index for index, symbol in enumerate(self.symbols)}
+
+        if size <= MASK_TABLE_MAX_SIZE:
+            self.mask_to_digits = [[symbol for index, symbol in enumerate(self.symbols) if mask >> index & 1]
+                                   for mask in range(self.full_mask + 1)]
+            self.mask_sizes = [len(digits) for digits in self.mask_to_digits]
+        else:
+            self.mask_to_digits = MaskDigits(self.symbols)
+            self.mask_sizes = MaskSizes()
+
+    def _build_peers(self, cell: int) -> List[int]:
+        """
+        Helper function used to collect the cells sharing a row, column, or box with the given cell
+        :param cell: Index of the cell
+        :return: Sorted list of peer cell indices
+        """
+        peers = set()
+        for unit in self.units_of_cell[cell]:
+            peers.update(unit)
+        peers.discard(cell)
+
+        return sorted(peers)
+
+
+@lru_cache(maxsize=None)
+def get_layout(box_size: int = 3) -> Layout:
+    """
+    Return the shared layout of a board size, building it on first use
+    :param box_size: Number of rows and columns in a box
+    :return: Layout of the board size
+    """
+    return Layout(box_size)
+
+
+# Tables of the standard 9x9 board
+LAYOUT = get_layout(3)
+
+CELL_COUNT = LAYOUT.cell_count
+
+ROW_OF_CELL = LAYOUT.row_of_cell
+COLUMN_OF_CELL = LAYOUT.column_of_cell
+BOX_OF_CELL = LAYOUT.box_of_cell
+
+ROW_CELLS = LAYOUT.row_cells
+COLUMN_CELLS = LAYOUT.column_cells
+BOX_CELLS = LAYOUT.box_cells
+
+UNITS = LAYOUT.units
+UNITS_OF_CELL = LAYOUT.units_of_cell
+PEERS = LAYOUT.peers
@@ -0,0 +1,85 @@
+import argparse
+import asyncio
+import itertools
+import json
+import math
+import time
+from collections import Counter
+from typing import List
+
+from corpus import CorpusReader
+
+
+async def run_connection(host: str, port: int, puzzles: List[str], window: int, latencies: List[float],
+                         statuses: Counter) -> None:
+    """
+    Send puzzles over one connection, keeping up to window requests outstanding, and record every response
+    :param host: Server address
+    :param port: Server port
+    :param puzzles: Puzzles to send
+    :param window: Maximum number of requests sent but not yet answered
+    :param latencies: Seconds between sending each request and receiving its response, extended in place
+    :param statuses: Count of every response status, updated in place
+    :return: None
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    send_times = asyncio.Queue(window)
+
+    async def send() -> None:
+        for puzzle in puzzles:
+            await send_times.put(time.perf_counter())
+            writer.write(puzzle.encode() + b"\n")
+            await writer.drain()
+
+    sender = asyncio.create_task(send())
+    for _ in puzzles:
+        line = await reader.readline()
+        sent_at = await send_times.get()
+        latencies.append(time.perf_counter() - sent_at)
+        statuses[json.loads(line)["status"]] += 1
+
+    await sender
+    writer.close()
+    await writer.wait_closed()
+
+
+async def generate_load(arguments: argparse.Namespace) -> None:
+    """
+    Spread the requests over the connections and print throughput and latency
+    :param arguments: Parsed command line options
+    :return: None
+    """
+    corpus = [puzzle.decode("ascii") for _, puzzle in CorpusReader(arguments.corpus)]
+    puzzles = list(itertools.islice(itertools.cycle(corpus), arguments.requests))
+    shares = [puzzles[index::arguments.connections] for index in range(arguments.connections)]
+
+    latencies = []
+    statuses = Counter()
+    start = time.perf_counter()
+    await asyncio.gather(*(run_connection(arguments.host, arguments.port, share, arguments.window, latencies, statuses)
+                           for share in shares if share))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    print(f"Requests: {len(latencies)} over {arguments.connections} connections in {elapsed:.2f} s")
+    print(f"Throughput: {len(latencies) / elapsed:.1f} puzzles/s")
+    for label, fraction in (("p50", 0.50), ("p99", 0.99)):
+        print(f"{label}: {latencies[max(0, math.ceil(fraction * len(latencies)) - 1)] * 1000:.2f} ms")
+    print(f"Statuses: {dict(statuses)}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Send puzzles to the solver service and measure its throughput")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--corpus", default="puzzles/corpora/hard.txt")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--connections", type=int, default=8)
+    parser.add_argument("--window", type=int, default=16, help="outstanding requests per connection")
+    arguments = parser.parse_args()
+
+    asyncio.run(generate_load(arguments))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,563 @@
+import argparse
+import mmap
+import os
+import struct
+from typing import Callable, Iterator, List, NamedTuple, Optional, Tuple
+
+from batch import BatchResult
+from board import BOARD_BLANK_CHARACTER, parse_board_text, parse_puzzle_line
+from corpus import CELL_CODE_TABLE, CorpusReader, MalformedLine
+from rendering import format_board_text, format_puzzle_line
+
+# Binary store of 9x9 puzzles and their solutions. Cells are packed 4 bits each, two cells per byte, so a puzzle takes
+# 41 bytes. The spare low nibble of the last byte flags that a solution follows, and a solution only stores the
+# digits of the blank cells of its puzzle, again 4 bits each. Records are only ever appended to the data file, and a
+# sidecar index file holds the end offset of every record so any record can be read in O(1) through a memory map.
+#
+# Data file:  header, then records back to back
+# Index file: header, then one little-endian uint64 end offset per record
+DATA_MAGIC = b"SDKS"
+INDEX_MAGIC = b"SDKI"
+STORE_VERSION = 1
+HEADER = struct.Struct("<4sBBH")
+OFFSET = struct.Struct("<Q")
+
+CELL_COUNT = 81
+PACKED_PUZZLE_SIZE = (CELL_COUNT + 1) // 2
+SOLUTION_FLAG = 0x01
+
+# Tables splitting packed bytes into their high and low nibbles, and moving a cell code into the high nibble
+HIGH_NIBBLE_TABLE = bytes(byte >> 4 for byte in range(256))
+LOW_NIBBLE_TABLE = bytes(byte & 0x0F for byte in range(256))
+SHIFT_NIBBLE_TABLE = bytes((byte << 4) & 0xFF for byte in range(256))
+
+INDEX_SUFFIX = ".idx"
+
+
+class StoredPuzzle(NamedTuple):
+    """
+    A puzzle read back from a PuzzleStore
+    """
+    # 81 cell values, 0 for blank
+    puzzle: List[int]
+    # 81 cell values of the solved grid, or None if no solution was stored
+    solution: Optional[List[int]]
+
+
+def pack_nibbles(codes: bytes) -> bytes:
+    """
+    Pack a sequence of 4-bit codes two per byte, first code in the high nibble. An odd trailing code is padded with 0
+    :param codes: Codes from 0 to 15, one per byte
+    :return: Packed bytes
+    """
+    if len(codes) % 2:
+        codes += b"\x00"
+    if not codes:
+        return b""
+
+    high = int.from_bytes(codes[0::2].translate(SHIFT_NIBBLE_TABLE), "big")
+    low = int.from_bytes(codes[1::2], "big")
+    return (high | low).to_bytes(len(codes) // 2, "big")
+
+
+def unpack_nibbles(packed: bytes, count: int) -> bytes:
+    """
+    Unpack codes packed by pack_nibbles
+    :param packed: Packed bytes
+    :param count: Number of codes to return
+    :return: Codes from 0 to 15, one per byte
+    """
+    codes = bytearray(len(packed) * 2)
+    codes[0::2] = packed.translate(HIGH_NIBBLE_TABLE)
+    codes[1::2] = packed.translate(LOW_NIBBLE_TABLE)
+    return bytes(codes[:count])
+
+
+def encode_record(puzzle: List[int], solution: Optional[List[int]] = None) -> bytes:
+    """
+    Encode one puzzle, and optionally its solution, as a store record
+    :param puzzle: 81 cell values, 0 for blank
+    :param solution: 81 cell values of the solved grid. Optional
+    :return: Record bytes
+    """
+    if len(puzzle) != CELL_COUNT:
+        raise ValueError(f"puzzle must have {CELL_COUNT} cells, got {len(puzzle)}")
+
+    codes = bytes(puzzle)
+    if solution is None:
+        return pack_nibbles(codes)
+
+    if len(solution) != CELL_COUNT:
+        raise ValueError(f"solution must have {CELL_COUNT} cells, got {len(solution)}")
+
+    blank_digits = bytes(digit for digit, clue in zip(solution, puzzle) if not clue)
+    record = bytearray(pack_nibbles(codes))
+    record[-1] |= SOLUTION_FLAG
+    return bytes(record) + pack_nibbles(blank_digits)
+
+
+def decode_record(record: bytes) -> StoredPuzzle:
+    """
+    Decode a store record written by encode_record
+    :param record: Record bytes
+    :return: The puzzle and its solution, if one was stored
+    """
+    codes = unpack_nibbles(record[:PACKED_PUZZLE_SIZE], CELL_COUNT)
+    puzzle = list(codes)
+    if not record[PACKED_PUZZLE_SIZE - 1] & SOLUTION_FLAG:
+        return StoredPuzzle(puzzle, None)
+
+    blank_digits = iter(unpack_nibbles(record[PACKED_PUZZLE_SIZE:], CELL_COUNT))
+    solution = [clue or next(blank_digits) for clue in puzzle]
+    return StoredPuzzle(puzzle, solution)
+
+
+def _check_header(header: bytes, magic: bytes, file_path: str) -> None:
+    """
+    Helper function used to validate the header of a data or index file
+    :param header: First bytes of the file
+    :param magic: Expected magic bytes
+    :param file_path: Path of the file, used in error messages
+    :return: None
+    """
+    if len(header) < HEADER.size:
+        raise ValueError(f"{file_path} is too short to be a puzzle store")
+
+    file_magic, version, _, _ = HEADER.unpack_from(header)
+    if file_magic != magic:
+        raise ValueError(f"{file_path} is not a puzzle store file")
+    if version != STORE_VERSION:
+        raise ValueError(f"{file_path} has unsupported store version {version}")
+
+
+class PuzzleStore:
+    """
+    Class used to read a binary puzzle store with O(1) random access. The data and index files are memory-mapped, so
+    opening a store does not read it and only the records accessed are paged in
+    """
+
+    def __init__(self, store_file_path: str) -> None:
+        """
+        Open the store at the path specified. The index file is expected next to it, with an ".idx" suffix
+        :param store_file_path: Path to the data file of the store
+        """
+        self.store_file_path = store_file_path
+        self.index_file_path = store_file_path + INDEX_SUFFIX
+
+        self._data_file = open(store_file_path, "rb")
+        self._index_file = open(self.index_file_path, "rb")
+        self._data = mmap.mmap(self._data_file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._index = mmap.mmap(self._index_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        _check_header(self._data[:HEADER.size], DATA_MAGIC, store_file_path)
+        _check_header(self._index[:HEADER.size], INDEX_MAGIC, self.index_file_path)
+
+        self._count = (len(self._index) - HEADER.size) // OFFSET.size
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index: int) -> StoredPuzzle:
+        return decode_record(self.get_record(index))
+
+    def __iter__(self) -> Iterator[StoredPuzzle]:
+        for index in range(self._count):
+            yield self[index]
+
+    def __enter__(self) -> "PuzzleStore":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def get_record(self, index: int) -> bytes:
+        """
+        Read the raw bytes of one record
+        :param index: Position of the record. Negative positions count from the end
+        :return: Record bytes
+        """
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("store index out of range")
+
+        start = self._get_end_offset(index - 1) if index else HEADER.size
+        return self._data[start:self._get_end_offset(index)]
+
+    def _get_end_offset(self, index: int) -> int:
+        """
+        Helper function used to read the end offset of a record from the index
+        :param index: Position of the record
+        :return: Offset in the data file just past the record
+        """
+        return OFFSET.unpack_from(self._index, HEADER.size + index * OFFSET.size)[0]
+
+    def close(self) -> None:
+        """
+        Unmap and close the data and index files
+        :return: None
+        """
+        self._data.close()
+        self._index.close()
+        self._data_file.close()
+        self._index_file.close()
+
+
+class PuzzleStoreWriter:
+    """
+    Class used to append records to a binary puzzle store, creating it if needed. Records are written to the data file
+    before their offset is added to the index, so an interrupted write leaves at most a partial record past the last
+    indexed offset, which is truncated the next time the store is opened for writing
+    """
+
+    def __init__(self, store_file_path: str) -> None:
+        """
+        Open or create the store at the path specified for appending
+        :param store_file_path: Path to the data file of the store
+        """
+        self.store_file_path = store_file_path
+        self.index_file_path = store_file_path + INDEX_SUFFIX
+
+        is_new = not os.path.exists(store_file_path)
+        self._data_file = open(store_file_path, "r+b" if not is_new else "w+b")
+        self._index_file = open(self.index_file_path, "r+b" if not is_new else "w+b")
+
+        if is_new:
+            self._data_file.write(HEADER.pack(DATA_MAGIC, STORE_VERSION, 0, 0))
+            self._index_file.write(HEADER.pack(INDEX_MAGIC, STORE_VERSION, 0, 0))
+            self._end_offset = HEADER.size
+            self.count = 0
+        else:
+            self._recover()
+
+    def __enter__(self) -> "PuzzleStoreWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _recover(self) -> None:
+        """
+        Helper function used to find the end of the last complete record and drop anything written after it. Index
+        entries past the end of the data file belong to records whose data never fully reached the disk, so they are
+        dropped before the data file is truncated, which would otherwise extend it with zeros
+        :return: None
+        """
+        _check_header(self._data_file.read(HEADER.size), DATA_MAGIC, self.store_file_path)
+        _check_header(self._index_file.read(HEADER.size), INDEX_MAGIC, self.index_file_path)
+
+        data_size = self._data_file.seek(0, os.SEEK_END)
+        index_size = self._index_file.seek(0, os.SEEK_END)
+        self.count = (index_size - HEADER.size) // OFFSET.size
+
+        self._end_offset = HEADER.size
+        while self.count:
+            self._index_file.seek(HEADER.size + (self.count - 1) * OFFSET.size)
+            end_offset = OFFSET.unpack(self._index_file.read(OFFSET.size))[0]
+            if end_offset <= data_size:
+                self._end_offset = end_offset
+                break
+            self.count -= 1
+
+        self._index_file.truncate(HEADER.size + self.count * OFFSET.size)
+        self._data_file.truncate(self._end_offset)
+        self._data_file.seek(0, os.SEEK_END)
+        self._index_file.seek(0, os.SEEK_END)
+
+    def append(self, puzzle: List[int], solution: Optional[List[int]] = None) -> int:
+        """
+        Append a puzzle, and optionally its solution, to the store
+        :param puzzle: 81 cell values, 0 for blank
+        :param solution: 81 cell values of the solved grid. Optional
+        :return: Position of the new record
+        """
+        record = encode_record(puzzle, solution)
+        self._data_file.write(record)
+        self._end_offset += len(record)
+        self._index_file.write(OFFSET.pack(self._end_offset))
+
+        self.count += 1
+        return self.count - 1
+
+    def append_result(self, result: BatchResult) -> Optional[int]:
+        """
+        Append the outcome of a batch solve. Puzzles that could not be parsed are skipped
+        :param result: Outcome returned by solve_batch
+        :return: Position of the new record, or None if the puzzle was skipped
+        """
+        if result.status == "invalid":
+            return None
+
+        solution = parse_puzzle_line(result.solution) if result.solution is not None else None
+        return self.append(parse_puzzle_line(result.puzzle), solution)
+
+    def truncate(self, count: int) -> None:
+        """
+        Drop every record after the first count, e.g. records appended after the last checkpoint of a bulk job
+        :param count: Number of records to keep
+        :return: None
+        """
+        if not 0 <= count <= self.count:
+            raise ValueError(f"count must be between 0 and {self.count}")
+
+        self.flush()
+        if count:
+            self._index_file.seek(HEADER.size + (count - 1) * OFFSET.size)
+            self._end_offset = OFFSET.unpack(self._index_file.read(OFFSET.size))[0]
+        else:
+            self._end_offset = HEADER.size
+        self.count = count
+
+        self._index_file.truncate(HEADER.size + count * OFFSET.size)
+        self._data_file.truncate(self._end_offset)
+        self._data_file.seek(0, os.SEEK_END)
+        self._index_file.seek(0, os.SEEK_END)
+
+    def flush(self) -> None:
+        """
+        Flush the data file, then the index file, so readers opened afterwards see every appended record
+        :return: None
+        """
+        self._data_file.flush()
+        self._index_file.flush()
+
+    def sync(self) -> None:
+        """
+        Flush both files and wait until the operating system has written them to disk, so the appended records
+        survive a crash
+        :return: None
+        """
+        self.flush()
+        os.fsync(self._data_file.fileno())
+        os.fsync(self._index_file.fileno())
+
+    def close(self) -> None:
+        """
+        Flush and close the data and index files
+        :return: None
+        """
+        if not self._data_file.closed:
+            self.flush()
+        self._data_file.close()
+        self._index_file.close()
+
+
+def convert_text_to_store(text_file_path: str, store_file_path: str, solution_file_path: Optional[str] = None,
+                          on_error: Optional[Callable[[MalformedLine], None]] = None) -> int:
+    """
+    Append the puzzles of a one-line text corpus to a binary store. Puzzles and solutions are paired by line number:
+    a line whose puzzle or solution is malformed is skipped on both sides, and a puzzle without a solution on its line
+    is reported through on_error. If the files do not have the same number of lines, or a solution contradicts a
+    clue, a ValueError is raised and the records appended so far are dropped
+    :param text_file_path: Path to the corpus, read with CorpusReader
+    :param store_file_path: Path to the data file of the store, created if needed
+    :param solution_file_path: Path to a corpus holding the solution of every puzzle on the matching line. Optional
+    :param on_error: Called with every malformed line. Optional
+    :return: Number of records appended
+    """
+    puzzle_reader = CorpusReader(text_file_path, on_error=on_error)
+
+    appended = 0
+    with PuzzleStoreWriter(store_file_path) as writer:
+        start_count = writer.count
+        try:
+            if solution_file_path is None:
+                records = ((puzzle, None) for _, puzzle in puzzle_reader.iter_values())
+            else:
+                solution_reader = CorpusReader(solution_file_path, on_error=on_error)
+                records = _iter_solved_puzzles(puzzle_reader, solution_reader, on_error)
+
+            for puzzle, solution in records:
+                writer.append(puzzle, solution)
+                appended += 1
+        except ValueError:
+            writer.truncate(start_count)
+            raise
+
+    return appended
+
+
+def _iter_solved_puzzles(puzzle_reader: CorpusReader, solution_reader: CorpusReader,
+                         on_error: Optional[Callable[[MalformedLine], None]]) -> Iterator[Tuple[List[int], List[int]]]:
+    """
+    Helper function used to pair every puzzle of a corpus with the solution on the same line of another corpus
+    :param puzzle_reader: Reader of the puzzles
+    :param solution_reader: Reader of the solutions
+    :param on_error: Called with every puzzle left without a solution. Optional
+    :return: Pairs of puzzle and solution cell values
+    """
+    solutions = solution_reader.iter_lines()
+    solution_line_number, solution = next(solutions, (None, None))
+
+    for line_number, puzzle in puzzle_reader.iter_lines():
+        # solutions on lines without a valid puzzle are skipped along with their line
+        while solution_line_number is not None and solution_line_number < line_number:
+            solution_line_number, solution = next(solutions, (None, None))
+
+        if solution_line_number != line_number:
+            if solution_line_number is None and line_number > solution_reader.line_count:
+                raise ValueError(f"{solution_reader.input_file_path} has {solution_reader.line_count} lines, "
+                                 f"fewer than {puzzle_reader.input_file_path}")
+            if on_error is not None:
+                on_error(MalformedLine(line_number, puzzle, "no valid solution on the matching line"))
+            continue
+
+        puzzle_values = list(puzzle.translate(CELL_CODE_TABLE))
+        solution_values = list(solution.translate(CELL_CODE_TABLE))
+        _check_solution(puzzle_values, solution_values, f"line {line_number}")
+
+        yield puzzle_values, solution_values
+
+    # the puzzles are exhausted, so any solution left must still lie within the lines of the puzzle file
+    while solution_line_number is not None:
+        if solution_line_number > puzzle_reader.line_count:
+            raise ValueError(f"{solution_reader.input_file_path} has more lines than "
+                             f"{puzzle_reader.input_file_path}, which has {puzzle_reader.line_count}")
+        solution_line_number, solution = next(solutions, (None, None))
+
+
+def _check_solution(puzzle: List[int], solution: List[int], location: str) -> None:
+    """
+    Helper function used to check that a solution fills every cell and keeps every clue of its puzzle
+    :param puzzle: Cell values of the puzzle, 0 for blank
+    :param solution: Cell values of the solution
+    :param location: Where the solution was read, used in error messages
+    :return: None
+    """
+    if 0 in solution:
+        raise ValueError(f"{location}: solution has blank cells")
+    if any(clue and clue != digit for clue, digit in zip(puzzle, solution)):
+        raise ValueError(f"{location}: solution contradicts the clues of the puzzle")
+
+
+def read_board_file(board_file_path: str) -> List[int]:
+    """
+    Read a 9x9 board file, the comma-separated text read by Board.initialize_board
+    :param board_file_path: Path to the board file
+    :return: 81 cell values, 0 for blank
+    """
+    with open(board_file_path, "r") as board_file:
+        rows = parse_board_text(board_file.read())
+
+    return [int(symbol) if symbol != BOARD_BLANK_CHARACTER else 0 for row in rows for symbol in row]
+
+
+def convert_board_files_to_store(board_file_paths: List[str], store_file_path: str,
+                                 solution_file_paths: Optional[List[str]] = None) -> int:
+    """
+    Append 9x9 board files, the comma-separated text read by Board.initialize_board, to a binary store. If any file
+    is malformed or a solution does not match its puzzle, a ValueError is raised and the records appended so far are
+    dropped
+    :param board_file_paths: Paths to the board files, one puzzle each, appended in order
+    :param store_file_path: Path to the data file of the store, created if needed
+    :param solution_file_paths: Paths to board files holding the solution of every puzzle, in the same order. Optional
+    :return: Number of records appended
+    """
+    if solution_file_paths is not None and len(solution_file_paths) != len(board_file_paths):
+        raise ValueError(f"got {len(solution_file_paths)} solution files for {len(board_file_paths)} board files")
+
+    appended = 0
+    with PuzzleStoreWriter(store_file_path) as writer:
+        start_count = writer.count
+        try:
+            for index, board_file_path in enumerate(board_file_paths):
+                puzzle = read_board_file(board_file_path)
+                solution = None
+                if solution_file_paths is not None:
+                    solution = read_board_file(solution_file_paths[index])
+                    _check_solution(puzzle, solution, solution_file_paths[index])
+
+                writer.append(puzzle, solution)
+                appended += 1
+        except ValueError:
+            writer.truncate(start_count)
+            raise
+
+    return appended
+
+
+def convert_store_to_board_files(store_file_path: str, directory_path: str, solutions: bool = False,
+                                 file_name_format: str = "puzzle{index}.txt") -> int:
+    """
+    Write every record of a binary store as a board file, the comma-separated text read by Board.initialize_board
+    :param store_file_path: Path to the data file of the store
+    :param directory_path: Directory the board files are written to, created if needed
+    :param solutions: Write the stored solutions instead of the puzzles. Records without a solution are written as
+     their puzzle
+    :param file_name_format: Name of each board file, formatted with the position of its record as index
+    :return: Number of files written
+    """
+    os.makedirs(directory_path, exist_ok=True)
+
+    with PuzzleStore(store_file_path) as store:
+        for index, stored in enumerate(store):
+            values = stored.solution if solutions and stored.solution is not None else stored.puzzle
+            with open(os.path.join(directory_path, file_name_format.format(index=index)), "w") as board_file:
+                board_file.write(format_board_text(values))
+
+        return len(store)
+
+
+def convert_store_to_text(store_file_path: str, text_file_path: str, solutions: bool = False,
+                          blank_character: str = ".") -> int:
+    """
+    Write the records of a binary store as a one-line text corpus
+    :param store_file_path: Path to the data file of the store
+    :param text_file_path: Path to the text file to write
+    :param solutions: Write the stored solutions instead of the puzzles. Records without a solution are written as
+     their puzzle
+    :param blank_character: Character used for blank cells
+    :return: Number of lines written
+    """
+    with PuzzleStore(store_file_path) as store, open(text_file_path, "w") as text_file:
+        for stored in store:
+            values = stored.solution if solutions and stored.solution is not None else stored.puzzle
+            text_file.write(format_puzzle_line(values, blank_character) + "\n")
+
+        return len(store)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Convert between text puzzles, either one-line corpora or board files, and binary puzzle stores")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    pack_parser = subparsers.add_parser("pack", help="append a text corpus to a binary store")
+    pack_parser.add_argument("text_file")
+    pack_parser.add_argument("store_file")
+    pack_parser.add_argument("--solutions", help="text corpus holding the solution of every puzzle")
+
+    unpack_parser = subparsers.add_parser("unpack", help="write a binary store as a text corpus")
+    unpack_parser.add_argument("store_file")
+    unpack_parser.add_argument("text_file")
+    unpack_parser.add_argument("--solutions", action="store_true", help="write the solutions instead of the puzzles")
+
+    pack_boards_parser = subparsers.add_parser("pack-boards", help="append board files to a binary store")
+    pack_boards_parser.add_argument("store_file")
+    pack_boards_parser.add_argument("board_files", nargs="+")
+    pack_boards_parser.add_argument("--solutions", nargs="+", help="board files holding the solution of every puzzle")
+
+    unpack_boards_parser = subparsers.add_parser("unpack-boards", help="write a binary store as board files")
+    unpack_boards_parser.add_argument("store_file")
+    unpack_boards_parser.add_argument("directory")
+    unpack_boards_parser.add_argument("--solutions", action="store_true",
+                                      help="write the solutions instead of the puzzles")
+    arguments = parser.parse_args()
+
+    if arguments.command == "pack":
+        def report(malformed_line: MalformedLine) -> None:
+            print(f"line {malformed_line.line_number}: {malformed_line.error}")
+
+        count = convert_text_to_store(arguments.text_file, arguments.store_file, arguments.solutions, report)
+    elif arguments.command == "unpack":
+        count = convert_store_to_text(arguments.store_file, arguments.text_file, arguments.solutions)
+    elif arguments.command == "pack-boards":
+        count = convert_board_files_to_store(arguments.board_files, arguments.store_file, arguments.solutions)
+    else:
+        count = convert_store_to_board_files(arguments.store_file, arguments.directory, arguments.solutions)
+
+    print(f"{count} puzzles written")
+
+
+if __name__ == '__main__':
+    main()
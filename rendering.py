@@ -0,0 +1,205 @@
+from typing import TYPE_CHECKING, Callable, Dict, List, Set
+
+# tabulate and json are imported by the functions that use them. tabulate alone takes longer to import than the rest
+# of the solver, and most runs never render a table
+if TYPE_CHECKING:
+    from solver import SolveResult
+
+
+def format_puzzle_line(values: List[int], blank_character: str = ".") -> str:
+    """
+    Format a flat list of cell values as a one-line puzzle
+    :param values: Flat list of cell values, 0 for blank
+    :param blank_character: Character used for blank cells
+    :return: Puzzle text, one character per cell
+    """
+    return "".join(str(value) if value else blank_character for value in values)
+
+
+def format_board_text(values: List[int], box_size: int = 3) -> str:
+    """
+    Format a flat list of cell values as the comma-separated text of board files, read back by parse_board_text
+    :param values: Flat list of cell values in row-major order, 0 for blank
+    :param box_size: Number of rows and columns in a box
+    :return: Board text, one row per line, without a trailing newline
+    """
+    size = box_size * box_size
+    return "\n".join(",".join(str(value) if value else "-" for value in values[row_start:row_start + size])
+                     for row_start in range(0, size * size, size))
+
+
+def render_grid(values: List[int], box_size: int = 3) -> str:
+    """
+    Render a board as an ASCII grid with a border around every box, leaving blank cells empty
+    :param values: Flat list of cell values in row-major order, 0 for blank
+    :param box_size: Number of rows and columns in a box
+    :return: Grid text, without a trailing newline
+    """
+    size = box_size * box_size
+    width = len(str(size))
+    border = "+" + "+".join(["-" * (box_size * (width + 1) + 1)] * box_size) + "+"
+
+    lines = [border]
+    for row_index in range(size):
+        row = values[row_index * size:(row_index + 1) * size]
+        line = "| "
+        for column_index, value in enumerate(row, 1):
+            line += f"{str(value or ' ').rjust(width)} "
+            if column_index % box_size == 0:
+                line += "| "
+        lines.append(line)
+
+        if (row_index + 1) % box_size == 0:
+            lines.append(border)
+
+    return "\n".join(lines)
+
+
+def render_box(box: List[List[str]]) -> str:
+    """
+    Render a single box as an ASCII grid, leaving blank cells empty
+    :param box: 2D array of cell symbols, using "-" for blank cells
+    :return: Box text, without a trailing newline
+    """
+    width = max((len(element) for line in box for element in line), default=1)
+    border = "+" + "-" * (len(box) * (width + 1) + 1) + "+"
+
+    lines = [border]
+    for line in box:
+        lines.append("| " + "".join(f"{element.replace('-', ' ').rjust(width)} " for element in line) + "|")
+    lines.append(border)
+
+    return "\n".join(lines)
+
+
+def render_duplicates(duplicates: Dict[str, Dict[int, Set]]) -> str:
+    """
+    Render the duplicates found by Solver.find_duplicates as one table each for boxes, rows, and columns
+    :param duplicates: Duplicates found for boxes, rows, and columns
+    :return: Tables text, without a trailing newline
+    """
+    from tabulate import tabulate
+
+    plural_to_singular_lookup = {
+        "Boxes": "Box",
+        "Rows": "Row",
+        "Columns": "Column"
+    }
+
+    sections = []
+    for element in ["Boxes", "Rows", "Columns"]:
+        element_duplicates = []
+        element_key_name = element.lower()
+        for element_number in duplicates[element_key_name]:
+            individual_element_duplicates = (str(duplicates[element_key_name][element_number])
+                                             .replace("\'", "")
+                                             .replace("{", "")
+                                             .replace("}", ""))
+            element_duplicates.append([element_number, individual_element_duplicates])
+
+        element_header = f"{plural_to_singular_lookup[element]} Number"
+        sections.append(f"Duplicates in {element}:")
+        sections.append(tabulate(element_duplicates, headers=[element_header, "Duplicates Found"], tablefmt="pretty"))
+
+    return "\n".join(sections)
+
+
+def _describe_work(result: "SolveResult") -> str:
+    """
+    Helper function used to describe the work taken by a solve the way each engine counts it
+    :param result: Result of the solve
+    :return: Sentence describing the work
+    """
+    if result.difficulty is not None:
+        return f"Rated {result.difficulty}, took {result.work} units of work, finished by {result.engine}"
+    if result.engine == "singles":
+        return f"Took {result.work} rounds"
+    if result.engine == "techniques":
+        return f"Took {result.work} placements and search nodes, hardest technique: {result.hardest_technique}"
+    return f"Took {result.work} search nodes"
+
+
+def render_ascii(result: "SolveResult") -> str:
+    """
+    Render a solve result as the ASCII grid followed by the status and work taken. Incomplete results show the
+    partially filled grid
+    :param result: Result of the solve
+    :return: Result text, without a trailing newline
+    """
+    if result.status == "incomplete":
+        return (f"{render_grid(result.values, result.box_size)}\n\nINCOMPLETE: {result.limit_reached} limit reached\n"
+                f"{_describe_work(result)}")
+    if not result.solved:
+        return "Could not find solution"
+
+    return f"{render_grid(result.values, result.box_size)}\n\nSOLVED\n{_describe_work(result)}"
+
+
+def render_table(result: "SolveResult") -> str:
+    """
+    Render a solve result as a tabulate grid followed by a summary table
+    :param result: Result of the solve
+    :return: Result text, without a trailing newline
+    """
+    from tabulate import tabulate
+
+    size = result.box_size * result.box_size
+    rows = [[value or "" for value in result.values[row_index * size:(row_index + 1) * size]]
+            for row_index in range(size)]
+
+    summary = [["Status", result.status], ["Engine", result.engine], ["Work", result.work],
+               ["Time (ms)", f"{result.time * 1000:.3f}"]]
+    if result.hardest_technique is not None:
+        summary.append(["Hardest technique", result.hardest_technique])
+    if result.difficulty is not None:
+        summary.append(["Difficulty", result.difficulty])
+    if result.limit_reached is not None:
+        summary.append(["Limit reached", result.limit_reached])
+
+    return f"{tabulate(rows, tablefmt='grid')}\n{tabulate(summary, tablefmt='pretty')}"
+
+
+def render_json(result: "SolveResult") -> str:
+    """
+    Render a solve result as one line of JSON
+    :param result: Result of the solve
+    :return: JSON text
+    """
+    import json
+
+    return json.dumps(result._asdict())
+
+
+def render_line(result: "SolveResult") -> str:
+    """
+    Render the grid of a solve result as a one-line puzzle, using "." for blank cells. Only boards up to 9x9 have a
+    one-line form
+    :param result: Result of the solve
+    :return: Grid text, one character per cell
+    """
+    if result.box_size > 3:
+        raise ValueError("one-line puzzles are only supported up to 9x9")
+
+    return format_puzzle_line(result.values)
+
+
+# Renderers selectable by name. Each takes a SolveResult and returns text without a trailing newline
+RENDERERS: Dict[str, Callable[["SolveResult"], str]] = {
+    "ascii": render_ascii,
+    "table": render_table,
+    "json": render_json,
+    "line": render_line
+}
+
+
+def render(result: "SolveResult", style: str = "ascii") -> str:
+    """
+    Render a solve result with the renderer of the style specified
+    :param result: Result of the solve
+    :param style: Name of the renderer, a key of RENDERERS
+    :return: Result text, without a trailing newline
+    """
+    if style not in RENDERERS:
+        raise ValueError(f"style must be one of: {', '.join(RENDERERS)}")
+
+    return RENDERERS[style](result)
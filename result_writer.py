@@ -0,0 +1,311 @@
+import argparse
+import glob
+import json
+import os
+from itertools import islice
+from typing import Dict, Iterable, List, Optional
+
+from batch import BatchResult, solve_batch
+from corpus import CorpusReader
+from puzzle_store import PuzzleStoreWriter
+
+# Results of a bulk job are written to numbered shard files in one output directory, next to a checkpoint file. Text
+# shards hold one 81-character line per puzzle: its solution, or the puzzle itself if it was not solved. Binary
+# shards are puzzle stores holding every puzzle with its solution. Puzzles that could not be parsed are skipped in
+# both formats. The checkpoint records how many input puzzles have their results committed, and how far the current
+# shard had been written at that point, so a job restarted after a crash drops anything written since and resumes
+# from the next input puzzle.
+SHARD_SUFFIXES = {
+    "text": ".txt",
+    "binary": ".sdk"
+}
+SHARD_PREFIX = "results-"
+CHECKPOINT_FILE_NAME = "checkpoint.json"
+
+
+class ShardedResultWriter:
+    """
+    Class used to write the results of a bulk job to sharded output files with resumable checkpoints. Results are
+    buffered and committed every commit_interval results: the shard is flushed and synced to disk, then the
+    checkpoint is replaced atomically. Opening a writer on a directory holding a checkpoint resumes from it, and
+    input_offset tells how many input puzzles to skip
+    """
+
+    def __init__(self, output_directory: str, output_format: str = "text", shard_size: int = 1_000_000,
+                 commit_interval: int = 4096, sync: bool = True) -> None:
+        """
+        Open the output directory, resuming from its checkpoint if it has one
+        :param output_directory: Directory of the shards and checkpoint, created if needed
+        :param output_format: "text" or "binary"
+        :param shard_size: Maximum number of results per shard
+        :param commit_interval: Number of results buffered between two commits
+        :param sync: Wait for every commit to reach the disk. Without it, a crash of the machine rather than the
+         process can lose results the checkpoint counts as committed
+        """
+        if output_format not in SHARD_SUFFIXES:
+            raise ValueError(f"output_format must be one of: {', '.join(SHARD_SUFFIXES)}")
+        if shard_size < 1 or commit_interval < 1:
+            raise ValueError("shard_size and commit_interval must be at least 1")
+
+        self.output_directory = output_directory
+        self.output_format = output_format
+        self.shard_size = shard_size
+        self.commit_interval = commit_interval
+        self.sync = sync
+        self.checkpoint_file_path = os.path.join(output_directory, CHECKPOINT_FILE_NAME)
+
+        # Input puzzles whose results are committed, and the shard being written with its committed records and bytes
+        self.input_offset = 0
+        self.shard = 0
+        self.shard_records = 0
+        self.shard_bytes = 0
+        # Results written to every shard so far
+        self.records_written = 0
+
+        self.pending = []
+        self._shard_file = None
+
+        os.makedirs(output_directory, exist_ok=True)
+        self._resume()
+
+    def __enter__(self) -> "ShardedResultWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def get_shard_path(self, shard: int) -> str:
+        """
+        Return the path of a shard file
+        :param shard: Number of the shard
+        :return: Path of the shard
+        """
+        return os.path.join(self.output_directory, f"{SHARD_PREFIX}{shard:05d}{SHARD_SUFFIXES[self.output_format]}")
+
+    def _resume(self) -> None:
+        """
+        Helper function used to load the checkpoint, if any, and drop everything written after it
+        :return: None
+        """
+        if os.path.exists(self.checkpoint_file_path):
+            with open(self.checkpoint_file_path) as checkpoint_file:
+                checkpoint = json.load(checkpoint_file)
+
+            for setting in ("output_format", "shard_size"):
+                if checkpoint[setting] != getattr(self, setting):
+                    raise ValueError(f"{setting} does not match the checkpoint: {checkpoint[setting]}")
+
+            self.input_offset = checkpoint["input_offset"]
+            self.shard = checkpoint["shard"]
+            self.shard_records = checkpoint["shard_records"]
+            self.shard_bytes = checkpoint["shard_bytes"]
+            self.records_written = checkpoint["records_written"]
+
+        # shards started after the checkpoint hold no committed results
+        for shard_path in glob.glob(os.path.join(self.output_directory, f"{SHARD_PREFIX}*")):
+            shard_name = os.path.basename(shard_path)[len(SHARD_PREFIX):].split(".")[0]
+            if shard_name.isdigit() and int(shard_name) > self.shard:
+                os.remove(shard_path)
+
+        if self.shard_records or os.path.exists(self.get_shard_path(self.shard)):
+            self._open_shard()
+
+    def _open_shard(self) -> None:
+        """
+        Helper function used to open the current shard for appending, cut back to its committed length
+        :return: None
+        """
+        shard_path = self.get_shard_path(self.shard)
+
+        if self.output_format == "binary":
+            self._shard_file = PuzzleStoreWriter(shard_path)
+            self._shard_file.truncate(self.shard_records)
+            return
+
+        self._shard_file = open(shard_path, "r+b" if os.path.exists(shard_path) else "w+b")
+        self._shard_file.truncate(self.shard_bytes)
+        self._shard_file.seek(self.shard_bytes)
+
+    def _close_shard(self) -> None:
+        """
+        Helper function used to flush and close the current shard
+        :return: None
+        """
+        if self._shard_file is not None:
+            self._sync_shard()
+            self._shard_file.close()
+            self._shard_file = None
+
+    def _sync_shard(self) -> None:
+        """
+        Helper function used to flush the current shard, and sync it to disk when sync is set
+        :return: None
+        """
+        if self.output_format == "binary":
+            if self.sync:
+                self._shard_file.sync()
+            else:
+                self._shard_file.flush()
+            return
+
+        self._shard_file.flush()
+        if self.sync:
+            os.fsync(self._shard_file.fileno())
+
+    def write(self, result: BatchResult) -> None:
+        """
+        Buffer the result of the next input puzzle, committing once commit_interval results are buffered. Results
+        must be written in input order
+        :param result: Outcome of the puzzle
+        :return: None
+        """
+        self.pending.append(result)
+        if len(self.pending) >= self.commit_interval:
+            self.commit()
+
+    def write_all(self, results: Iterable[BatchResult]) -> None:
+        """
+        Write every result of an iterable, in input order
+        :param results: Outcomes of the puzzles
+        :return: None
+        """
+        for result in results:
+            self.write(result)
+
+    def commit(self) -> None:
+        """
+        Write the buffered results to the shards, sync them, and record the new checkpoint
+        :return: None
+        """
+        if not self.pending:
+            return
+
+        lines = []
+        for result in self.pending:
+            if result.status == "invalid":
+                continue
+
+            if self._shard_file is None or self.shard_records >= self.shard_size:
+                self._write_lines(lines)
+                self._next_shard()
+
+            if self.output_format == "binary":
+                self._shard_file.append_result(result)
+            else:
+                lines.append((result.solution or result.puzzle).encode("ascii") + b"\n")
+            self.shard_records += 1
+            self.records_written += 1
+
+        self._write_lines(lines)
+        self._sync_shard()
+
+        self.input_offset += len(self.pending)
+        self.pending.clear()
+        self._write_checkpoint()
+
+    def _write_lines(self, lines: List[bytes]) -> None:
+        """
+        Helper function used to write the buffered lines of a text shard with a single call
+        :param lines: Lines to write, cleared afterwards
+        :return: None
+        """
+        if lines:
+            data = b"".join(lines)
+            self._shard_file.write(data)
+            self.shard_bytes += len(data)
+            lines.clear()
+
+    def _next_shard(self) -> None:
+        """
+        Helper function used to start the next shard once the current one is full, or the first one
+        :return: None
+        """
+        if self._shard_file is not None:
+            self._close_shard()
+            self.shard += 1
+
+        self.shard_records = 0
+        self.shard_bytes = 0
+        self._open_shard()
+
+    def _write_checkpoint(self) -> None:
+        """
+        Helper function used to replace the checkpoint file atomically, so a crash leaves either the old or the new
+        checkpoint
+        :return: None
+        """
+        checkpoint = {
+            "input_offset": self.input_offset,
+            "shard": self.shard,
+            "shard_records": self.shard_records,
+            "shard_bytes": self.shard_bytes,
+            "records_written": self.records_written,
+            "output_format": self.output_format,
+            "shard_size": self.shard_size
+        }
+
+        temporary_path = self.checkpoint_file_path + ".tmp"
+        with open(temporary_path, "w") as checkpoint_file:
+            json.dump(checkpoint, checkpoint_file)
+            checkpoint_file.flush()
+            if self.sync:
+                os.fsync(checkpoint_file.fileno())
+        os.replace(temporary_path, self.checkpoint_file_path)
+
+    def close(self) -> None:
+        """
+        Commit the buffered results and close the current shard
+        :return: None
+        """
+        self.commit()
+        self._close_shard()
+
+
+def solve_corpus(corpus_file_path: str, output_directory: str, engine: str = "dlx", workers: Optional[int] = None,
+                 output_format: str = "text", shard_size: int = 1_000_000, commit_interval: int = 4096) -> Dict:
+    """
+    Solve a one-line corpus into sharded result files, resuming from the checkpoint of an earlier interrupted run.
+    Puzzles whose results were committed before are skipped without being solved
+    :param corpus_file_path: Path to the corpus, read with CorpusReader
+    :param output_directory: Directory of the shards and checkpoint
+    :param engine: Solver engine to use
+    :param workers: Number of worker processes. Defaults to the CPU count
+    :param output_format: "text" or "binary"
+    :param shard_size: Maximum number of results per shard
+    :param commit_interval: Number of results buffered between two commits
+    :return: Input puzzles skipped because they were already committed, and totals after the run
+    """
+    with ShardedResultWriter(output_directory, output_format, shard_size, commit_interval) as writer:
+        skipped = writer.input_offset
+
+        puzzles = (puzzle.decode("ascii") for _, puzzle in CorpusReader(corpus_file_path).iter_lines())
+        writer.write_all(solve_batch(islice(puzzles, skipped, None), engine, workers))
+
+    return {
+        "skipped": skipped,
+        "input_offset": writer.input_offset,
+        "records_written": writer.records_written,
+        "shards": writer.shard + 1 if writer.records_written else 0
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Solve a one-line corpus into sharded result files, resuming from "
+                                                 "the last checkpoint if the output directory has one")
+    parser.add_argument("corpus_file")
+    parser.add_argument("output_directory")
+    parser.add_argument("--engine", default="dlx")
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--format", choices=SHARD_SUFFIXES, default="text")
+    parser.add_argument("--shard-size", type=int, default=1_000_000, help="maximum number of results per shard")
+    parser.add_argument("--commit-interval", type=int, default=4096, help="results written between checkpoints")
+    arguments = parser.parse_args()
+
+    summary = solve_corpus(arguments.corpus_file, arguments.output_directory, arguments.engine, arguments.workers,
+                           arguments.format, arguments.shard_size, arguments.commit_interval)
+    print(f"Skipped {summary['skipped']} committed puzzles, {summary['input_offset']} puzzles done, "
+          f"{summary['records_written']} results in {summary['shards']} shards")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,570 @@
+from typing import TYPE_CHECKING, Iterator, List, Optional
+
+from budget import SolveBudget
+from layout import get_layout
+
+# multiprocessing is only imported by the solver when counting in parallel
+if TYPE_CHECKING:
+    from multiprocessing.synchronize import Event
+
+Grid = List[int]
+
+# Number of search nodes between two checks of the stop event of a count. Reading the event takes a lock shared across
+# processes, so it is read every few nodes rather than on every one
+STOP_CHECK_INTERVAL = 64
+
+# Stop event of the counts run in this worker process, set by init_count_worker
+_worker_stop_event = None
+
+
+class BacktrackingSearch:
+    """
+    Complete search engine using constraint propagation (naked and hidden singles) and backtracking that always
+    branches on the cell with the fewest remaining candidates.
+    Grids are flat lists of integers in row-major order, where 0 represents a blank cell
+    """
+
+    def __init__(self, values: Grid, box_size: int = 3, budget: Optional[SolveBudget] = None) -> None:
+        """
+        Initialize the search with the starting grid
+        :param values: Flat list of the cell values, 0 for blank
+        :param box_size: Number of rows and columns in a box
+        :param budget: Limits checked on every node of find_solutions, which raises BudgetExceeded once one is
+         passed. Optional
+        """
+        self.values = list(values)
+        self.budget = budget
+
+        layout = get_layout(box_size)
+        if len(self.values) != layout.cell_count:
+            raise ValueError(f"values must have {layout.cell_count} cells")
+
+        self.cell_count = layout.cell_count
+        self.size = layout.size
+        self.full_mask = layout.full_mask
+        self.mask_sizes = layout.mask_sizes
+        self.peers = layout.peers
+        self.units_of_cell = layout.units_of_cell
+
+        # Number of branches tried during the last search
+        self.nodes = 0
+
+        # Event checked by count_solutions every STOP_CHECK_INTERVAL nodes, and whether the last count stopped on it
+        self.stop_event = None
+        self.stopped = False
+
+    def find_solutions(self, limit: int = 1) -> List[Grid]:
+        """
+        Search for solutions to the starting grid, stopping once the limit is reached
+        :param limit: Maximum number of solutions to return. Use 2 to check whether a puzzle is unique
+        :return: Solutions found, each a flat list of integers
+        """
+        self.nodes = 0
+        solutions = []
+
+        candidates = self._get_initial_candidates()
+        if self.budget is not None:
+            self.budget.check_time()
+        if candidates is not None:
+            self._search(candidates, solutions, limit)
+
+        return solutions
+
+    def iter_solutions(self) -> Iterator[Grid]:
+        """
+        Lazily enumerate the solutions to the starting grid. Each solution is only searched for when requested
+        :return: Solutions in search order, each a flat list of integers
+        """
+        self.nodes = 0
+
+        candidates = self._get_initial_candidates()
+        if candidates is not None:
+            yield from self._iter_search(candidates)
+
+    def count_solutions(self, limit: Optional[int] = None, candidates: Optional[List[int]] = None,
+                        stop_event: Optional["Event"] = None) -> int:
+        """
+        Count the solutions to the starting grid without keeping them, stopping once the limit is reached
+        :param limit: Number of solutions to stop at. Counts every solution if None
+        :param candidates: Candidate masks to count from instead of the starting grid, e.g. a subtree returned by
+         split_subtrees. Optional
+        :param stop_event: Event that ends the count early once set, e.g. when another process has already reached
+         the limit. The count found so far is returned and stopped is set. Optional
+        :return: Number of solutions found, at most the limit
+        """
+        self.nodes = 0
+        self.stop_event = stop_event
+        self.stopped = False
+
+        if candidates is None:
+            candidates = self._get_initial_candidates()
+            if candidates is None:
+                return 0
+
+        return self._count(candidates, float("inf") if limit is None else limit)
+
+    def split_subtrees(self, minimum: int) -> List[List[int]]:
+        """
+        Split the search tree into independent subtrees by branching on the unsolved cell with the fewest candidates,
+        level by level, until there are at least the minimum number of subtrees or every subtree is solved. The
+        solutions of the starting grid are the union of the solutions of the subtrees
+        :param minimum: Number of subtrees wanted, e.g. a few per worker process
+        :return: Candidate masks of every subtree, in search order
+        """
+        self.nodes = 0
+
+        candidates = self._get_initial_candidates()
+        if candidates is None:
+            return []
+
+        subtrees = [candidates]
+        is_split = True
+        while is_split and len(subtrees) < minimum:
+            expanded = []
+            is_split = False
+            for subtree in subtrees:
+                cell = self._select_cell(subtree)
+                if cell == -1:
+                    expanded.append(subtree)
+                    continue
+
+                is_split = True
+
+                remaining = subtree[cell]
+                while remaining:
+                    bit = remaining & -remaining
+                    remaining ^= bit
+                    self.nodes += 1
+
+                    branch = subtree[:]
+                    if self._assign(branch, cell, bit):
+                        expanded.append(branch)
+
+            subtrees = expanded
+
+        return subtrees
+
+    def _get_initial_candidates(self) -> Optional[List[int]]:
+        """
+        Helper function used to build the candidate masks of the starting grid by placing every clue
+        :return: Candidate mask of every cell, or None if the clues contradict each other
+        """
+        candidates = [self.full_mask] * self.cell_count
+        for cell, value in enumerate(self.values):
+            if value and not self._assign(candidates, cell, 1 << (value - 1)):
+                return None
+
+        return candidates
+
+    def _select_cell(self, candidates: List[int]) -> int:
+        """
+        Helper function used to find the unsolved cell with the fewest candidates
+        :param candidates: Candidate mask of every cell
+        :return: Index of the cell, or -1 if every cell is solved
+        """
+        mask_sizes = self.mask_sizes
+        best_cell = -1
+        best_size = self.size + 1
+        for cell in range(self.cell_count):
+            size = mask_sizes[candidates[cell]]
+            if 1 < size < best_size:
+                best_cell = cell
+                best_size = size
+                if size == 2:
+                    break
+
+        return best_cell
+
+    def _search(self, candidates: List[int], solutions: List[Grid], limit: int) -> None:
+        """
+        Helper function used to branch on the unsolved cell with the fewest candidates
+        :param candidates: Candidate mask of every cell
+        :param solutions: Solutions found so far, extended in place
+        :param limit: Maximum number of solutions to collect
+        :return: None
+        """
+        best_cell = self._select_cell(candidates)
+        if best_cell == -1:
+            solutions.append([mask.bit_length() for mask in candidates])
+            return
+
+        remaining = candidates[best_cell]
+        while remaining:
+            bit = remaining & -remaining
+            remaining ^= bit
+            self.nodes += 1
+            if self.budget is not None:
+                self.budget.add_node()
+
+            branch = candidates[:]
+            if self._assign(branch, best_cell, bit):
+                self._search(branch, solutions, limit)
+                if len(solutions) >= limit:
+                    return
+
+    def _iter_search(self, candidates: List[int]) -> Iterator[Grid]:
+        """
+        Helper function used to branch on the unsolved cell with the fewest candidates, yielding solutions as found
+        :param candidates: Candidate mask of every cell
+        :return: Solutions below this node
+        """
+        best_cell = self._select_cell(candidates)
+        if best_cell == -1:
+            yield [mask.bit_length() for mask in candidates]
+            return
+
+        remaining = candidates[best_cell]
+        while remaining:
+            bit = remaining & -remaining
+            remaining ^= bit
+            self.nodes += 1
+
+            branch = candidates[:]
+            if self._assign(branch, best_cell, bit):
+                yield from self._iter_search(branch)
+
+    def _count(self, candidates: List[int], limit: float) -> int:
+        """
+        Helper function used to count the solutions below a node without building them
+        :param candidates: Candidate mask of every cell
+        :param limit: Number of solutions to stop at
+        :return: Number of solutions found, at most the limit
+        """
+        best_cell = self._select_cell(candidates)
+        if best_cell == -1:
+            return 1
+
+        count = 0
+        remaining = candidates[best_cell]
+        while remaining:
+            bit = remaining & -remaining
+            remaining ^= bit
+            self.nodes += 1
+            if self.stop_event is not None and not self.nodes % STOP_CHECK_INTERVAL and self.stop_event.is_set():
+                self.stopped = True
+                break
+
+            branch = candidates[:]
+            if self._assign(branch, best_cell, bit):
+                count += self._count(branch, limit - count)
+                if count >= limit or self.stopped:
+                    break
+
+        return count
+
+    def _assign(self, candidates: List[int], cell: int, bit: int) -> bool:
+        """
+        Helper function used to place a digit by eliminating every other candidate of the cell
+        :param candidates: Candidate mask of every cell
+        :param cell: Index of the cell
+        :param bit: Mask bit of the digit to place
+        :return: False if the placement leads to a contradiction, True otherwise
+        """
+        others = candidates[cell] & ~bit
+        while others:
+            other = others & -others
+            others ^= other
+            if not self._eliminate(candidates, cell, other):
+                return False
+
+        return True
+
+    def _eliminate(self, candidates: List[int], cell: int, bit: int) -> bool:
+        """
+        Helper function used to remove a candidate from a cell and propagate naked and hidden singles
+        :param candidates: Candidate mask of every cell
+        :param cell: Index of the cell
+        :param bit: Mask bit of the candidate to remove
+        :return: False if the elimination leads to a contradiction, True otherwise
+        """
+        mask = candidates[cell]
+        if not mask & bit:
+            return True
+
+        mask &= ~bit
+        if not mask:
+            return False
+        candidates[cell] = mask
+
+        # naked single: the only remaining digit is removed from every peer
+        if not mask & (mask - 1):
+            for peer in self.peers[cell]:
+                if not self._eliminate(candidates, peer, mask):
+                    return False
+
+        # hidden single: a unit with one place left for the removed digit must use it
+        for unit in self.units_of_cell[cell]:
+            places = [unit_cell for unit_cell in unit if candidates[unit_cell] & bit]
+            if not places:
+                return False
+            if len(places) == 1 and candidates[places[0]] != bit:
+                if not self._assign(candidates, places[0], bit):
+                    return False
+
+        return True
+
+
+def init_count_worker(stop_event: "Event") -> None:
+    """
+    Set the stop event of the counts run in a worker process. Used as the initializer of the process pool
+    :param stop_event: Event set once the counts are no longer needed
+    :return: None
+    """
+    global _worker_stop_event
+    _worker_stop_event = stop_event
+
+
+def count_subtree(candidates: List[int], box_size: int, limit: Optional[int]) -> int:
+    """
+    Count the solutions of one subtree returned by BacktrackingSearch.split_subtrees. Run in worker processes, where
+    the count ends early once the stop event set by init_count_worker is set
+    :param candidates: Candidate masks of the subtree
+    :param box_size: Number of rows and columns in a box
+    :param limit: Number of solutions to stop at. Counts every solution if None
+    :return: Number of solutions found, at most the limit
+    """
+    search = BacktrackingSearch([0] * len(candidates), box_size)
+    return search.count_solutions(limit, candidates, _worker_stop_event)
+
+
+class DancingLinksSearch:
+    """
+    Complete search engine treating the puzzle as an exact cover problem and solving it with Knuth's Dancing Links.
+    The links are kept in flat integer lists rather than node objects
+    Grids are flat lists of integers in row-major order, where 0 represents a blank cell
+    """
+
+    def __init__(self, values: Grid, box_size: int = 3, budget: Optional[SolveBudget] = None) -> None:
+        """
+        Initialize the search with the starting grid
+        :param values: Flat list of the cell values, 0 for blank
+        :param box_size: Number of rows and columns in a box
+        :param budget: Limits checked on every node of find_solutions, which raises BudgetExceeded once one is
+         passed. The links are left partly covered, so the search cannot be reused after that. Optional
+        """
+        self.values = list(values)
+        self.budget = budget
+
+        self.layout = get_layout(box_size)
+        if len(self.values) != self.layout.cell_count:
+            raise ValueError(f"values must have {self.layout.cell_count} cells")
+
+        self.size = self.layout.size
+
+        # Number of rows tried during the last search
+        self.nodes = 0
+
+        self.left = []
+        self.right = []
+        self.up = []
+        self.down = []
+        self.column = []
+        self.row_of_node = []
+        self.sizes = []
+
+    def find_solutions(self, limit: int = 1) -> List[Grid]:
+        """
+        Search for solutions to the starting grid, stopping once the limit is reached
+        :param limit: Maximum number of solutions to return. Use 2 to check whether a puzzle is unique
+        :return: Solutions found, each a flat list of integers
+        """
+        self.nodes = 0
+        solutions = []
+
+        first_node_of_row = self._build_links()
+
+        selected_rows = []
+        covered_columns = set()
+        for cell, value in enumerate(self.values):
+            if not value:
+                continue
+
+            row_node = first_node_of_row[cell * self.size + value - 1]
+            row_columns = self._get_row_columns(row_node)
+            if covered_columns.intersection(row_columns):
+                # a clue conflicts with an earlier clue
+                return solutions
+
+            covered_columns.update(row_columns)
+            for column_header in row_columns:
+                self._cover(column_header)
+            selected_rows.append(self.row_of_node[row_node])
+
+        if self.budget is not None:
+            self.budget.check_time()
+        self._search(selected_rows, solutions, limit)
+
+        return solutions
+
+    def _build_links(self) -> List[int]:
+        """
+        Helper function used to build the exact cover matrix for an empty board. There is one constraint column per
+        cell, per row and digit, per column and digit, and per box and digit
+        :return: First node of each (cell, digit) row
+        """
+        layout = self.layout
+        size = self.size
+        cell_count = layout.cell_count
+        column_count = 4 * cell_count
+
+        # node 0 is the root and nodes 1 to column_count are the column headers
+        header_count = column_count + 1
+        self.left = [index - 1 for index in range(header_count)]
+        self.right = [index + 1 for index in range(header_count)]
+        self.left[0] = column_count
+        self.right[column_count] = 0
+        self.up = list(range(header_count))
+        self.down = list(range(header_count))
+        self.column = list(range(header_count))
+        self.row_of_node = [-1] * header_count
+        self.sizes = [0] * header_count
+
+        row_of_cell = layout.row_of_cell
+        column_of_cell = layout.column_of_cell
+        box_of_cell = layout.box_of_cell
+        left, right, up, down, column, row_of_node, sizes = (self.left, self.right, self.up, self.down, self.column,
+                                                             self.row_of_node, self.sizes)
+
+        first_node_of_row = []
+        for cell in range(cell_count):
+            for digit_index in range(size):
+                row_id = cell * size + digit_index
+                column_headers = [
+                    1 + cell,
+                    1 + cell_count + row_of_cell[cell] * size + digit_index,
+                    1 + 2 * cell_count + column_of_cell[cell] * size + digit_index,
+                    1 + 3 * cell_count + box_of_cell[cell] * size + digit_index,
+                ]
+
+                first_node = len(column)
+                first_node_of_row.append(first_node)
+                for offset, column_header in enumerate(column_headers):
+                    node = first_node + offset
+                    left.append(first_node + (offset - 1) % 4)
+                    right.append(first_node + (offset + 1) % 4)
+
+                    # append the node to the bottom of its column
+                    up.append(up[column_header])
+                    down.append(column_header)
+                    down[up[column_header]] = node
+                    up[column_header] = node
+
+                    column.append(column_header)
+                    row_of_node.append(row_id)
+                    sizes[column_header] += 1
+
+        return first_node_of_row
+
+    def _get_row_columns(self, row_node: int) -> List[int]:
+        """
+        Helper function used to list the column headers of every node in a row
+        :param row_node: Any node of the row
+        :return: Column headers of the row
+        """
+        columns = [self.column[row_node]]
+        node = self.right[row_node]
+        while node != row_node:
+            columns.append(self.column[node])
+            node = self.right[node]
+
+        return columns
+
+    def _cover(self, column_header: int) -> None:
+        """
+        Helper function used to remove a column and every row intersecting it from the matrix
+        :param column_header: Header node of the column to cover
+        :return: None
+        """
+        left, right, up, down, column, sizes = self.left, self.right, self.up, self.down, self.column, self.sizes
+
+        right[left[column_header]] = right[column_header]
+        left[right[column_header]] = left[column_header]
+
+        row_node = down[column_header]
+        while row_node != column_header:
+            node = right[row_node]
+            while node != row_node:
+                down[up[node]] = down[node]
+                up[down[node]] = up[node]
+                sizes[column[node]] -= 1
+                node = right[node]
+            row_node = down[row_node]
+
+    def _uncover(self, column_header: int) -> None:
+        """
+        Helper function used to restore a column covered by _cover
+        :param column_header: Header node of the column to restore
+        :return: None
+        """
+        left, right, up, down, column, sizes = self.left, self.right, self.up, self.down, self.column, self.sizes
+
+        row_node = up[column_header]
+        while row_node != column_header:
+            node = left[row_node]
+            while node != row_node:
+                sizes[column[node]] += 1
+                down[up[node]] = node
+                up[down[node]] = node
+                node = left[node]
+            row_node = up[row_node]
+
+        right[left[column_header]] = column_header
+        left[right[column_header]] = column_header
+
+    def _search(self, selected_rows: List[int], solutions: List[Grid], limit: int) -> None:
+        """
+        Helper function used to run Algorithm X, branching on the column with the fewest rows
+        :param selected_rows: Row ids chosen so far, extended and restored in place
+        :param solutions: Solutions found so far, extended in place
+        :param limit: Maximum number of solutions to collect
+        :return: None
+        """
+        right, down, sizes = self.right, self.down, self.sizes
+
+        if right[0] == 0:
+            solution = [0] * self.layout.cell_count
+            for row_id in selected_rows:
+                solution[row_id // self.size] = row_id % self.size + 1
+            solutions.append(solution)
+            return
+
+        column_header = right[0]
+        smallest = sizes[column_header]
+        header = right[column_header]
+        while header != 0 and smallest > 1:
+            if sizes[header] < smallest:
+                column_header = header
+                smallest = sizes[header]
+            header = right[header]
+
+        if smallest == 0:
+            return
+
+        self._cover(column_header)
+
+        row_node = down[column_header]
+        while row_node != column_header:
+            self.nodes += 1
+            if self.budget is not None:
+                self.budget.add_node()
+            selected_rows.append(self.row_of_node[row_node])
+
+            node = right[row_node]
+            while node != row_node:
+                self._cover(self.column[node])
+                node = right[node]
+
+            self._search(selected_rows, solutions, limit)
+
+            node = self.left[row_node]
+            while node != row_node:
+                self._uncover(self.column[node])
+                node = self.left[node]
+
+            selected_rows.pop()
+            if len(solutions) >= limit:
+                break
+
+            row_node = down[row_node]
+
+        self._uncover(column_header)
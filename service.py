@@ -0,0 +1,243 @@
+import argparse
+import asyncio
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple, Optional
+
+from batch import solve_puzzle
+from budget import SolveBudget
+
+
+class ServiceResult(NamedTuple):
+    """
+    Outcome of one request to the solving service
+    """
+    puzzle: str
+    # "solved", "unsolved", "invalid", "timeout", "overloaded", or "error"
+    status: str
+    # 81-character solution, or None if the puzzle was not solved
+    solution: Optional[str]
+    # Rounds for the "singles" engine, placements plus search nodes for "techniques", search nodes otherwise
+    work: int
+    # Seconds from receiving the request to returning the result
+    time: float
+    error: Optional[str] = None
+
+    def to_json(self) -> str:
+        """
+        Serialize the result as one line of JSON
+        :return: JSON text
+        """
+        return json.dumps(self._asdict())
+
+
+class SolverService:
+    """
+    Class used to solve puzzles from asyncio code. CPU work runs in a process pool so the event loop is never blocked.
+    At most max_in_flight puzzles are being solved at once and at most max_pending requests wait for a slot; further
+    requests are rejected as "overloaded" straight away. Every request can carry a deadline, and failures are returned
+    as results instead of raised
+    """
+
+    def __init__(self, workers: Optional[int] = None, max_in_flight: int = 64, max_pending: int = 1024,
+                 engine: str = "backtracking", default_timeout: Optional[float] = None) -> None:
+        """
+        Initialize the SolverService object. The process pool is started by start or by entering the context manager
+        :param workers: Number of worker processes. Defaults to the CPU count
+        :param max_in_flight: Maximum number of puzzles submitted to the pool at once
+        :param max_pending: Maximum number of requests waiting for an in-flight slot
+        :param engine: Solver engine to use
+        :param default_timeout: Deadline in seconds for requests that do not give one. Optional
+        """
+        if max_in_flight < 1:
+            raise ValueError("max_in_flight must be at least 1")
+
+        self.workers = workers
+        self.max_in_flight = max_in_flight
+        self.max_pending = max_pending
+        self.engine = engine
+        self.default_timeout = default_timeout
+
+        self.executor = None
+        self.slots = None
+        self.pending = 0
+
+    async def start(self) -> None:
+        """
+        Start the process pool
+        :return: None
+        """
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(max_workers=self.workers)
+            self.slots = asyncio.Semaphore(self.max_in_flight)
+
+    async def close(self) -> None:
+        """
+        Stop the process pool, cancelling puzzles that have not started
+        :return: None
+        """
+        if self.executor is not None:
+            executor, self.executor = self.executor, None
+            await asyncio.get_running_loop().run_in_executor(None, lambda: executor.shutdown(cancel_futures=True))
+
+    async def __aenter__(self) -> "SolverService":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    def _release_slot(self, loop: asyncio.AbstractEventLoop) -> None:
+        """
+        Helper function used to release an in-flight slot from the thread completing a worker future
+        :param loop: Event loop owning the slots
+        :return: None
+        """
+        if not loop.is_closed():
+            loop.call_soon_threadsafe(self.slots.release)
+
+    async def solve(self, puzzle: str, timeout: Optional[float] = None) -> ServiceResult:
+        """
+        Solve one puzzle in the process pool
+        :param puzzle: 81-character puzzle, using ".", "0", or "-" for blank cells
+        :param timeout: Deadline in seconds covering both waiting for a slot and solving. Defaults to default_timeout
+        :return: Outcome of the request
+        """
+        if self.executor is None:
+            raise RuntimeError("the service has not been started")
+
+        start = time.perf_counter()
+        timeout = self.default_timeout if timeout is None else timeout
+
+        if self.slots.locked() and self.pending >= self.max_pending:
+            return ServiceResult(puzzle, "overloaded", None, 0, time.perf_counter() - start)
+
+        self.pending += 1
+        try:
+            await asyncio.wait_for(self.slots.acquire(), timeout)
+        except asyncio.TimeoutError:
+            return ServiceResult(puzzle, "timeout", None, 0, time.perf_counter() - start)
+        finally:
+            self.pending -= 1
+
+        # the worker is given what is left of the deadline as a solve budget, so a slow puzzle stops on its own
+        # instead of holding a worker after the caller has given up on it
+        remaining = None if timeout is None else max(0.0, timeout - (time.perf_counter() - start))
+        budget = None if remaining is None else SolveBudget(max_seconds=remaining)
+        loop = asyncio.get_running_loop()
+        try:
+            worker_future = self.executor.submit(solve_puzzle, 0, puzzle, self.engine, budget)
+        except Exception as error:
+            self.slots.release()
+            return ServiceResult(puzzle, "error", None, 0, time.perf_counter() - start, repr(error))
+
+        # the slot is held until the worker is done with the puzzle, even if the caller stops waiting, so a burst of
+        # timed out requests cannot overload the pool. It is released from the pool's own future, which only completes
+        # once the worker has finished, rather than from the asyncio wrapper that cancelling resolves straight away
+        worker_future.add_done_callback(lambda _: self._release_slot(loop))
+        future = asyncio.wrap_future(worker_future)
+
+        remaining = None if timeout is None else max(0.0, timeout - (time.perf_counter() - start))
+        try:
+            outcome = await asyncio.wait_for(asyncio.shield(future), remaining)
+        except asyncio.TimeoutError:
+            future.cancel()
+            return ServiceResult(puzzle, "timeout", None, 0, time.perf_counter() - start)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as error:
+            return ServiceResult(puzzle, "error", None, 0, time.perf_counter() - start, repr(error))
+
+        status = "timeout" if outcome.status == "incomplete" else outcome.status
+        return ServiceResult(puzzle, status, outcome.solution, outcome.rounds, time.perf_counter() - start)
+
+
+async def handle_connection(service: SolverService, reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+                            timeout: Optional[float]) -> None:
+    """
+    Serve one client of the line protocol: every line received is a puzzle, answered by one line of JSON in the same
+    order. Requests from one connection are solved concurrently, up to the in-flight limit of the service. Once that
+    many answers are waiting to be written, reading stops until the oldest is sent, so a client sending faster than it
+    is answered is slowed down by the connection instead of growing the queue
+    :param service: Service used to solve the puzzles
+    :param reader: Stream of the client's lines
+    :param writer: Stream to the client
+    :param timeout: Deadline in seconds for every puzzle. Optional
+    :return: None
+    """
+    responses = asyncio.Queue(maxsize=service.max_in_flight)
+
+    async def write_responses() -> None:
+        while True:
+            request = await responses.get()
+            if request is None:
+                return
+            result = await request
+            writer.write(result.to_json().encode() + b"\n")
+            await writer.drain()
+
+    writer_task = asyncio.create_task(write_responses())
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            puzzle = line.decode(errors="replace").strip()
+            if puzzle:
+                await responses.put(asyncio.create_task(service.solve(puzzle, timeout)))
+        await responses.put(None)
+        await writer_task
+    finally:
+        writer_task.cancel()
+        writer.close()
+
+
+async def serve(host: str, port: int, service: SolverService, timeout: Optional[float] = None) -> None:
+    """
+    Run the line protocol server until cancelled
+    :param host: Address to listen on
+    :param port: Port to listen on
+    :param service: Started service used to solve the puzzles
+    :param timeout: Deadline in seconds for every puzzle. Optional
+    :return: None
+    """
+    server = await asyncio.start_server(
+        lambda reader, writer: handle_connection(service, reader, writer, timeout), host, port)
+
+    async with server:
+        await server.serve_forever()
+
+
+async def run_server(arguments: argparse.Namespace) -> None:
+    """
+    Start the service and serve the line protocol with the given command line options
+    :param arguments: Parsed command line options
+    :return: None
+    """
+    async with SolverService(arguments.workers, arguments.max_in_flight, arguments.max_pending,
+                             arguments.engine) as service:
+        print(f"Serving on {arguments.host}:{arguments.port}")
+        await serve(arguments.host, arguments.port, service, arguments.timeout)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve the Sudoku solver over TCP, one puzzle per line")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--max-in-flight", type=int, default=64)
+    parser.add_argument("--max-pending", type=int, default=1024)
+    parser.add_argument("--engine", default="backtracking")
+    parser.add_argument("--timeout", type=float, help="deadline in seconds for every puzzle")
+    arguments = parser.parse_args()
+
+    try:
+        asyncio.run(run_server(arguments))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,217 @@
+from collections import OrderedDict
+from typing import Dict, Hashable, List, Optional, Sequence, Tuple
+
+from board import Board
+from canonical import apply_transform, canonicalize, get_invariant_key, invert_transform
+from solver import Solver
+
+
+class SolutionCache:
+    """
+    Class used to cache solutions in front of Solver. Puzzles are looked up by their canonical form under the Sudoku
+    symmetry group, so repeats and puzzles differing only by relabelling, row and column swaps, band and stack swaps,
+    or transposition share one entry. Exact repeats are first looked up by their raw cell values, which skips the
+    canonicalization. Canonicalizing is costly, so a puzzle is only canonicalized once another puzzle sharing its
+    invariant key, see get_invariant_key, has been seen; until then it is kept as it is in pending. The least recently
+    used entry is evicted once the cache is full
+    """
+
+    def __init__(self, maxsize: int = 4096, engine: str = "backtracking") -> None:
+        """
+        Initialize the SolutionCache object
+        :param maxsize: Maximum number of canonical forms kept
+        :param engine: Search engine used on a cache miss
+        """
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        if engine not in Solver.SEARCH_ENGINES:
+            raise ValueError(f"engine must be one of: {', '.join(Solver.SEARCH_ENGINES)}")
+
+        self.maxsize = maxsize
+        self.engine = engine
+
+        # canonical puzzle -> canonical solution, or None if the puzzle has no solution
+        self.entries = OrderedDict()
+        # raw cell values of a puzzle as bytes -> its solution, or None if the puzzle has no solution
+        self.exact_entries = OrderedDict()
+        # invariant key -> raw cell values as bytes and solution of the one puzzle seen with that key, not canonicalized
+        self.pending = OrderedDict()
+        # invariant key -> number of canonical entries with that key
+        self.invariant_counts = {}
+
+        self.hits = 0
+        # Hits answered from exact_entries, also counted in hits
+        self.exact_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # Puzzles too symmetric to canonicalize quickly, solved without the cache
+        self.uncacheable = 0
+        # Misses answered without canonicalizing, as no puzzle with the same invariant key was cached
+        self.deferred = 0
+
+    def get_solution(self, board: Board) -> Optional[List[int]]:
+        """
+        Return a solution of the board, from the cache when an equivalent puzzle was solved before. The board is not
+        modified
+        :param board: Board to solve
+        :return: Flat list of 81 solution values, or None if the puzzle has no solution
+        """
+        values = board.get_cell_values()
+
+        # exact repeats are answered without canonicalizing, which costs more than the lookup itself
+        key = bytes(values)
+        if key in self.exact_entries:
+            self.hits += 1
+            self.exact_hits += 1
+            self.exact_entries.move_to_end(key)
+            solution = self.exact_entries[key]
+            return None if solution is None else list(solution)
+
+        # a puzzle can only be equivalent to a cached one with the same invariant key, which is far cheaper to compute
+        # than the canonical form, so the canonical form is only worked out once such a puzzle has been seen
+        invariant_key = get_invariant_key(values)
+        if invariant_key not in self.invariant_counts and invariant_key not in self.pending:
+            self.misses += 1
+            self.deferred += 1
+            solution = self._search(values)
+            packed_solution = None if solution is None else bytes(solution)
+            self._store(self.pending, invariant_key, (key, packed_solution))
+            self._store(self.exact_entries, key, packed_solution)
+            return solution
+
+        if invariant_key in self.pending:
+            pending_key, pending_solution = self.pending.pop(invariant_key)
+            self._store_canonical(invariant_key, list(pending_key),
+                                  None if pending_solution is None else list(pending_solution))
+
+        canonical_form = canonicalize(values)
+        if canonical_form is None:
+            self.uncacheable += 1
+            return self._search(values)
+
+        canonical_puzzle, transform = canonical_form
+
+        if canonical_puzzle in self.entries:
+            self.hits += 1
+            self.entries.move_to_end(canonical_puzzle)
+            canonical_solution = self.entries[canonical_puzzle]
+            solution = None if canonical_solution is None else invert_transform(canonical_solution, transform)
+        else:
+            self.misses += 1
+            solution = self._search(values)
+            canonical_solution = None if solution is None else apply_transform(solution, transform)
+            self._add_canonical_entry(invariant_key, canonical_puzzle, canonical_solution)
+
+        self._store(self.exact_entries, key, None if solution is None else bytes(solution))
+        return solution
+
+    def solve(self, board: Board) -> bool:
+        """
+        Solve the board in place
+        :param board: Board to solve
+        :return: True if the puzzle was solved, False otherwise
+        """
+        solution = self.get_solution(board)
+        if solution is None:
+            return False
+
+        board.set_cell_values(solution)
+        return True
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        Return the cache counters
+        :return: Size, puzzles not yet canonicalized, hits, hits on exact repeats, misses, misses answered without
+         canonicalizing, evictions, and uncacheable lookups
+        """
+        return {
+            "size": len(self.entries),
+            "pending": len(self.pending),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "exact_hits": self.exact_hits,
+            "misses": self.misses,
+            "deferred": self.deferred,
+            "evictions": self.evictions,
+            "uncacheable": self.uncacheable
+        }
+
+    def clear(self) -> None:
+        """
+        Remove every entry and reset the counters
+        :return: None
+        """
+        self.entries.clear()
+        self.exact_entries.clear()
+        self.pending.clear()
+        self.invariant_counts.clear()
+        self.hits = 0
+        self.exact_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.uncacheable = 0
+        self.deferred = 0
+
+    def _search(self, values: List[int]) -> Optional[List[int]]:
+        """
+        Helper function used to solve a puzzle with the search engine
+        :param values: Flat list of 81 cell values, 0 for blank
+        :return: Solution values, or None if the puzzle has no solution
+        """
+        solutions = Solver.SEARCH_ENGINES[self.engine](values).find_solutions(1)
+        return solutions[0] if solutions else None
+
+    def _store_canonical(self, invariant_key: Hashable, values: List[int], solution: Optional[List[int]]) -> None:
+        """
+        Helper function used to canonicalize a puzzle taken out of pending and add it to entries. Puzzles too symmetric
+        to canonicalize quickly are dropped
+        :param invariant_key: Invariant key of the puzzle
+        :param values: Flat list of 81 cell values, 0 for blank
+        :param solution: Solution values, or None if the puzzle has no solution
+        :return: None
+        """
+        canonical_form = canonicalize(values)
+        if canonical_form is None:
+            return
+
+        canonical_puzzle, transform = canonical_form
+        if canonical_puzzle not in self.entries:
+            self._add_canonical_entry(invariant_key, canonical_puzzle,
+                                      None if solution is None else apply_transform(solution, transform))
+
+    def _add_canonical_entry(self, invariant_key: Hashable, canonical_puzzle: Tuple[int, ...],
+                             canonical_solution: Optional[List[int]]) -> None:
+        """
+        Helper function used to add a new canonical entry, keeping invariant_counts in step with entries
+        :param invariant_key: Invariant key of the puzzle
+        :param canonical_puzzle: Canonical form of the puzzle, not already in entries
+        :param canonical_solution: Canonical solution, or None if the puzzle has no solution
+        :return: None
+        """
+        self.invariant_counts[invariant_key] = self.invariant_counts.get(invariant_key, 0) + 1
+
+        evicted_puzzle = self._store(self.entries, canonical_puzzle, canonical_solution)
+        if evicted_puzzle is not None:
+            # equivalent puzzles share their invariant key, so it can be worked out again from the canonical form
+            evicted_key = get_invariant_key(list(evicted_puzzle))
+            self.invariant_counts[evicted_key] -= 1
+            if not self.invariant_counts[evicted_key]:
+                del self.invariant_counts[evicted_key]
+
+    def _store(self, entries: OrderedDict, key: Hashable, value: Optional[Sequence]) -> Optional[Hashable]:
+        """
+        Helper function used to add an entry to entries, exact_entries, or pending, evicting the least recently used one
+        if it is full. Only evictions of canonical entries are counted
+        :param entries: Mapping the entry is added to
+        :param key: Canonical form of the puzzle, its raw cell values as bytes, or its invariant key
+        :param value: Solution in the same form as the key or None if the puzzle has no solution, or the pending puzzle
+        :return: Key of the evicted entry, or None if nothing was evicted
+        """
+        entries[key] = value
+        if len(entries) <= self.maxsize:
+            return None
+
+        evicted_key, _ = entries.popitem(last=False)
+        if entries is self.entries:
+            self.evictions += 1
+        return evicted_key
@@ -1,9 +1,51 @@
-import copy
-from typing import Dict, Set, List
-
-from tabulate import tabulate
+import os
+import time
+from array import array
+from typing import Dict, Iterator, Set, List, NamedTuple, Optional, Tuple
 
 from board import Board
+from budget import BudgetExceeded, SolveBudget
+from instrumentation import SolverStats, TraceHook, get_instrumented_class
+from rendering import render_duplicates
+from search import BacktrackingSearch, DancingLinksSearch, count_subtree, init_count_worker
+from techniques import TechniqueEngine
+from triage import DifficultyRating, DifficultyRouter, Route, rate_candidates
+
+
+class SolveResult(NamedTuple):
+    """
+    Outcome of Solver.solve. Renderers in the rendering module turn it into text. A result is truthy when solved
+    """
+    # Flat list of cell values after the solve, 0 for blank
+    values: List[int]
+    box_size: int
+    # "solved", "unsolved", or "incomplete" when a limit of the solve budget was reached first
+    status: str
+    # Engine that finished the solve. For "auto", the last engine of the route
+    engine: str
+    # Rounds for "singles", placements plus search nodes for "techniques", search nodes otherwise. For "auto", the
+    # work of every engine of the route added together
+    work: int
+    # Seconds spent solving
+    time: float
+    # Seconds spent in every phase, only filled in when the solver is instrumented
+    phase_times: Dict[str, float]
+    # Placements made by every technique, only filled in by the "techniques" engine
+    technique_counts: Dict[str, int]
+    hardest_technique: Optional[str]
+    # Tier the puzzle was routed to, only filled in by the "auto" engine
+    difficulty: Optional[str] = None
+    # Limit of the solve budget that stopped an incomplete solve: "time", "rounds", or "nodes"
+    limit_reached: Optional[str] = None
+    # Remaining candidate mask of every cell of an incomplete solve, 0 for filled cells
+    candidates: Optional[List[int]] = None
+
+    @property
+    def solved(self) -> bool:
+        return self.status == "solved"
+
+    def __bool__(self) -> bool:
+        return self.solved
 
 
 class Solver:
@@ -13,47 +55,390 @@ class Solver:
 
     DuplicateDataStructure = Dict[str, Dict[int, Set]]
 
-    def __init__(self, board: Board) -> None:
+    # Complete search engines selectable by name. "singles" only repeats naked singles and uses no search engine.
+    # "techniques" applies human-style deduction rules and only searches once they stall. "auto" rates the difficulty
+    # of the puzzle first and routes it to the cheapest engine likely to solve it
+    SEARCH_ENGINES = {
+        "backtracking": BacktrackingSearch,
+        "dlx": DancingLinksSearch
+    }
+    ENGINES = ("singles", "techniques", *SEARCH_ENGINES, "auto")
+
+    # Methods counted and timed when the solver is instrumented
+    INSTRUMENTED_PHASES = ("generate_candidates", "generate_candidate", "implement_candidates", "check_solve",
+                           "find_duplicates")
+
+    # Subtrees handed to each worker process when counting solutions in parallel, so uneven subtrees still keep
+    # every worker busy
+    SUBTREES_PER_WORKER = 4
+
+    # Instances hold no __dict__, which keeps thousands of solvers in one process small. Instrumented solvers switch
+    # to a subclass with timed methods instead of replacing methods on the instance
+    __slots__ = ("board_object", "engine", "board_array", "blank_character", "layout", "valid_sudoku_options",
+                 "scratch_space", "technique_report", "router", "route", "budget", "limit_reached", "stats",
+                 "trace_hook")
+
+    def __init__(self, board: Board, engine: str = "singles", stats: Optional[SolverStats] = None,
+                 trace_hook: Optional[TraceHook] = None, router: Optional[DifficultyRouter] = None,
+                 budget: Optional[SolveBudget] = None) -> None:
         """
         Initialize the Solver object with a given board
         :param board: Board to solve
+        :param engine: Solving engine to use: "singles", "techniques", "backtracking", "dlx", or "auto"
+        :param stats: Collects counters and phase timings when given. Optional
+        :param trace_hook: Called with phase, round, and solve events when given. Optional
+        :param router: Chooses the engines and collects routing stats for the "auto" engine. Share one router between
+         solvers to collect stats over many puzzles. Defaults to a new router with the default thresholds
+        :param budget: Limits on the time, rounds, and search nodes of every solve. A solve that reaches one stops
+         and returns an incomplete result instead of running on. Optional
         """
+        if engine not in self.ENGINES:
+            raise ValueError(f"engine must be one of: {', '.join(self.ENGINES)}")
+
         self.board_object = board
+        self.engine = engine
         self.board_array = self.board_object.get_board()
 
         # Character used in the 2D board array to represent a blank cell
         self.blank_character = "-"
-        self.valid_sudoku_options = ["1", "2", "3", "4", "5", "6", "7", "8", "9"]
+        self.layout = self.board_object.layout
+        self.valid_sudoku_options = self.layout.symbols
+
+        # Scratch space holding the candidate mask of every cell in row-major order, 0 for cells without candidates
+        self.scratch_space = None
+        self.reset_scratch_space()
+
+        # Report of the last run of the "techniques" engine
+        self.technique_report = None
+
+        # Route taken by the last run of the "auto" engine
+        self.router = router if router is not None or engine != "auto" else DifficultyRouter()
+        self.route = None
+
+        # Limit of the budget reached by the last solve, None if it finished within the budget
+        self.budget = budget
+        self.limit_reached = None
+
+        # Instrumentation is off unless a stats object or trace hook is given, in which case this instance switches to
+        # a subclass whose instrumented phases are timed. Uninstrumented solvers pay no per-call cost
+        self.stats = stats
+        self.trace_hook = trace_hook
+        if stats is not None or trace_hook is not None:
+            self.__class__ = get_instrumented_class(type(self), self.INSTRUMENTED_PHASES)
+
+    def solve(self) -> SolveResult:
+        """
+        Solve the puzzle in place without printing anything. Pass the result to a renderer to display it
+        :return: Grid, status, work, and timings of the solve
+        """
+        start = time.perf_counter()
+        is_solved, work = self.solve_board()
+        seconds = time.perf_counter() - start
+
+        engine = self.engine
+        difficulty = None
+        if engine == "auto":
+            difficulty = self.route.tier
+            engine = self.route.engines[-1] if self.route.engines else engine
+
+        status = "solved" if is_solved else "unsolved"
+        candidates = None
+        if self.limit_reached is not None:
+            status = "incomplete"
+            candidates = self._get_remaining_candidates()
+
+        report = self.technique_report if engine == "techniques" else None
+        return SolveResult(
+            values=self.board_object.get_cell_values(),
+            box_size=self.board_object.box_size,
+            status=status,
+            engine=engine,
+            work=work,
+            time=seconds,
+            phase_times=dict(self.stats.phase_times) if self.stats is not None else {},
+            technique_counts=dict(report.technique_counts) if report is not None else {},
+            hardest_technique=report.hardest_technique if report is not None else None,
+            difficulty=difficulty,
+            limit_reached=self.limit_reached,
+            candidates=candidates
+        )
+
+    def _get_remaining_candidates(self) -> List[int]:
+        """
+        Helper function used to collect the candidates left by an incomplete solve. The eliminations of the technique
+        engine are kept when it was the engine stopped, otherwise the candidates are generated from the board
+        :return: Candidate mask of every cell, 0 for filled cells
+        """
+        report = self.technique_report
+        if report is not None and report.limit_reached is not None:
+            return list(report.candidates)
+
+        self.reset_scratch_space()
+        self.generate_candidates()
+        return self.get_candidate_masks()
+
+    def solve_board(self) -> Tuple[bool, int]:
+        """
+        Solve the puzzle in place with the selected engine, without printing anything
+        :return: Whether the puzzle was solved and the work taken: rounds for "singles", placements plus search nodes
+         for "techniques", the work of every engine of the route for "auto", search nodes otherwise. If a limit of the
+         budget is reached first, the puzzle is left unsolved, limit_reached is set, and the work done so far is
+         returned
+        """
+        self.limit_reached = None
+        self.technique_report = None
+        if self.budget is not None:
+            self.budget.start()
+
+        if self.engine == "auto":
+            is_solved, work = self.solve_with_triage()
+        else:
+            is_solved, work = self._solve_with_engine(self.engine)
 
-        # Create scratch space for possible guesses
-        self.scratch_space = {}
+        if is_solved:
+            self.limit_reached = None
 
-    def solve(self) -> None:
+        if self.stats is not None:
+            self.stats.solves += 1
+        if self.trace_hook is not None:
+            self.trace_hook("solve", {"engine": self.engine, "solved": is_solved, "work": work,
+                                      "limit_reached": self.limit_reached})
+
+        return is_solved, work
+
+    def _solve_with_engine(self, engine: str) -> Tuple[bool, int]:
+        """
+        Helper function used to solve the puzzle in place with one engine other than "auto"
+        :param engine: Name of the engine
+        :return: Whether the puzzle was solved and the work taken
         """
-        Solve the puzzle and print puzzle if solved
-        :return: None
+        if engine == "singles":
+            return self.solve_with_singles()
+        if engine == "techniques":
+            return self.solve_with_techniques()
+        return self.solve_with_search(engine)
+
+    def rate_difficulty(self) -> DifficultyRating:
+        """
+        Rate the difficulty of the current board from its clues and one round of candidate generation, leaving the
+        candidates in the scratch space
+        :return: Difficulty rating of the board
+        """
+        self.reset_scratch_space()
+        self.generate_candidates()
+
+        return rate_candidates(self.board_object.get_cell_values(), self.scratch_space, self.layout)
+
+    def solve_with_triage(self) -> Tuple[bool, int]:
+        """
+        Solve the puzzle in place with the cheapest engine likely to solve it. The puzzle is rated first and the
+        router picks a route of engines, each one continuing from the board the previous one left when it stalls.
+        The route taken is kept in route, and recorded in the routing stats of the router
+        :return: Whether the puzzle was solved and the work of every engine run added together
+        """
+        start = time.perf_counter()
+        rating = self.rate_difficulty()
+        rating_seconds = time.perf_counter() - start
+
+        route = self.router.route(rating)
+        is_solved = False
+        work = 0
+        engines_used = []
+        for engine in route.engines:
+            engines_used.append(engine)
+            is_solved, engine_work = self._solve_with_engine(engine)
+            work += engine_work
+            if is_solved or self.limit_reached is not None:
+                break
+
+        self.route = Route(rating, route.tier, tuple(engines_used))
+        self.router.stats.record(route.tier, engines_used, is_solved, rating_seconds, time.perf_counter() - start)
+
+        return is_solved, work
+
+    def solve_with_search(self, engine: str) -> Tuple[bool, int]:
+        """
+        Solve the puzzle in place with a complete search engine
+        :param engine: Name of the search engine, a key of SEARCH_ENGINES
+        :return: Whether the puzzle was solved and the number of search nodes
+        """
+        start = time.perf_counter()
+        search = self.SEARCH_ENGINES[engine](self.board_object.get_cell_values(), self.board_object.box_size,
+                                             self.budget)
+        try:
+            solutions = search.find_solutions(1)
+        except BudgetExceeded as error:
+            self.limit_reached = error.limit
+            solutions = []
+        if solutions:
+            self.board_object.set_cell_values(solutions[0])
+        seconds = time.perf_counter() - start
+
+        if self.stats is not None:
+            self.stats.record_phase("search", seconds)
+            self.stats.search_nodes += search.nodes
+        if self.trace_hook is not None:
+            self.trace_hook("phase", {"name": "search", "seconds": seconds})
+
+        return len(solutions) > 0, search.nodes
+
+    def solve_with_techniques(self) -> Tuple[bool, int]:
+        """
+        Solve the puzzle in place with the deduction rules of the technique engine, keeping the candidates from the
+        scratch space across rounds. If the rules stall, the rest of the puzzle is finished by backtracking search.
+        The report of the run, with the technique behind every placement, is kept in technique_report
+        :return: Whether the puzzle was solved and the number of placements plus search nodes
+        """
+        self.reset_scratch_space()
+        self.generate_candidates()
+
+        self.technique_report = TechniqueEngine().run(self.board_object.get_cell_values(),
+                                                      self.get_candidate_masks(), self.board_object.box_size,
+                                                      self.budget)
+        self.reset_scratch_space()
+
+        for placement in self.technique_report.placements:
+            self.board_object.insert_number_into_board(placement.row, placement.column, str(placement.digit))
+
+        work = len(self.technique_report.placements)
+        if self.technique_report.solved:
+            return self.check_solve(), work
+        if self.technique_report.contradiction:
+            return False, work
+        if self.technique_report.limit_reached is not None:
+            self.limit_reached = self.technique_report.limit_reached
+            return False, work
+
+        is_solved, nodes = self.solve_with_search("backtracking")
+        return is_solved, work + nodes
+
+    def get_candidate_masks(self) -> List[int]:
+        """
+        Copy the scratch space into a flat list of candidate masks, one per cell, 0 for cells without candidates
+        :return: Candidate mask of every cell
         """
-        is_solved = self.check_solve()
+        return list(self.scratch_space)
+
+    def solve_with_singles(self) -> Tuple[bool, int]:
+        """
+        Place naked singles until the puzzle is solved or no more progress can be made. After the first round, only
+        the blank peers of the cells filled in the previous round are re-examined, and the loop stops as soon as a
+        round places nothing
+        :return: Whether the puzzle was solved and the number of rounds taken
+        """
+        # the cells are read from a flat copy of the board kept up to date with every placement, so the hot loop
+        # indexes a list whatever the board class stores
+        values = self.board_object.get_cell_values()
+
+        size = self.layout.size
+        peers = self.layout.peers
+        mask_to_digits = self.layout.mask_to_digits
+
+        cells_to_check = [cell for cell, value in enumerate(values) if not value]
         count = 0
 
-        while not is_solved:
-            if count > 10000:
-                print("Could not find solution")
-                exit(1)
+        while cells_to_check:
+            if self.budget is not None:
+                try:
+                    self.budget.add_round()
+                except BudgetExceeded as error:
+                    self.limit_reached = error.limit
+                    break
+
+            examined = len(cells_to_check)
+            placed = 0
+            placements = []
+            for cell in cells_to_check:
+                if values[cell]:
+                    continue
+
+                row_index, column_index = divmod(cell, size)
+                candidate_mask = self.board_object.get_candidate_mask(row_index, column_index)
+                if candidate_mask and not candidate_mask & (candidate_mask - 1):
+                    placements.append((cell, candidate_mask))
 
-            self.generate_candidates()
-            self.implement_candidates()
-            self.reset_scratch_space()
+            cells_to_check = set()
+            for cell, candidate_mask in placements:
+                row_index, column_index = divmod(cell, size)
 
-            is_solved = self.check_solve()
+                # an earlier placement in this round may have used the same digit in a shared unit
+                if not self.board_object.get_candidate_mask(row_index, column_index) & candidate_mask:
+                    continue
 
-            count += 1
+                self.board_object.insert_number_into_board(row_index, column_index, mask_to_digits[candidate_mask][0])
+                values[cell] = candidate_mask.bit_length()
+                cells_to_check.update(peers[cell])
+                placed += 1
 
-        self.board_object.print_board()
-        print()
-        print("SOLVED")
-        print(f"Took {count} rounds")
+            if placed:
+                count += 1
+
+            if self.stats is not None:
+                self.stats.record_round(examined, placed)
+            if self.trace_hook is not None:
+                self.trace_hook("round", {"round": count, "examined": examined, "placed": placed})
+
+        return self.check_solve(), count
+
+    def find_solutions(self, limit: int = 1) -> List[List[int]]:
+        """
+        Run a complete search over the current board without modifying it. Uses backtracking unless the solver engine
+        is a search engine
+        :param limit: Maximum number of solutions to return. Use 2 to check whether the puzzle is unique
+        :return: Solutions found, each a flat list of integers in row-major order
+        """
+        engine = self.engine if self.engine in self.SEARCH_ENGINES else "backtracking"
+        search = self.SEARCH_ENGINES[engine](self.board_object.get_cell_values(), self.board_object.box_size)
+
+        return search.find_solutions(limit)
+
+    def iter_solutions(self) -> Iterator[List[int]]:
+        """
+        Lazily enumerate the solutions of the current board without modifying it. Each solution is only searched for
+        when requested, so callers can stop at any point
+        :return: Solutions in search order, each a flat list of cell values
+        """
+        return BacktrackingSearch(self.board_object.get_cell_values(), self.board_object.box_size).iter_solutions()
+
+    def count_solutions(self, limit: Optional[int] = None, workers: Optional[int] = 1) -> int:
+        """
+        Count the solutions of the current board without modifying it, stopping once the limit is reached. With
+        several workers, the search tree is split at the top branching cells into a few subtrees per worker, which are
+        counted in parallel worker processes. Once the limit is reached, subtrees not yet started are cancelled and the
+        ones running are told to stop through a shared event, so every worker has exited when the count is returned
+        :param limit: Number of solutions to stop at, e.g. 2 to tell 0, 1, or many solutions apart. Counts every
+         solution if None
+        :param workers: Number of worker processes. Defaults to the CPU count if None. With 1 the search runs in this
+         process
+        :return: Number of solutions found, at most the limit
+        """
+        search = BacktrackingSearch(self.board_object.get_cell_values(), self.board_object.box_size)
+        if workers is None:
+            workers = os.cpu_count() or 1
+        if workers == 1:
+            return search.count_solutions(limit)
 
+        # imported here so solving a single puzzle does not pay for loading the process pool machinery
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor, as_completed
+
+        subtrees = search.split_subtrees(workers * self.SUBTREES_PER_WORKER)
+        count = 0
+        stop_event = multiprocessing.Event()
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=init_count_worker, initargs=(stop_event,))
+        try:
+            futures = [executor.submit(count_subtree, subtree, self.board_object.box_size, limit)
+                       for subtree in subtrees]
+            for future in as_completed(futures):
+                count += future.result()
+                if limit is not None and count >= limit:
+                    return limit
+        finally:
+            # the running subtrees check the event every few nodes, so waiting for them to exit is short
+            stop_event.set()
+            executor.shutdown(wait=True, cancel_futures=True)
+
+        return count
 
     def check_solve(self) -> bool:
         """
@@ -63,15 +448,15 @@ class Solver:
             - All rows, boxes, and columns contain every number in self.valid_sudoku_options
         :return: True if puzzle is solved, False otherwise
         """
-        duplicates = self.find_duplicates()
-        found_duplicates = self.check_duplicates(duplicates)
-        found_blank_cells = self.find_blank_cells()
-
-        if not found_duplicates and not found_blank_cells:
-            return True
-        else:
+        # a filled unit without duplicates holds every number, so counting the distinct values of each unit in the
+        # flat cell values is enough
+        values = self.board_object.get_cell_values()
+        if 0 in values:
             return False
 
+        size = self.layout.size
+        return all(len({values[cell] for cell in unit}) == size for unit in self.layout.units)
+
     @staticmethod
     def check_duplicates(duplicates: DuplicateDataStructure) -> bool:
         """
@@ -107,7 +492,7 @@ class Solver:
             "columns": {}
         }
 
-        for element_number in range(0,8+1):
+        for element_number in range(self.layout.size):
             box_duplicates = self.find_box_duplicates(element_number)
             row_duplicates = self.find_row_duplicates(element_number)
             column_duplicates = self.find_column_duplicates(element_number)
@@ -161,10 +546,13 @@ class Solver:
         :return: Duplicates found
         """
         duplicates = set()
+        seen = set()
 
         for element in input_list:
-            if element != self.blank_character and input_list.count(element) > 1:
+            if element in seen:
                 duplicates.add(element)
+            elif element != self.blank_character:
+                seen.add(element)
 
         return duplicates
 
@@ -177,13 +565,12 @@ class Solver:
         :param guess: Candidate for the cell coordinates given
         :return: None
         """
-        if row > 8 or column > 8 or int(guess) > 9:
-            print("The following are invalid options: row > 8, column > 8, guess > 9")
-            exit(1)
-
+        size = self.layout.size
+        if row > size - 1 or column > size - 1 or int(guess) > size:
+            raise ValueError(f"The following are invalid options: row > {size - 1}, column > {size - 1}, "
+                             f"guess > {size}")
 
-        self.initialize_scratch_space(row, column)
-        self.scratch_space[row][column].add(guess)
+        self.scratch_space[row * size + column] |= self.layout.digit_to_bit[str(guess)]
 
     def store_guesses_in_scratch_space(self, row_index: int, column_index: int, guesses: List) -> None:
         """
@@ -196,19 +583,6 @@ class Solver:
         for guess in guesses:
             self.store_guess_in_scratch_space(row_index, column_index, guess)
 
-    def initialize_scratch_space(self, row: int, column: int) -> None:
-        """
-        Initialize the scratch space with the relevant data structures if they are not already present
-        :param row: Row to initialize scratch space with
-        :param column: Column to initialize scratch space with
-        :return: None
-        """
-        if row not in self.scratch_space.keys():
-            self.scratch_space[row] = {}
-
-        if column not in self.scratch_space[row]:
-            self.scratch_space[row][column] = set()
-
     def remove_guess_from_scratch_space(self, row_index: int, column_index: int, candidate: str) -> None:
         """
         Remove guess from scratch space
@@ -217,19 +591,16 @@ class Solver:
         :param candidate: Candidate to remove at the given cell coordinates
         :return: None
         """
-        candidates = self.scratch_space[row_index][column_index]
-
-        if len(candidates) == 1:
-            self.scratch_space[row_index].pop(column_index)
-        if len(candidates) > 1:
-            self.scratch_space[row_index][column_index].remove(candidate)
+        self.scratch_space[row_index * self.layout.size + column_index] &= ~self.layout.digit_to_bit[str(candidate)]
 
     def reset_scratch_space(self) -> None:
         """
-        Reset the scratch space class variable by overwriting it with an empty dictionary
+        Reset the scratch space class variable by clearing the candidates of every cell. Masks are stored in an array
+        of 2-byte integers, or 8-byte integers for boards larger than 16x16
         :return: None
         """
-        self.scratch_space = {}
+        typecode = "H" if self.layout.size <= 16 else "Q"
+        self.scratch_space = array(typecode, bytes(array(typecode).itemsize * self.layout.cell_count))
 
     def get_guess_options_from_scratch_space(self, row: int, column: int) -> Set:
         """
@@ -238,7 +609,7 @@ class Solver:
         :param column: Column related to the stored cell candidates
         :return: Candidates
         """
-        return self.scratch_space[row][column]
+        return set(self.layout.mask_to_digits[self.scratch_space[row * self.layout.size + column]])
 
     def implement_candidates(self) -> None:
         """
@@ -246,28 +617,38 @@ class Solver:
         given cell exists
         :return: None
         """
-        scratch_space_copy = copy.deepcopy(self.scratch_space)
-        for row_index in scratch_space_copy.keys():
-            for column_index in scratch_space_copy[row_index]:
-                candidates = scratch_space_copy[row_index][column_index]
-                if len(candidates) == 1:
-                    candidate = str(list(candidates)[0])
-                    self.board_object.insert_number_into_board(row_index, column_index, candidate)
-                    self.remove_guess_from_scratch_space(row_index, column_index, candidate)
+        scratch_space = self.scratch_space
+        for cell, candidate_mask in enumerate(scratch_space):
+            if candidate_mask and not candidate_mask & (candidate_mask - 1):
+                row_index, column_index = divmod(cell, self.layout.size)
+                self.board_object.insert_number_into_board(row_index, column_index,
+                                                           self.layout.mask_to_digits[candidate_mask][0])
+                scratch_space[cell] = 0
 
     def generate_candidates(self) -> None:
         """
-        Loop through every cell of the board and generate all valid candidates for each
+        Loop through every cell of the board and store the mask of all valid candidates for each blank cell
         :return: None
         """
-        board = self.board_array
-        for row_index in range(len(board)):
-            for column_index in range(len(board[row_index])):
-                cell_value = board[row_index][column_index]
-
-                if cell_value == self.blank_character:
-                    guesses = self.generate_candidate(row_index, column_index)
-                    self.store_guesses_in_scratch_space(row_index, column_index, guesses)
+        board_object = self.board_object
+        row_masks = board_object.row_masks
+        column_masks = board_object.column_masks
+        box_masks = board_object.box_masks
+        row_of_cell = self.layout.row_of_cell
+        column_of_cell = self.layout.column_of_cell
+        box_of_cell = self.layout.box_of_cell
+        full_mask = self.layout.full_mask
+
+        scratch_space = self.scratch_space
+        examined = 0
+        for cell, value in enumerate(board_object.get_cell_values()):
+            if not value:
+                scratch_space[cell] = ~(row_masks[row_of_cell[cell]] | column_masks[column_of_cell[cell]]
+                                        | box_masks[box_of_cell[cell]]) & full_mask
+                examined += 1
+
+        if self.stats is not None:
+            self.stats.cells_examined += examined
 
     def generate_candidate(self, row_index: int, column_index: int) -> List:
         """
@@ -276,24 +657,9 @@ class Solver:
         :param column_index: Column of the cell to generate candidates for
         :return: List of valid candidates for the given cell
         """
-        # get row options
-        row = self.board_array[row_index]
-        row_guesses = self.find_sudoku_diff(row)
-        row_guesses.sort()
-
-        # get column options
-        column = self.board_object.get_board_columns(column_index)
-        column_guesses = self.find_sudoku_diff(column)
-        column_guesses.sort()
-
-        # get box guesses
-        box = self.board_object.extract_box_from_cell_coordinates(row_index, column_index)
-        box = self.board_object.flatten_box(box)
-        box_guesses = self.find_sudoku_diff(box)
-        box_guesses.sort()
-
-        return list(set(row_guesses) & set(column_guesses) & set(box_guesses))
+        candidate_mask = self.board_object.get_candidate_mask(row_index, column_index)
 
+        return list(self.layout.mask_to_digits[candidate_mask])
 
     def find_sudoku_diff(self, input_list: List) -> List:
         """
@@ -310,23 +676,4 @@ class Solver:
         :param duplicates: Duplicates found for boxes, rows, and columns
         :return: None
         """
-        for element in ["Boxes", "Rows", "Columns"]:
-            print(f"Duplicates in {element}:")
-            element_duplicates = []
-            element_key_name = element.lower()
-            for element_number in duplicates[element_key_name]:
-                individual_element_duplicates = (str(duplicates[element_key_name][element_number])
-                                                 .replace("\'", "")
-                                                 .replace("{", "")
-                                                 .replace("}", ""))
-                element_number_duplicates = [element_number, individual_element_duplicates]
-                element_duplicates.append(element_number_duplicates)
-
-            plural_to_singular_lookup = {
-                "Boxes": "Box",
-                "Rows": "Row",
-                "Columns": "Column"
-            }
-
-            element_header = f"{plural_to_singular_lookup[element]} Number"
-            print(tabulate(element_duplicates, headers=[element_header, "Duplicates Found"], tablefmt="pretty"))
+        print(render_duplicates(duplicates))
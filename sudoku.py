@@ -1,7 +1,16 @@
-import json
+import argparse
+import os
+import sys
+from typing import Iterator, List, Optional, Tuple
 
-from Board import Board
-from Solver import Solver
+from board import Board
+from rendering import RENDERERS, render, render_duplicates
+from budget import SolveBudget
+from solver import Solver
+from triage import DEFAULT_EASY_MAX_SCORE, DEFAULT_MEDIUM_MAX_SCORE, DifficultyRouter
+
+# Modules only needed by some subcommands (corpus, benchmark) are imported by the subcommands that use them, so a
+# short-lived "solve" process only pays for the solver itself
 
 
 def test_adding_and_removing_from_board():
@@ -11,7 +20,7 @@ def test_adding_and_removing_from_board():
     print()
 
     print("Adding 5")
-    board.insert_number_into_board(1, 0, 5)
+    board.insert_number_into_board(1, 0, "5")
     board.print_board()
     print()
 
@@ -137,7 +146,8 @@ def test_check_solve():
     board = Board("puzzles/puzzle1-beginner.txt")
     solver = Solver(board)
 
-    solver.solve()
+    result = solver.solve()
+    print(render(result))
 
 
 def test_get_board_column():
@@ -154,27 +164,132 @@ def test_get_board_column():
     print(f"Columns: {columns}")
 
 
-def main():
-    # test_adding_and_removing_from_board(board)
-    # test_for_duplicates_in_board()
-    # test_for_solved_board()
-    # test_scratch_space()
-    # test_sudoku_diff()
-    # test_get_board_row_and_column()
-    # test_generate_guesses()
-    # test_get_box_number()
-    # test_get_box_from_number()
-    # test_get_box_from_coordinates()
-    # test_implement_candidates()
-    # test_remove_candidate()
-    test_check_solve()
-
-    # test_get_board_column()
-
-    # board = Board("puzzles/puzzle1-beginner.txt")
-    # solver = Solver(board)
-    # solver.populate_guesses()
+def iter_input_boards(puzzles: List[str], corpus_file_path: Optional[str],
+                      box_size: int) -> Iterator[Tuple[str, Board]]:
+    """
+    Load the boards named on the command line, followed by the puzzles of a corpus file
+    :param puzzles: Board file paths or one-line puzzles
+    :param corpus_file_path: Path to a corpus holding one one-line puzzle per line. Optional
+    :param box_size: Number of rows and columns in a box
+    :return: Pairs of a name for the board and the board
+    """
+    for puzzle in puzzles:
+        if os.path.exists(puzzle):
+            yield puzzle, Board(puzzle, box_size)
+        else:
+            yield puzzle, Board.from_string(puzzle, box_size)
+
+    if corpus_file_path:
+        from corpus import CorpusReader
+
+        for line_number, values in CorpusReader(corpus_file_path).iter_values():
+            board = Board(box_size=box_size)
+            board.load_cell_values(values)
+            yield f"{corpus_file_path}:{line_number}", board
+
+
+def run_solve(arguments: argparse.Namespace) -> int:
+    """
+    Solve every input board and write the rendered results to stdout
+    :param arguments: Parsed command line arguments
+    :return: Exit status, 1 if any board was not solved
+    """
+    router = DifficultyRouter(arguments.easy_max_score, arguments.medium_max_score)
+    budget = None
+    if arguments.max_seconds is not None or arguments.max_rounds is not None or arguments.max_nodes is not None:
+        budget = SolveBudget(arguments.max_seconds, arguments.max_rounds, arguments.max_nodes)
+
+    exit_status = 0
+    for _, board in iter_input_boards(arguments.puzzles, arguments.corpus, arguments.box_size):
+        result = Solver(board, arguments.engine, router=router, budget=budget).solve()
+        sys.stdout.write(render(result, arguments.format) + "\n")
+        if not result:
+            exit_status = 1
+
+    if arguments.routing_stats:
+        sys.stderr.write("\n".join(router.stats.summarize()) + "\n")
+
+    return exit_status
+
+
+def run_validate(arguments: argparse.Namespace) -> int:
+    """
+    Check every input board for duplicate digits and report the ones found
+    :param arguments: Parsed command line arguments
+    :return: Exit status, 1 if any board has duplicates
+    """
+    exit_status = 0
+    for name, board in iter_input_boards(arguments.puzzles, arguments.corpus, arguments.box_size):
+        duplicates = Solver(board).find_duplicates()
+        if Solver.check_duplicates(duplicates):
+            sys.stdout.write(f"{name}: duplicates found\n{render_duplicates(duplicates)}\n")
+            exit_status = 1
+        elif not arguments.quiet:
+            sys.stdout.write(f"{name}: valid\n")
+
+    return exit_status
+
+
+def run_bench(arguments: argparse.Namespace) -> int:
+    """
+    Run the benchmark with the remaining command line arguments
+    :param arguments: Parsed command line arguments
+    :return: Exit status of the benchmark
+    """
+    import benchmark
+
+    return benchmark.main(arguments.benchmark_arguments)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Solve and validate Sudoku puzzles")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    for command, help_text in (("solve", "solve puzzles and print the results"),
+                               ("validate", "check puzzles for duplicate digits")):
+        subparser = subparsers.add_parser(command, help=help_text)
+        subparser.add_argument("puzzles", nargs="*", help="board files or one-line puzzles")
+        subparser.add_argument("--corpus", help="file holding one one-line puzzle per line")
+        subparser.add_argument("--box-size", type=int, default=3, help="3 for 9x9 boards, 4 for 16x16, ...")
+
+    solve_parser = subparsers.choices["solve"]
+    solve_parser.add_argument("--engine", choices=Solver.ENGINES, default="dlx")
+    solve_parser.add_argument("--format", choices=RENDERERS, default="ascii")
+    solve_parser.add_argument("--easy-max-score", type=float, default=DEFAULT_EASY_MAX_SCORE,
+                              help="highest difficulty score the auto engine solves with naked singles")
+    solve_parser.add_argument("--medium-max-score", type=float, default=DEFAULT_MEDIUM_MAX_SCORE,
+                              help="highest difficulty score the auto engine solves with techniques before search")
+    solve_parser.add_argument("--routing-stats", action="store_true",
+                              help="print how the auto engine routed the puzzles to stderr")
+    solve_parser.add_argument("--max-seconds", type=float, help="time allowed for each puzzle")
+    solve_parser.add_argument("--max-rounds", type=int, help="propagation rounds allowed for each puzzle")
+    solve_parser.add_argument("--max-nodes", type=int, help="search nodes allowed for each puzzle")
+    solve_parser.set_defaults(run=run_solve)
+
+    validate_parser = subparsers.choices["validate"]
+    validate_parser.add_argument("--quiet", action="store_true", help="only report boards with duplicates")
+    validate_parser.set_defaults(run=run_validate)
+
+    # every argument after "bench" is passed on to the benchmark
+    bench_parser = subparsers.add_parser("bench", help="run the benchmark, see benchmark.py --help", add_help=False)
+    bench_parser.set_defaults(run=run_bench)
+
+    arguments, benchmark_arguments = parser.parse_known_args(argv)
+    if arguments.command == "bench":
+        arguments.benchmark_arguments = benchmark_arguments
+    elif benchmark_arguments:
+        parser.error(f"unrecognized arguments: {' '.join(benchmark_arguments)}")
+
+    # corpus files and one-line output only hold boards up to 9x9, so these are rejected before any board is solved
+    if arguments.command != "bench" and arguments.corpus and arguments.box_size != 3:
+        parser.error("--corpus only holds 9x9 puzzles and cannot be used with a --box-size other than 3")
+    if arguments.command == "solve" and arguments.format == "line" and arguments.box_size > 3:
+        parser.error("--format line is only supported up to 9x9 boards, i.e. a --box-size of at most 3")
+    try:
+        return arguments.run(arguments)
+    except ValueError as error:
+        parser.error(str(error))
 
 
 if __name__ == '__main__':
-    main()
+    sys.exit(main())
@@ -0,0 +1,373 @@
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+from budget import BudgetExceeded, SolveBudget
+from layout import LAYOUT, Layout, get_layout
+
+
+def compute_candidates(values: List[int], box_size: int = 3) -> List[int]:
+    """
+    Compute the candidate mask of every blank cell from the digits already placed in its peers
+    :param values: Flat list of cell values, 0 for blank
+    :param box_size: Number of rows and columns in a box
+    :return: Candidate mask of every cell, 0 for filled cells
+    """
+    layout = get_layout(box_size)
+    candidates = [0] * layout.cell_count
+    for cell in range(layout.cell_count):
+        if values[cell]:
+            continue
+
+        used = 0
+        for peer in layout.peers[cell]:
+            if values[peer]:
+                used |= 1 << (values[peer] - 1)
+        candidates[cell] = ~used & layout.full_mask
+
+    return candidates
+
+
+class Placement(NamedTuple):
+    """
+    A digit placed by the technique engine
+    """
+    row: int
+    column: int
+    digit: int
+    technique: str
+
+
+class CandidateGrid:
+    """
+    Class used to hold the cell values and candidate masks the deduction rules work on. Candidates are kept across
+    rounds and only shrink as digits are placed and rules eliminate them
+    """
+
+    def __init__(self, values: List[int], candidates: List[int], layout: Layout = LAYOUT) -> None:
+        """
+        Initialize the CandidateGrid object
+        :param values: Flat list of cell values, 0 for blank
+        :param candidates: Candidate mask of every cell, 0 for filled cells
+        :param layout: Layout of the board size
+        """
+        self.layout = layout
+        self.values = list(values)
+        self.candidates = list(candidates)
+        self.placements = []
+
+        # Number of placements and eliminations made by each technique
+        self.technique_counts = {}
+
+        # Set when a blank cell runs out of candidates or a digit has no place left in a unit
+        self.contradiction = False
+
+    def place(self, cell: int, bit: int, technique: str) -> None:
+        """
+        Place a digit and remove it from the candidates of every peer
+        :param cell: Index of the cell
+        :param bit: Mask bit of the digit
+        :param technique: Name of the technique placing the digit
+        :return: None
+        """
+        digit = bit.bit_length()
+        self.values[cell] = digit
+        self.candidates[cell] = 0
+        self.placements.append(Placement(self.layout.row_of_cell[cell], self.layout.column_of_cell[cell], digit,
+                                         technique))
+        self.technique_counts[technique] = self.technique_counts.get(technique, 0) + 1
+
+        candidates = self.candidates
+        for peer in self.layout.peers[cell]:
+            if candidates[peer] & bit:
+                candidates[peer] &= ~bit
+                if not candidates[peer] and not self.values[peer]:
+                    self.contradiction = True
+
+    def eliminate(self, cells: Sequence[int], mask: int, technique: str) -> bool:
+        """
+        Remove candidates from the given cells
+        :param cells: Indices of the cells
+        :param mask: Candidates to remove
+        :param technique: Name of the technique making the elimination
+        :return: True if any candidate was removed
+        """
+        candidates = self.candidates
+        progress = False
+
+        for cell in cells:
+            if candidates[cell] & mask:
+                candidates[cell] &= ~mask
+                progress = True
+                if not candidates[cell]:
+                    self.contradiction = True
+
+        if progress:
+            self.technique_counts[technique] = self.technique_counts.get(technique, 0) + 1
+
+        return progress
+
+    def is_solved(self) -> bool:
+        """
+        Check if every cell is filled
+        :return: True if no blank cells remain
+        """
+        return 0 not in self.values
+
+    def get_digit_places(self, unit: List[int], bit: int) -> List[int]:
+        """
+        Return the cells of a unit that still have the digit as a candidate
+        :param unit: Cell indices of the unit
+        :param bit: Mask bit of the digit
+        :return: Cells where the digit can go
+        """
+        candidates = self.candidates
+        return [cell for cell in unit if candidates[cell] & bit]
+
+
+class Technique:
+    """
+    Base class for deduction rules. A rule makes at most one batch of progress per call so that the engine can go back
+    to cheaper rules as soon as possible
+    """
+    name = ""
+    difficulty = 0
+
+    def apply(self, grid: CandidateGrid) -> bool:
+        """
+        Look for one deduction and apply it
+        :param grid: Grid to work on
+        :return: True if a digit was placed or a candidate eliminated
+        """
+        raise NotImplementedError
+
+
+class NakedSingle(Technique):
+    """
+    A cell with a single candidate must hold that digit
+    """
+    name = "naked_single"
+    difficulty = 1
+
+    def apply(self, grid: CandidateGrid) -> bool:
+        progress = False
+        for cell in range(grid.layout.cell_count):
+            mask = grid.candidates[cell]
+            if mask and not mask & (mask - 1) and not grid.values[cell]:
+                grid.place(cell, mask, self.name)
+                progress = True
+
+        return progress
+
+
+class HiddenSingle(Technique):
+    """
+    A digit with a single place left in a row, column, or box must go there
+    """
+    name = "hidden_single"
+    difficulty = 2
+
+    def apply(self, grid: CandidateGrid) -> bool:
+        values = grid.values
+        for unit in grid.layout.units:
+            placed_mask = 0
+            for cell in unit:
+                if values[cell]:
+                    placed_mask |= 1 << (values[cell] - 1)
+
+            for digit_index in range(grid.layout.size):
+                bit = 1 << digit_index
+                if placed_mask & bit:
+                    continue
+
+                places = grid.get_digit_places(unit, bit)
+                if not places:
+                    grid.contradiction = True
+                    return False
+                if len(places) == 1:
+                    grid.place(places[0], bit, self.name)
+                    return True
+
+        return False
+
+
+class NakedPair(Technique):
+    """
+    Two cells of a unit with the same two candidates hold those digits, so no other cell of the unit can
+    """
+    name = "naked_pair"
+    difficulty = 3
+
+    def apply(self, grid: CandidateGrid) -> bool:
+        candidates = grid.candidates
+        mask_sizes = grid.layout.mask_sizes
+        for unit in grid.layout.units:
+            pairs = {}
+            for cell in unit:
+                if mask_sizes[candidates[cell]] == 2:
+                    pairs.setdefault(candidates[cell], []).append(cell)
+
+            for mask, pair_cells in pairs.items():
+                if len(pair_cells) != 2:
+                    continue
+                others = [cell for cell in unit if cell not in pair_cells]
+                if grid.eliminate(others, mask, self.name):
+                    return True
+
+        return False
+
+
+class LockedCandidates(Technique):
+    """
+    Pointing: when a digit's places in a box all share a row or column, it cannot go elsewhere in that row or column.
+    Claiming: when a digit's places in a row or column all share a box, it cannot go elsewhere in that box
+    """
+    name = "locked_candidates"
+    difficulty = 4
+
+    def apply(self, grid: CandidateGrid) -> bool:
+        layout = grid.layout
+        for digit_index in range(layout.size):
+            bit = 1 << digit_index
+
+            for box in layout.box_cells:
+                places = grid.get_digit_places(box, bit)
+                if len(places) < 2:
+                    continue
+
+                rows = {layout.row_of_cell[cell] for cell in places}
+                if len(rows) == 1:
+                    outside = [cell for cell in layout.row_cells[rows.pop()] if cell not in box]
+                    if grid.eliminate(outside, bit, self.name):
+                        return True
+
+                columns = {layout.column_of_cell[cell] for cell in places}
+                if len(columns) == 1:
+                    outside = [cell for cell in layout.column_cells[columns.pop()] if cell not in box]
+                    if grid.eliminate(outside, bit, self.name):
+                        return True
+
+            for line in layout.row_cells + layout.column_cells:
+                places = grid.get_digit_places(line, bit)
+                if len(places) < 2:
+                    continue
+
+                boxes = {layout.box_of_cell[cell] for cell in places}
+                if len(boxes) == 1:
+                    outside = [cell for cell in layout.box_cells[boxes.pop()] if cell not in line]
+                    if grid.eliminate(outside, bit, self.name):
+                        return True
+
+        return False
+
+
+class XWing(Technique):
+    """
+    When a digit has exactly two places in each of two rows, and they share the same two columns, it cannot go
+    elsewhere in those columns. The same holds with rows and columns swapped
+    """
+    name = "x_wing"
+    difficulty = 5
+
+    def apply(self, grid: CandidateGrid) -> bool:
+        layout = grid.layout
+        for digit_index in range(layout.size):
+            bit = 1 << digit_index
+
+            for base_lines, cover_lines, position_of_cell in (
+                    (layout.row_cells, layout.column_cells, layout.column_of_cell),
+                    (layout.column_cells, layout.row_cells, layout.row_of_cell)):
+                lines_by_positions = {}
+                for line_index, line in enumerate(base_lines):
+                    places = grid.get_digit_places(line, bit)
+                    if len(places) == 2:
+                        positions = (position_of_cell[places[0]], position_of_cell[places[1]])
+                        lines_by_positions.setdefault(positions, []).append(line_index)
+
+                for positions, line_indices in lines_by_positions.items():
+                    if len(line_indices) != 2:
+                        continue
+
+                    wing_cells = set(base_lines[line_indices[0]]) | set(base_lines[line_indices[1]])
+                    outside = [cell for position in positions for cell in cover_lines[position]
+                               if cell not in wing_cells]
+                    if grid.eliminate(outside, bit, self.name):
+                        return True
+
+        return False
+
+
+DEFAULT_TECHNIQUES = [NakedSingle(), HiddenSingle(), NakedPair(), LockedCandidates(), XWing()]
+
+
+class TechniqueReport(NamedTuple):
+    """
+    Outcome of running the technique engine
+    """
+    solved: bool
+    contradiction: bool
+    placements: List[Placement]
+    technique_counts: Dict[str, int]
+    # Name of the hardest technique that made progress, or None if nothing was needed
+    hardest_technique: Optional[str]
+    # Difficulty of the hardest technique used, 0 if none
+    difficulty: int
+    values: List[int]
+    candidates: List[int]
+    # Limit of the budget that stopped the run: "time", "rounds", or "nodes". None if the run was not stopped
+    limit_reached: Optional[str] = None
+
+
+class TechniqueEngine:
+    """
+    Class used to solve puzzles with human-style deduction rules. Rules are tried from cheapest to costliest and the
+    engine returns to the cheapest rule after every success, escalating only while the cheaper rules are stalled
+    """
+
+    def __init__(self, techniques: Optional[List[Technique]] = None) -> None:
+        """
+        Initialize the TechniqueEngine object
+        :param techniques: Rules to use, in escalation order. Defaults to DEFAULT_TECHNIQUES
+        """
+        self.techniques = DEFAULT_TECHNIQUES if techniques is None else techniques
+
+    def run(self, values: List[int], candidates: List[int], box_size: int = 3,
+            budget: Optional[SolveBudget] = None) -> TechniqueReport:
+        """
+        Apply the rules until the puzzle is solved, a contradiction is found, every rule is stalled, or the budget
+        runs out
+        :param values: Flat list of cell values, 0 for blank
+        :param candidates: Candidate mask of every cell, 0 for filled cells
+        :param box_size: Number of rows and columns in a box
+        :param budget: Limits checked before every rule application, each counted as one round. Optional
+        :return: Report of the run, including the remaining candidates if the puzzle was not solved
+        """
+        grid = CandidateGrid(values, candidates, get_layout(box_size))
+        limit_reached = None
+
+        rule_index = 0
+        while rule_index < len(self.techniques) and not grid.contradiction and not grid.is_solved():
+            if budget is not None:
+                try:
+                    budget.add_round()
+                except BudgetExceeded as error:
+                    limit_reached = error.limit
+                    break
+
+            if self.techniques[rule_index].apply(grid):
+                rule_index = 0
+            else:
+                rule_index += 1
+
+        used = [technique for technique in self.techniques if technique.name in grid.technique_counts]
+        hardest = max(used, key=lambda technique: technique.difficulty, default=None)
+
+        return TechniqueReport(
+            solved=grid.is_solved() and not grid.contradiction,
+            contradiction=grid.contradiction,
+            placements=grid.placements,
+            technique_counts=grid.technique_counts,
+            hardest_technique=None if hardest is None else hardest.name,
+            difficulty=0 if hardest is None else hardest.difficulty,
+            values=grid.values,
+            candidates=grid.candidates,
+            limit_reached=limit_reached
+        )
@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+import batch
+from batch_propagation import propagate_grids, solve_puzzles
+from benchmark import TIERS, load_corpus
+
+# Two 3s in the first row, so propagation finds the board contradictory
+CONTRADICTORY_PUZZLE = "33.9568.16.2478...8..1...4.4865391..1......587.9.1.......7.1..997.2...3....3.57.."
+
+
+def _outcomes(results):
+    return [(result.index, result.puzzle, result.solution, result.status) for result in results]
+
+
+@pytest.mark.parametrize("tier", TIERS)
+def test_solve_puzzles_matches_solve_puzzle_on_the_corpora(tier):
+    puzzles = load_corpus(tier)
+    expected = [batch.solve_puzzle(index, puzzle, "backtracking") for index, puzzle in enumerate(puzzles)]
+
+    assert _outcomes(solve_puzzles(puzzles)) == _outcomes(expected)
+
+
+def test_invalid_and_contradictory_puzzles_keep_their_position():
+    valid_puzzle = load_corpus("easy")[0]
+    puzzles = [valid_puzzle, "not a puzzle", "é" * 81, CONTRADICTORY_PUZZLE, valid_puzzle[:80]]
+
+    results = list(solve_puzzles(puzzles))
+
+    assert [result.status for result in results] == ["solved", "invalid", "invalid", "unsolved", "invalid"]
+    assert _outcomes(results) == _outcomes(batch.solve_puzzle(index, puzzle, "backtracking")
+                                           for index, puzzle in enumerate(puzzles))
+
+
+def test_chunks_of_one_puzzle_give_the_same_results():
+    puzzles = load_corpus("medium")[:20] + ["not a puzzle", CONTRADICTORY_PUZZLE]
+
+    assert _outcomes(solve_puzzles(puzzles, chunk_size=1)) == _outcomes(solve_puzzles(puzzles))
+
+
+def test_contradictory_grid_is_flagged_by_propagation():
+    grid = [0 if symbol == "." else int(symbol) for symbol in CONTRADICTORY_PUZZLE]
+
+    propagation = propagate_grids(np.array([grid]))
+
+    assert propagation.contradiction.tolist() == [True]
+    assert propagation.is_solved.tolist() == [False]
+
+
+@pytest.mark.parametrize("value", [256, -1, 10])
+def test_out_of_range_values_raise_value_error_before_the_cast(value):
+    grid = [0] * 81
+    grid[0] = value
+
+    with pytest.raises(ValueError, match="between 0 and 9"):
+        propagate_grids(np.array([grid], dtype=np.int64))
+    with pytest.raises(ValueError, match="between 0 and 9"):
+        propagate_grids([grid])
+
+
+def test_chunk_size_must_be_positive():
+    with pytest.raises(ValueError, match="chunk_size"):
+        list(solve_puzzles(load_corpus("easy")[:1], chunk_size=0))
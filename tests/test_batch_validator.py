@@ -0,0 +1,29 @@
+import numpy as np
+import pytest
+
+from batch_validator import validate_grids
+
+SOLUTION = "347956821612478395895123647486539172123647958759812463534761289971284536268395714"
+
+
+def _grid(line):
+    return [0 if symbol == "." else int(symbol) for symbol in line]
+
+
+def test_solved_grid_and_grid_with_a_blank():
+    validation = validate_grids(np.array([_grid(SOLUTION), _grid("." + SOLUTION[1:])]))
+
+    assert validation.is_solved.tolist() == [True, False]
+    assert validation.has_blanks.tolist() == [False, True]
+    assert validation.failing.tolist() == [1]
+
+
+@pytest.mark.parametrize("value", [256, -1, 10])
+def test_out_of_range_values_raise_value_error_before_the_cast(value):
+    grid = _grid(SOLUTION)
+    grid[0] = value
+
+    with pytest.raises(ValueError, match="between 0 and 9"):
+        validate_grids(np.array([grid], dtype=np.int64))
+    with pytest.raises(ValueError, match="between 0 and 9"):
+        validate_grids([grid])
@@ -0,0 +1,95 @@
+import pytest
+
+from board import Board
+from flat_board import FlatBoard
+from solver import Solver
+
+EASY_PUZZLE = "3..9568.16.2478...8..1...4.4865391..1......587.9.1.......7.1..997.2...3....3.57.."
+SECOND_PUZZLE = "8.97..2..4672.9.1.2.368.47..78.........3..5..534...6.8986..7152.25.1......19.5.8."
+
+
+@pytest.mark.parametrize("board_class", [Board, FlatBoard])
+@pytest.mark.parametrize("engine", ["singles", "techniques", "backtracking"])
+def test_reused_solver_sees_reloaded_board(board_class, engine):
+    board = board_class.from_string(EASY_PUZZLE)
+    solver = Solver(board, engine)
+    assert solver.solve().status == "solved"
+
+    board.load_cell_values([int(symbol) if symbol != "." else 0 for symbol in SECOND_PUZZLE])
+    result = solver.solve()
+
+    assert result.status == "solved"
+    assert 0 not in result.values
+    assert board.get_cell_values() == list(result.values)
+    assert "-" not in "".join("".join(row) for row in solver.board_array)
+
+
+@pytest.mark.parametrize("board_class", [Board, FlatBoard])
+def test_reloading_from_text_updates_cached_grid(board_class):
+    board = board_class()
+    grid = board.get_board()
+
+    board.initialize_board_from_text("\n".join(",".join(SECOND_PUZZLE[row * 9:row * 9 + 9].replace(".", "-"))
+                                               for row in range(9)))
+
+    assert board.get_board() is grid
+    assert "".join("".join(row) for row in grid).replace("-", ".") == SECOND_PUZZLE
+
+
+def _masks(board):
+    if board.row_counts is None:
+        board._count_digits()
+    return board.row_masks, board.column_masks, board.box_masks, board.row_counts, board.column_counts, board.box_counts
+
+
+def _rebuilt_masks(board):
+    return _masks(type(board).from_string("".join(str(value or ".") for value in board.get_cell_values())))
+
+
+@pytest.mark.parametrize("board_class", [Board, FlatBoard])
+def test_removing_a_duplicate_keeps_the_remaining_digit_in_the_masks(board_class):
+    board = board_class()
+    board.insert_number_into_board(0, 0, "5")
+    # duplicates of the 5 in its row, column, and box
+    board.insert_number_into_board(0, 8, "5")
+    board.insert_number_into_board(8, 0, "5")
+    board.insert_number_into_board(1, 1, "5")
+
+    board.remove_number_from_board(0, 8)
+    board.remove_number_from_board(8, 0)
+    board.insert_number_into_board(1, 1, "7")
+
+    assert _masks(board) == _rebuilt_masks(board)
+    assert not board.get_candidate_mask(0, 4) & board.digit_to_bit["5"]
+    assert not board.get_candidate_mask(4, 0) & board.digit_to_bit["5"]
+    assert not board.get_candidate_mask(2, 2) & board.digit_to_bit["5"]
+
+    board.remove_number_from_board(0, 0)
+    assert _masks(board) == _rebuilt_masks(board)
+    assert board.get_candidate_mask(0, 4) & board.digit_to_bit["5"]
+
+
+@pytest.mark.parametrize("board_class", [Board, FlatBoard])
+def test_validator_undo_of_a_duplicate_keeps_masks_consistent(board_class):
+    board = board_class.from_string(EASY_PUZZLE)
+    validator = board.attach_validator()
+
+    board.insert_number_into_board(0, 1, "3")
+    validator.undo()
+
+    assert _masks(board) == _rebuilt_masks(board)
+    assert validator.get_candidate_mask(0, 1) == board.get_candidate_mask(0, 1)
+
+
+@pytest.mark.parametrize("board_class", [Board, FlatBoard])
+def test_one_line_constructors_match_text_constructor(board_class):
+    text = "\n".join(",".join(EASY_PUZZLE[row * 9:row * 9 + 9].replace(".", "-")) for row in range(9))
+    expected = board_class.from_text(text)
+
+    for board in (board_class.from_string(EASY_PUZZLE), board_class.from_bytes(EASY_PUZZLE.encode("ascii"))):
+        assert type(board) is board_class
+        assert [list(row) for row in board.get_board()] == [list(row) for row in expected.get_board()]
+        assert board.row_masks == expected.row_masks
+        assert board.column_masks == expected.column_masks
+        assert board.box_masks == expected.box_masks
+        assert board.input_file_path is None and board.validator is None
@@ -0,0 +1,45 @@
+import random
+
+import pytest
+
+from board import Board
+from generator import (DIFFICULTY_LEVELS, generate_puzzle, get_difficulty_name, random_solution, rate_puzzle,
+                       remove_clues)
+from solver import Solver
+
+
+def _values(line):
+    return [0 if symbol == "." else int(symbol) for symbol in line]
+
+
+@pytest.mark.parametrize("difficulty", DIFFICULTY_LEVELS)
+def test_generated_puzzle_is_unique_and_of_the_requested_difficulty(difficulty):
+    generated = generate_puzzle(1, difficulty)
+
+    assert generated is not None
+    assert generated.difficulty == difficulty
+    assert get_difficulty_name(rate_puzzle(_values(generated.puzzle))) == difficulty
+    assert Solver(Board.from_string(generated.puzzle)).find_solutions(2) == [_values(generated.solution)]
+    assert generated.clues == sum(symbol != "." for symbol in generated.puzzle)
+
+
+def test_same_seed_generates_the_same_puzzle():
+    assert generate_puzzle(7, "easy") == generate_puzzle(7, "easy")
+
+
+def test_symmetric_puzzle_keeps_clues_in_rotational_pairs():
+    generated = generate_puzzle(1, "easy", symmetric=True)
+
+    assert generated is not None
+    assert all((generated.puzzle[cell] == ".") == (generated.puzzle[80 - cell] == ".") for cell in range(81))
+    assert len(Solver(Board.from_string(generated.puzzle)).find_solutions(2)) == 1
+
+
+def test_removed_clues_leave_a_unique_puzzle_of_the_solution():
+    rng = random.Random(3)
+    solution = random_solution(rng)
+    values = remove_clues(solution, DIFFICULTY_LEVELS["medium"], rng)
+
+    assert all(value in (0, digit) for value, digit in zip(values, solution))
+    assert rate_puzzle(values) <= DIFFICULTY_LEVELS["medium"]
+    assert Solver(Board.from_string("".join(str(value or ".") for value in values))).find_solutions(2) == [solution]
@@ -0,0 +1,154 @@
+import os
+
+import pytest
+
+from puzzle_store import (PuzzleStore, PuzzleStoreWriter, convert_board_files_to_store, convert_store_to_board_files,
+                          convert_text_to_store)
+
+BOARD_FILE = os.path.join(os.path.dirname(__file__), os.pardir, "puzzles", "puzzle1-beginner.txt")
+
+PUZZLES = [
+    "3..9568.16.2478...8..1...4.4865391..1......587.9.1.......7.1..997.2...3....3.57..",
+    "8.97..2..4672.9.1.2.368.47..78.........3..5..534...6.8986..7152.25.1......19.5.8.",
+]
+SOLUTIONS = [
+    "347956821612478395895123647486539172123647958759812463534761289971284536268395714",
+    "819743265467259813253681479678594321192368547534172698986437152725816934341925786",
+]
+
+
+def _values(line):
+    return [0 if symbol == "." else int(symbol) for symbol in line]
+
+
+def _write_lines(path, lines):
+    path.write_text("".join(line + "\n" for line in lines))
+    return str(path)
+
+
+def _read_store(store_file_path):
+    with PuzzleStore(store_file_path) as store:
+        return list(store)
+
+
+def test_solutions_are_paired_by_line_around_an_invalid_puzzle(tmp_path):
+    puzzle_file = _write_lines(tmp_path / "puzzles.txt", [PUZZLES[0], "not a puzzle", PUZZLES[1]])
+    solution_file = _write_lines(tmp_path / "solutions.txt", [SOLUTIONS[0], SOLUTIONS[1], SOLUTIONS[1]])
+    store_file = str(tmp_path / "store.sdk")
+
+    errors = []
+    assert convert_text_to_store(puzzle_file, store_file, solution_file, errors.append) == 2
+
+    stored = _read_store(store_file)
+    assert [record.puzzle for record in stored] == [_values(PUZZLES[0]), _values(PUZZLES[1])]
+    assert [record.solution for record in stored] == [_values(SOLUTIONS[0]), _values(SOLUTIONS[1])]
+    assert [error.line_number for error in errors] == [2]
+
+
+def test_puzzle_without_a_valid_solution_is_skipped(tmp_path):
+    puzzle_file = _write_lines(tmp_path / "puzzles.txt", [PUZZLES[0], PUZZLES[1]])
+    solution_file = _write_lines(tmp_path / "solutions.txt", ["garbage", SOLUTIONS[1]])
+    store_file = str(tmp_path / "store.sdk")
+
+    errors = []
+    assert convert_text_to_store(puzzle_file, store_file, solution_file, errors.append) == 1
+
+    assert [record.solution for record in _read_store(store_file)] == [_values(SOLUTIONS[1])]
+    assert [error.line_number for error in errors] == [1, 1]
+
+
+def test_short_solution_file_raises_value_error(tmp_path):
+    puzzle_file = _write_lines(tmp_path / "puzzles.txt", PUZZLES)
+    solution_file = _write_lines(tmp_path / "solutions.txt", SOLUTIONS[:1])
+    store_file = str(tmp_path / "store.sdk")
+
+    with pytest.raises(ValueError, match="fewer"):
+        convert_text_to_store(puzzle_file, store_file, solution_file)
+
+    # nothing from the failed conversion is left in the store
+    assert _read_store(store_file) == []
+
+
+def test_long_solution_file_raises_value_error(tmp_path):
+    puzzle_file = _write_lines(tmp_path / "puzzles.txt", PUZZLES[:1])
+    solution_file = _write_lines(tmp_path / "solutions.txt", SOLUTIONS)
+
+    with pytest.raises(ValueError, match="more lines"):
+        convert_text_to_store(puzzle_file, str(tmp_path / "store.sdk"), solution_file)
+
+
+def test_solution_contradicting_a_clue_raises_value_error(tmp_path):
+    puzzle_file = _write_lines(tmp_path / "puzzles.txt", PUZZLES)
+    solution_file = _write_lines(tmp_path / "solutions.txt", [SOLUTIONS[0], SOLUTIONS[0]])
+
+    with pytest.raises(ValueError, match="line 2"):
+        convert_text_to_store(puzzle_file, str(tmp_path / "store.sdk"), solution_file)
+
+
+def test_conversion_without_solutions(tmp_path):
+    puzzle_file = _write_lines(tmp_path / "puzzles.txt", ["# header", *PUZZLES])
+    store_file = str(tmp_path / "store.sdk")
+
+    assert convert_text_to_store(puzzle_file, store_file) == 2
+    assert [record.solution for record in _read_store(store_file)] == [None, None]
+
+
+def test_reopening_after_a_torn_write_drops_the_unwritten_records(tmp_path):
+    store_file = str(tmp_path / "store.sdk")
+    with PuzzleStoreWriter(store_file) as writer:
+        writer.append(_values(PUZZLES[0]), _values(SOLUTIONS[0]))
+        writer.append(_values(PUZZLES[1]), _values(SOLUTIONS[1]))
+        writer.append(_values(PUZZLES[0]))
+
+    # the index reached the disk but the tail of the data file did not
+    os.truncate(store_file, os.path.getsize(store_file) - 20)
+
+    with PuzzleStoreWriter(store_file) as writer:
+        assert writer.count == 2
+        writer.append(_values(PUZZLES[1]))
+
+    stored = _read_store(store_file)
+    assert [record.puzzle for record in stored] == [_values(PUZZLES[0]), _values(PUZZLES[1]), _values(PUZZLES[1])]
+    assert [record.solution for record in stored] == [_values(SOLUTIONS[0]), _values(SOLUTIONS[1]), None]
+
+
+def _board_text(line):
+    return "\n".join(",".join(symbol if symbol != "." else "-" for symbol in line[start:start + 9])
+                     for start in range(0, 81, 9))
+
+
+def test_board_files_round_trip_through_the_store(tmp_path):
+    store_file = str(tmp_path / "store.sdk")
+    solution_file = tmp_path / "solution.txt"
+    puzzle_file = tmp_path / "puzzle.txt"
+    puzzle_file.write_text(_board_text(PUZZLES[0]))
+    solution_file.write_text(_board_text(SOLUTIONS[0]))
+
+    assert convert_board_files_to_store([BOARD_FILE, str(puzzle_file)], store_file, None) == 2
+    assert convert_board_files_to_store([str(puzzle_file)], store_file, [str(solution_file)]) == 1
+
+    assert convert_store_to_board_files(store_file, str(tmp_path / "puzzles")) == 3
+    assert convert_store_to_board_files(store_file, str(tmp_path / "solutions"), solutions=True) == 3
+
+    with open(BOARD_FILE) as board_file:
+        assert (tmp_path / "puzzles" / "puzzle0.txt").read_text() == board_file.read()
+    assert (tmp_path / "puzzles" / "puzzle2.txt").read_text() == _board_text(PUZZLES[0])
+    assert (tmp_path / "solutions" / "puzzle2.txt").read_text() == _board_text(SOLUTIONS[0])
+    assert _read_store(store_file)[2].solution == _values(SOLUTIONS[0])
+
+
+def test_board_file_solution_contradicting_a_clue_drops_the_batch(tmp_path):
+    store_file = str(tmp_path / "store.sdk")
+    puzzle_file = tmp_path / "puzzle.txt"
+    solution_file = tmp_path / "solution.txt"
+    wrong_solution_file = tmp_path / "wrong_solution.txt"
+    puzzle_file.write_text(_board_text(PUZZLES[0]))
+    solution_file.write_text(_board_text(SOLUTIONS[0]))
+    wrong_solution_file.write_text(_board_text(SOLUTIONS[1]))
+
+    convert_board_files_to_store([str(puzzle_file)], store_file)
+    with pytest.raises(ValueError, match="contradicts"):
+        convert_board_files_to_store([str(puzzle_file), str(puzzle_file)], store_file,
+                                     [str(solution_file), str(wrong_solution_file)])
+
+    assert len(_read_store(store_file)) == 1
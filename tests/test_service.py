@@ -0,0 +1,136 @@
+import asyncio
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from service import ServiceResult, SolverService, handle_connection
+
+EASY_PUZZLE = "3..9568.16.2478...8..1...4.4865391..1......587.9.1.......7.1..997.2...3....3.57.."
+
+
+class GatedExecutor(ThreadPoolExecutor):
+    """
+    Executor whose tasks wait for the gate to open before running, recording how many of them are submitted at once
+    """
+
+    def __init__(self) -> None:
+        super().__init__(max_workers=16)
+        self.gate = threading.Event()
+        self.lock = threading.Lock()
+        self.futures = []
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+    def submit(self, fn, *args, **kwargs):
+        with self.lock:
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        future = super().submit(self._run_when_open, fn, *args, **kwargs)
+        future.add_done_callback(self._finish)
+        self.futures.append(future)
+        return future
+
+    def _run_when_open(self, fn, *args, **kwargs):
+        self.gate.wait()
+        return fn(*args, **kwargs)
+
+    def _finish(self, _) -> None:
+        with self.lock:
+            self.in_flight -= 1
+
+
+class GatedService:
+    """
+    Stand-in for SolverService whose requests only finish once the gate is opened, counting the requests started
+    """
+
+    def __init__(self, max_in_flight: int) -> None:
+        self.max_in_flight = max_in_flight
+        self.gate = asyncio.Event()
+        self.started = 0
+
+    async def solve(self, puzzle, timeout=None):
+        self.started += 1
+        await self.gate.wait()
+        return ServiceResult(puzzle, "solved", puzzle, 0, 0.0)
+
+
+class RecordingWriter:
+    """
+    Stand-in for asyncio.StreamWriter keeping the bytes written
+    """
+
+    def __init__(self) -> None:
+        self.data = b""
+        self.closed = False
+
+    def write(self, data: bytes) -> None:
+        self.data += data
+
+    async def drain(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+
+def test_timed_out_requests_hold_their_slot_until_the_worker_finishes():
+    async def run() -> None:
+        service = SolverService(max_in_flight=2)
+        await service.start()
+        service.executor.shutdown()
+        executor = service.executor = GatedExecutor()
+
+        try:
+            # the gate is closed, so every wave times out while the workers of the previous waves still hold the slots
+            for _ in range(4):
+                results = await asyncio.gather(*(service.solve(EASY_PUZZLE, timeout=0.05) for _ in range(2)))
+                assert all(result.status == "timeout" for result in results)
+            assert len(executor.futures) == 2
+
+            # once the workers are done, every slot is free again
+            executor.gate.set()
+            await asyncio.gather(*(asyncio.wrap_future(future) for future in executor.futures))
+            assert (await service.solve(EASY_PUZZLE)).status == "solved"
+        finally:
+            await service.close()
+
+        assert executor.peak_in_flight <= 2
+        assert executor.in_flight == 0
+
+    asyncio.run(run())
+
+
+def test_connection_stops_reading_while_answers_are_waiting():
+    async def run() -> None:
+        service = GatedService(max_in_flight=2)
+        reader = asyncio.StreamReader()
+        reader.feed_data(b"".join(f"{index}\n".encode() for index in range(50)))
+        reader.feed_eof()
+        writer = RecordingWriter()
+
+        connection = asyncio.create_task(handle_connection(service, reader, writer, None))
+        for _ in range(100):
+            await asyncio.sleep(0)
+
+        # the queued answers, the one being written, and the one waiting to be queued
+        assert service.started == service.max_in_flight + 2
+
+        service.gate.set()
+        await connection
+
+        results = [json.loads(line) for line in writer.data.decode().splitlines()]
+        assert [result["puzzle"] for result in results] == [str(index) for index in range(50)]
+        assert writer.closed
+
+    asyncio.run(run())
+
+
+def test_solve_returns_solution():
+    async def run() -> None:
+        async with SolverService(workers=1) as service:
+            result = await service.solve(EASY_PUZZLE, timeout=30.0)
+        assert result.status == "solved"
+        assert "." not in result.solution
+
+    asyncio.run(run())
@@ -0,0 +1,105 @@
+import random
+
+import solution_cache
+from benchmark import load_corpus
+from board import Board
+from canonical import COLUMN_ORDERS, Transform, apply_transform, canonicalize, get_invariant_key, invert_transform
+from solution_cache import SolutionCache
+
+PUZZLE = "8.97..2..4672.9.1.2.368.47..78.........3..5..534...6.8986..7152.25.1......19.5.8."
+SOLUTION = "819743265467259813253681479678594321192368547534172698986437152725816934341925786"
+
+
+def _values(line):
+    return [0 if symbol == "." else int(symbol) for symbol in line]
+
+
+def _random_transforms(count, seed=7):
+    rng = random.Random(seed)
+    return [Transform(rng.random() < 0.5, COLUMN_ORDERS[rng.randrange(len(COLUMN_ORDERS))],
+                      COLUMN_ORDERS[rng.randrange(len(COLUMN_ORDERS))], tuple([0] + rng.sample(range(1, 10), 9)))
+            for _ in range(count)]
+
+
+def test_equivalent_grids_share_a_canonical_form():
+    values = _values(PUZZLE)
+    canonical_puzzle, transform = canonicalize(values)
+
+    assert tuple(apply_transform(values, transform)) == canonical_puzzle
+    assert invert_transform(list(canonical_puzzle), transform) == values
+    for variant_transform in _random_transforms(20):
+        variant = apply_transform(values, variant_transform)
+        variant_canonical, variant_transform = canonicalize(variant)
+        assert variant_canonical == canonical_puzzle
+        assert tuple(apply_transform(variant, variant_transform)) == canonical_puzzle
+
+
+def test_exact_repeats_skip_canonicalization():
+    cache = SolutionCache()
+    board = Board.from_string(PUZZLE)
+
+    assert cache.get_solution(board) == _values(SOLUTION)
+    solution = cache.get_solution(board)
+    assert solution == _values(SOLUTION)
+
+    # the caller's list is a copy, so changing it leaves the cache intact
+    solution[0] = 0
+    assert cache.get_solution(board) == _values(SOLUTION)
+    assert (cache.hits, cache.exact_hits, cache.misses) == (2, 2, 1)
+
+
+def test_symmetric_puzzles_hit_the_cache():
+    cache = SolutionCache()
+    cache.get_solution(Board.from_string(PUZZLE))
+
+    for transform in _random_transforms(5):
+        board = Board()
+        board.load_cell_values(apply_transform(_values(PUZZLE), transform))
+        assert cache.get_solution(board) == apply_transform(_values(SOLUTION), transform)
+
+    assert (cache.hits, cache.exact_hits, cache.misses) == (5, 0, 1)
+
+
+def test_invariant_key_is_shared_by_equivalent_grids():
+    values = _values(PUZZLE)
+
+    for transform in _random_transforms(20):
+        assert get_invariant_key(apply_transform(values, transform)) == get_invariant_key(values)
+    assert len({get_invariant_key(_values(puzzle)) for puzzle in load_corpus("easy")}) == len(load_corpus("easy"))
+
+
+def test_unrelated_puzzles_are_not_canonicalized(monkeypatch):
+    calls = []
+    monkeypatch.setattr(solution_cache, "canonicalize", lambda values: calls.append(values) or canonicalize(values))
+    cache = SolutionCache()
+    puzzles = load_corpus("easy")[:20]
+
+    for puzzle in puzzles:
+        assert cache.get_solution(Board.from_string(puzzle)) is not None
+    assert calls == []
+    assert (cache.misses, cache.deferred, len(cache.pending), len(cache.entries)) == (20, 20, 20, 0)
+
+    # the first equivalent puzzle canonicalizes the pending one along with itself
+    transform = _random_transforms(1)[0]
+    board = Board()
+    board.load_cell_values(apply_transform(_values(puzzles[3]), transform))
+    solution = cache.get_solution(board)
+
+    assert len(calls) == 2
+    assert cache.hits == 1 and len(cache.pending) == 19 and len(cache.entries) == 1
+    assert solution == apply_transform(cache.get_solution(Board.from_string(puzzles[3])), transform)
+
+
+def test_evicted_entries_release_their_invariant_key():
+    cache = SolutionCache(maxsize=1)
+    first, second = load_corpus("easy")[:2]
+    transform = _random_transforms(1)[0]
+
+    for puzzle in (first, second):
+        cache.get_solution(Board.from_string(puzzle))
+        board = Board()
+        board.load_cell_values(apply_transform(_values(puzzle), transform))
+        cache.get_solution(board)
+
+    assert cache.evictions == 1
+    assert cache.invariant_counts == {get_invariant_key(_values(second)): 1}
@@ -0,0 +1,182 @@
+import multiprocessing
+import os
+import threading
+from functools import partial
+
+import pytest
+
+import batch
+import search
+import solver
+from benchmark import load_corpus
+from board import Board
+from budget import SolveBudget
+from flat_board import FlatBoard
+from layout import MASK_TABLE_MAX_SIZE, MaskDigits, MaskSizes, get_layout
+from solver import Solver
+
+PUZZLES_DIRECTORY = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "puzzles")
+
+
+@pytest.mark.parametrize("engine", ["singles", "techniques", "backtracking"])
+def test_flat_board_solves_like_board(engine):
+    for puzzle in load_corpus("easy")[:10] + load_corpus("medium")[:10]:
+        board_result = Solver(Board.from_string(puzzle), engine).solve()
+        flat_result = Solver(FlatBoard.from_string(puzzle), engine).solve()
+
+        assert flat_result.status == board_result.status
+        assert flat_result.values == board_result.values
+        assert flat_result.work == board_result.work
+
+
+@pytest.mark.parametrize("board_class", [Board, FlatBoard])
+def test_check_solve_rejects_duplicates_and_blanks(board_class):
+    solution = "347956821612478395895123647486539172123647958759812463534761289971284536268395714"
+    assert Solver(board_class.from_string(solution)).check_solve()
+
+    # swapping two cells of a row keeps the row valid but breaks their columns
+    swapped = solution[1] + solution[0] + solution[2:]
+    assert not Solver(board_class.from_string(swapped)).check_solve()
+    assert not Solver(board_class.from_string("." + solution[1:])).check_solve()
+    assert not Solver(board_class(os.path.join(PUZZLES_DIRECTORY, "puzzle1-beginner-dupes.txt"))).check_solve()
+
+
+def _count_subtree_until_stopped(marker_path, candidates, box_size, limit):
+    # the first subtree to start is counted at once, every other one keeps its worker busy until told to stop
+    try:
+        os.close(os.open(marker_path, os.O_CREAT | os.O_EXCL))
+    except FileExistsError:
+        search._worker_stop_event.wait(60)
+        return 0
+    return search.count_subtree(candidates, box_size, limit)
+
+
+def test_parallel_count_stops_every_worker_once_the_limit_is_reached(monkeypatch, tmp_path):
+    monkeypatch.setattr(solver, "count_subtree", partial(_count_subtree_until_stopped, str(tmp_path / "first")))
+
+    assert Solver(Board()).count_solutions(limit=1, workers=2) == 1
+    assert multiprocessing.active_children() == []
+
+
+def test_subtree_count_ends_once_the_stop_event_is_set():
+    stop_event = threading.Event()
+    stop_event.set()
+
+    backtracking = search.BacktrackingSearch([0] * 81)
+    assert backtracking.count_solutions(stop_event=stop_event) < search.STOP_CHECK_INTERVAL
+    assert backtracking.stopped
+    assert backtracking.nodes == search.STOP_CHECK_INTERVAL
+
+
+def test_parallel_count_matches_serial_count():
+    board = Board.from_string("...........2478...8..1...4.4865391..1......587.9.1.......7.1..997.2...3....3.57..")
+    serial_count = Solver(board).count_solutions()
+
+    assert serial_count > 1
+    assert Solver(board).count_solutions(workers=2) == serial_count
+    assert Solver(board).count_solutions(limit=2, workers=2) == 2
+
+
+def _assert_incomplete(result, puzzle, limit):
+    assert result.status == "incomplete"
+    assert not result.solved
+    assert result.limit_reached == limit
+    assert result.candidates is not None
+    # the clues are kept and every filled cell is left without candidates
+    assert all(value == int(clue) for value, clue in zip(result.values, puzzle) if clue != ".")
+    assert all(not mask for value, mask in zip(result.values, result.candidates) if value)
+
+
+@pytest.mark.parametrize("engine", ["techniques", "backtracking", "dlx", "auto"])
+def test_node_limit_gives_an_incomplete_result(engine):
+    puzzle = load_corpus("hard")[0]
+
+    result = Solver(Board.from_string(puzzle), engine, budget=SolveBudget(max_nodes=1)).solve()
+
+    _assert_incomplete(result, puzzle, "nodes")
+
+
+@pytest.mark.parametrize("engine", ["singles", "techniques", "auto"])
+def test_round_limit_gives_an_incomplete_result(engine):
+    puzzle = load_corpus("easy")[0]
+
+    result = Solver(Board.from_string(puzzle), engine, budget=SolveBudget(max_rounds=1)).solve()
+
+    _assert_incomplete(result, puzzle, "rounds")
+
+
+@pytest.mark.parametrize("engine", ["singles", "techniques", "backtracking", "dlx", "auto"])
+def test_time_limit_gives_an_incomplete_result(engine):
+    puzzle = load_corpus("hard")[0]
+
+    result = Solver(Board.from_string(puzzle), engine, budget=SolveBudget(max_seconds=0)).solve()
+
+    _assert_incomplete(result, puzzle, "time")
+
+
+def test_budget_is_restarted_by_every_solve():
+    puzzle = load_corpus("hard")[0]
+    budget = SolveBudget(max_nodes=1)
+    assert Solver(Board.from_string(puzzle), "backtracking", budget=budget).solve().status == "incomplete"
+
+    budget.max_nodes = 10 ** 6
+    result = Solver(Board.from_string(puzzle), "backtracking", budget=budget).solve()
+    assert result.status == "solved"
+    assert result.limit_reached is None
+
+
+def test_batch_reports_incomplete_puzzles():
+    puzzle = load_corpus("hard")[0]
+
+    assert batch.solve_puzzle(0, puzzle, "dlx", SolveBudget(max_nodes=1)).status == "incomplete"
+    assert batch.solve_puzzle(0, puzzle, "dlx", SolveBudget(max_nodes=10 ** 6)).status == "solved"
+
+
+def test_negative_limit_raises_value_error():
+    with pytest.raises(ValueError, match="max_nodes"):
+        SolveBudget(max_nodes=-1)
+
+
+def _assert_valid_grid(values, layout, puzzle_values):
+    assert all(value == clue for value, clue in zip(values, puzzle_values) if clue)
+    for unit in layout.units:
+        digits = [values[cell] for cell in unit if values[cell]]
+        assert len(digits) == len(set(digits))
+
+
+@pytest.mark.parametrize("engine", ["techniques", "backtracking", "dlx", "auto"])
+def test_engines_solve_the_16x16_puzzle(engine):
+    board = Board(os.path.join(PUZZLES_DIRECTORY, "puzzle3-16x16.txt"), box_size=4)
+    puzzle_values = board.get_cell_values()
+
+    result = Solver(board, engine).solve()
+
+    assert result.status == "solved"
+    assert result.box_size == 4
+    assert sorted(set(result.values)) == list(range(1, 17))
+    _assert_valid_grid(result.values, get_layout(4), puzzle_values)
+    assert Solver(board).check_solve()
+
+
+def test_singles_leave_the_16x16_puzzle_consistent():
+    board = Board(os.path.join(PUZZLES_DIRECTORY, "puzzle3-16x16.txt"), box_size=4)
+    puzzle_values = board.get_cell_values()
+
+    result = Solver(board, "singles").solve()
+
+    # singles alone stall on this puzzle, but every digit they place must be right
+    assert result.status == "unsolved"
+    assert sum(map(bool, result.values)) > sum(map(bool, puzzle_values))
+    _assert_valid_grid(result.values, get_layout(4), puzzle_values)
+
+
+def test_large_layouts_compute_mask_digits_on_demand():
+    layout = get_layout(4)
+    assert layout.size > MASK_TABLE_MAX_SIZE
+    assert isinstance(layout.mask_to_digits, MaskDigits)
+    assert isinstance(layout.mask_sizes, MaskSizes)
+
+    mask = layout.digit_to_bit["1"] | layout.digit_to_bit["10"] | layout.digit_to_bit["16"]
+    assert layout.mask_to_digits[mask] == ["1", "10", "16"]
+    assert layout.mask_sizes[mask] == 3
+    assert layout.mask_to_digits[layout.full_mask] == layout.symbols
@@ -0,0 +1,41 @@
+import os
+
+import pytest
+
+from sudoku import iter_input_boards, main
+
+PUZZLES_DIRECTORY = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "puzzles")
+EASY_CORPUS = os.path.join(PUZZLES_DIRECTORY, "corpora", "easy.txt")
+BOARD_16X16 = os.path.join(PUZZLES_DIRECTORY, "puzzle3-16x16.txt")
+
+
+@pytest.mark.parametrize("argv", [
+    ["solve", "--corpus", EASY_CORPUS, "--box-size", "4"],
+    ["validate", "--corpus", EASY_CORPUS, "--box-size", "2"],
+    ["solve", BOARD_16X16, "--box-size", "4", "--format", "line"],
+])
+def test_unsupported_box_size_is_rejected_before_solving(argv, capsys):
+    with pytest.raises(SystemExit) as exit_info:
+        main(argv)
+
+    assert exit_info.value.code == 2
+    captured = capsys.readouterr()
+    assert "--box-size" in captured.err
+    assert captured.out == ""
+
+
+def test_corpus_boards_are_solved_as_lines(capsys):
+    assert main(["solve", "--corpus", EASY_CORPUS, "--format", "line"]) == 0
+
+    lines = capsys.readouterr().out.splitlines()
+    assert len(lines) == len([line for line in open(EASY_CORPUS) if line.strip() and not line.startswith("#")])
+    assert all(len(line) == 81 and "." not in line for line in lines)
+
+
+def test_corpus_boards_are_named_by_line():
+    name, board = next(iter_input_boards([], EASY_CORPUS, 3))
+
+    # the first line of the corpus is a comment
+    assert name == f"{EASY_CORPUS}:2"
+    assert board.box_size == 3
+    assert "".join(str(value or ".") for value in board.get_cell_values()) == open(EASY_CORPUS).readlines()[1].strip()
@@ -0,0 +1,26 @@
+from triage import DEFAULT_EASY_MAX_SCORE, DEFAULT_MEDIUM_MAX_SCORE, DifficultyRating, DifficultyRouter
+from tune_triage import PuzzleTimings, get_total_time, sweep_thresholds
+
+
+def _timings(score, easy, medium, hard):
+    return PuzzleTimings("test", DifficultyRating(30, 51, 0, 0.0, score, False), (easy, medium, hard))
+
+
+def test_router_defaults_come_from_the_module_constants():
+    router = DifficultyRouter()
+    assert (router.easy_max_score, router.medium_max_score) == (DEFAULT_EASY_MAX_SCORE, DEFAULT_MEDIUM_MAX_SCORE)
+
+
+def test_sweep_finds_the_fastest_thresholds():
+    timings = [
+        _timings(0.2, 1.0, 2.0, 9.0),
+        _timings(0.45, 5.0, 2.0, 9.0),
+        _timings(0.5, 5.0, 3.0, 9.0),
+        _timings(0.7, 9.0, 8.0, 4.0),
+    ]
+
+    best = sweep_thresholds(timings, 0.1)[0]
+
+    assert best.seconds == get_total_time(timings, best.easy_max_score, best.medium_max_score) == 10.0
+    assert 0.2 <= best.easy_max_score < 0.45
+    assert 0.5 <= best.medium_max_score < 0.7
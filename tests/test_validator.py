@@ -0,0 +1,96 @@
+import pytest
+
+from board import Board
+from flat_board import FlatBoard
+
+EASY_PUZZLE = "3..9568.16.2478...8..1...4.4865391..1......587.9.1.......7.1..997.2...3....3.57.."
+EASY_SOLUTION = "347956821612478395895123647486539172123647958759812463534761289971284536268395714"
+
+# Units of the validator are numbered rows first, then columns, then boxes
+ROW_0 = 0
+BOX_0 = 18
+
+
+def _state(validator):
+    return (list(validator.values), list(validator.unit_masks), validator.filled_count, set(validator.conflicts),
+            validator.get_conflicting_cells())
+
+
+@pytest.mark.parametrize("board_class", [Board, FlatBoard])
+def test_undo_and_redo_of_a_conflicting_digit(board_class):
+    board = board_class.from_string(EASY_PUZZLE)
+    validator = board.attach_validator()
+    initial = _state(validator)
+
+    assert validator.get_move_conflicts(0, 1, "3") == [(0, 0)]
+    assert not validator.is_move_valid(0, 1, "3")
+
+    board.insert_number_into_board(0, 1, "3")
+    conflicting = _state(validator)
+    assert validator.conflicts == {(ROW_0, 3), (BOX_0, 3)}
+    assert validator.get_conflicting_cells() == {(0, 0), (0, 1)}
+    assert validator.has_conflicts_at(0, 1) and validator.has_conflicts_at(0, 0)
+    assert validator.filled_count == initial[2] + 1
+
+    assert validator.undo() == (0, 1, 0, 3)
+    assert _state(validator) == initial
+    assert not validator.has_conflicts()
+    assert board.get_board()[0][1] == "-"
+    assert validator.get_candidate_mask(0, 1) == board.get_candidate_mask(0, 1)
+
+    assert validator.redo() == (0, 1, 0, 3)
+    assert _state(validator) == conflicting
+    assert board.get_board()[0][1] == "3"
+    assert validator.redo() is None
+
+
+@pytest.mark.parametrize("board_class", [Board, FlatBoard])
+def test_undo_of_an_overwrite_restores_the_previous_digit(board_class):
+    board = board_class.from_string(EASY_PUZZLE)
+    validator = board.attach_validator()
+
+    board.insert_number_into_board(0, 1, "4")
+    before_overwrite = _state(validator)
+    board.insert_number_into_board(0, 1, "3")
+    assert validator.has_conflicts()
+    assert validator.filled_count == before_overwrite[2]
+
+    validator.undo()
+    assert _state(validator) == before_overwrite
+    assert board.get_board()[0][1] == "4"
+    assert validator.get_candidate_mask(0, 2) == board.get_candidate_mask(0, 2)
+
+
+@pytest.mark.parametrize("board_class", [Board, FlatBoard])
+def test_new_move_clears_the_redo_history(board_class):
+    board = board_class.from_string(EASY_PUZZLE)
+    validator = board.attach_validator()
+
+    board.insert_number_into_board(0, 1, "4")
+    validator.undo()
+    board.insert_number_into_board(0, 2, "7")
+
+    assert validator.redo() is None
+    assert validator.undo() == (0, 2, 0, 7)
+    assert validator.undo() is None
+
+
+@pytest.mark.parametrize("board_class", [Board, FlatBoard])
+def test_filled_count_and_completion(board_class):
+    board = board_class.from_string(EASY_PUZZLE)
+    validator = board.attach_validator()
+    assert validator.filled_count == sum(symbol != "." for symbol in EASY_PUZZLE)
+
+    for cell, (clue, digit) in enumerate(zip(EASY_PUZZLE, EASY_SOLUTION)):
+        if clue == ".":
+            board.insert_number_into_board(*divmod(cell, 9), digit)
+    assert validator.filled_count == 81
+    assert validator.is_complete()
+
+    board.remove_number_from_board(8, 8)
+    assert validator.filled_count == 80
+    assert not validator.is_complete()
+    assert validator.get_candidates(8, 8) == [EASY_SOLUTION[80]]
+
+    validator.undo()
+    assert validator.is_complete()
@@ -0,0 +1,223 @@
+import math
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Sequence, Tuple
+
+from layout import Layout
+
+# Difficulty tiers, from cheapest to most expensive to solve
+TIERS = ("easy", "medium", "hard")
+
+# Default rating score thresholds of DifficultyRouter. Run tune_triage.py to time every route on the bundled corpora
+# and list the fastest thresholds
+DEFAULT_EASY_MAX_SCORE = 0.38
+DEFAULT_MEDIUM_MAX_SCORE = 0.58
+
+
+class DifficultyRating(NamedTuple):
+    """
+    Quick pre-analysis of a puzzle, taken from the clues and the first round of candidate generation
+    """
+    clues: int
+    blank_cells: int
+    # Blank cells with a single candidate in the first round
+    naked_singles: int
+    # log2 of the product of the candidate counts of the blank cells, i.e. the size of the search space in bits
+    # before any propagation
+    branching: float
+    # Branching per blank cell as a fraction of the most it could be, from 0 when every blank cell is a naked single
+    # to 1 when no blank cell is constrained. Comparable across board sizes
+    score: float
+    # Set when a blank cell has no candidates, so the puzzle cannot be solved
+    contradiction: bool
+
+
+class Route(NamedTuple):
+    """
+    Engines chosen for a puzzle by DifficultyRouter
+    """
+    rating: DifficultyRating
+    tier: str
+    # Engines to try in order. Each one after the first continues from the board the previous one left
+    engines: Tuple[str, ...]
+
+
+@lru_cache(maxsize=None)
+def _get_log2_table(size: int) -> List[float]:
+    """
+    Helper function used to look up log2 of every candidate count of a board size
+    :param size: Number of digits on the board
+    :return: log2 of each count from 0 to size, with 0 for a count of 0
+    """
+    return [0.0] + [math.log2(count) for count in range(1, size + 1)]
+
+
+def rate_candidates(values: Sequence[int], candidates: Sequence[int], layout: Layout) -> DifficultyRating:
+    """
+    Rate the difficulty of a puzzle from its cell values and first-round candidate masks
+    :param values: Flat sequence of cell values, 0 for blank
+    :param candidates: Candidate mask of every cell, e.g. the solver scratch space
+    :param layout: Layout of the board size
+    :return: Difficulty rating of the puzzle
+    """
+    mask_sizes = layout.mask_sizes
+    log2_table = _get_log2_table(layout.size)
+
+    blank_cells = 0
+    naked_singles = 0
+    branching = 0.0
+    contradiction = False
+    for cell, value in enumerate(values):
+        if value:
+            continue
+
+        blank_cells += 1
+        count = mask_sizes[candidates[cell]]
+        if count == 1:
+            naked_singles += 1
+        elif count == 0:
+            contradiction = True
+        branching += log2_table[count]
+
+    most_branching = blank_cells * log2_table[layout.size]
+    score = branching / most_branching if most_branching else 0.0
+
+    return DifficultyRating(layout.cell_count - blank_cells, blank_cells, naked_singles, branching, score,
+                            contradiction)
+
+
+class RoutingStats:
+    """
+    Class used to collect how many puzzles a DifficultyRouter sends to each tier and engine, and how well the routing
+    worked, to help tune its thresholds
+    """
+
+    def __init__(self) -> None:
+        """
+        Initialize the RoutingStats object with every counter at zero
+        """
+        self.puzzles = 0
+        self.rating_time = 0.0
+        # Counters by tier
+        self.tier_counts = {}
+        self.tier_solved = {}
+        self.tier_times = {}
+        # Puzzles the first engine of the route could not finish, by tier
+        self.escalations = {}
+        # Puzzles finished by each engine, whatever tier they were routed to
+        self.engine_counts = {}
+
+    def reset(self) -> None:
+        """
+        Set every counter back to zero
+        :return: None
+        """
+        self.__init__()
+
+    def record(self, tier: str, engines_used: Sequence[str], solved: bool, rating_seconds: float,
+               seconds: float) -> None:
+        """
+        Record one routed solve
+        :param tier: Tier the puzzle was routed to
+        :param engines_used: Engines run on the puzzle, in order
+        :param solved: Whether the puzzle was solved
+        :param rating_seconds: Time spent rating the puzzle
+        :param seconds: Time spent rating and solving the puzzle
+        :return: None
+        """
+        self.puzzles += 1
+        self.rating_time += rating_seconds
+
+        self.tier_counts[tier] = self.tier_counts.get(tier, 0) + 1
+        self.tier_solved[tier] = self.tier_solved.get(tier, 0) + solved
+        self.tier_times[tier] = self.tier_times.get(tier, 0.0) + seconds
+        if len(engines_used) > 1:
+            self.escalations[tier] = self.escalations.get(tier, 0) + 1
+        if engines_used:
+            self.engine_counts[engines_used[-1]] = self.engine_counts.get(engines_used[-1], 0) + 1
+
+    def as_dict(self) -> Dict:
+        """
+        Return every counter as a JSON-serializable dictionary
+        :return: Counters and timings
+        """
+        return {
+            "puzzles": self.puzzles,
+            "rating_time": self.rating_time,
+            "tier_counts": dict(self.tier_counts),
+            "tier_solved": dict(self.tier_solved),
+            "tier_times": dict(self.tier_times),
+            "escalations": dict(self.escalations),
+            "engine_counts": dict(self.engine_counts)
+        }
+
+    def summarize(self) -> List[str]:
+        """
+        Describe the collected counters in human-readable lines
+        :return: One line per tier and one for the engines
+        """
+        lines = [f"Routed puzzles: {self.puzzles}, rating {self.rating_time * 1000:.3f} ms"]
+        for tier in sorted(self.tier_counts, key=lambda name: TIERS.index(name) if name in TIERS else len(TIERS)):
+            count = self.tier_counts[tier]
+            lines.append(f"{tier}: {count} puzzles, {self.tier_solved[tier]} solved, "
+                         f"{self.escalations.get(tier, 0)} escalated, "
+                         f"{self.tier_times[tier] / count * 1000:.3f} ms average")
+        engines = ", ".join(f"{engine} {count}" for engine, count in sorted(self.engine_counts.items()))
+        lines.append(f"Finished by: {engines or 'none'}")
+
+        return lines
+
+
+class DifficultyRouter:
+    """
+    Class used to send each puzzle to the cheapest engine likely to solve it, based on its DifficultyRating. Easy
+    puzzles go to naked singles, escalating to the technique engine if singles stall. Medium puzzles go to the
+    technique engine, which finishes with backtracking when its rules stall. Hard puzzles go straight to search.
+    The default thresholds are the fastest pair found by tune_triage.py over all the bundled corpora: above the
+    medium threshold, the techniques cost more than search on the hard corpus, while most medium puzzles score below
+    it. Easy puzzles cost about the same with singles and with the techniques, so the easy threshold matters little
+    """
+
+    ROUTES = {
+        "easy": ("singles", "techniques"),
+        "medium": ("techniques",),
+        "hard": ("dlx",)
+    }
+
+    def __init__(self, easy_max_score: float = DEFAULT_EASY_MAX_SCORE,
+                 medium_max_score: float = DEFAULT_MEDIUM_MAX_SCORE) -> None:
+        """
+        Initialize the DifficultyRouter object
+        :param easy_max_score: Highest rating score routed to the "easy" tier
+        :param medium_max_score: Highest rating score routed to the "medium" tier. Higher scores are "hard"
+        """
+        if not 0.0 <= easy_max_score <= medium_max_score:
+            raise ValueError("thresholds must satisfy 0 <= easy_max_score <= medium_max_score")
+
+        self.easy_max_score = easy_max_score
+        self.medium_max_score = medium_max_score
+        self.stats = RoutingStats()
+
+    def get_tier(self, rating: DifficultyRating) -> str:
+        """
+        Return the tier of a rated puzzle
+        :param rating: Difficulty rating of the puzzle
+        :return: "easy", "medium", or "hard"
+        """
+        if rating.score <= self.easy_max_score:
+            return "easy"
+        if rating.score <= self.medium_max_score:
+            return "medium"
+        return "hard"
+
+    def route(self, rating: DifficultyRating) -> Route:
+        """
+        Choose the engines for a rated puzzle. Puzzles with a contradiction are put in the "invalid" tier and get no
+        engines since they cannot be solved
+        :param rating: Difficulty rating of the puzzle
+        :return: Tier and engines to try in order
+        """
+        if rating.contradiction:
+            return Route(rating, "invalid", ())
+
+        tier = self.get_tier(rating)
+        return Route(rating, tier, self.ROUTES[tier])
@@ -0,0 +1,156 @@
+import argparse
+import time
+from typing import List, NamedTuple, Optional, Tuple
+
+from tabulate import tabulate
+
+from benchmark import TIERS as CORPORA, load_corpus
+from board import Board
+from solver import Solver
+from triage import DEFAULT_EASY_MAX_SCORE, DEFAULT_MEDIUM_MAX_SCORE, TIERS, DifficultyRating, DifficultyRouter
+
+
+class PuzzleTimings(NamedTuple):
+    """
+    Rating of one puzzle and the time taken by the route of every tier on it
+    """
+    corpus: str
+    rating: DifficultyRating
+    # Best seconds over the repeats for the route of each tier, in the order of triage.TIERS
+    route_times: Tuple[float, ...]
+
+
+class ThresholdResult(NamedTuple):
+    """
+    Time the auto engine would take over the measured puzzles with one pair of thresholds
+    """
+    easy_max_score: float
+    medium_max_score: float
+    seconds: float
+
+
+class FixedTierRouter(DifficultyRouter):
+    """
+    Router sending every puzzle to the same tier, used to time the route of each tier on every puzzle
+    """
+
+    def __init__(self, tier: str) -> None:
+        """
+        Initialize the FixedTierRouter object
+        :param tier: Tier every puzzle is sent to
+        """
+        super().__init__()
+        self.tier = tier
+
+    def get_tier(self, rating: DifficultyRating) -> str:
+        return self.tier
+
+
+def measure_puzzle(corpus: str, puzzle: str, repeat: int) -> PuzzleTimings:
+    """
+    Rate a puzzle and time the auto engine on it with every tier forced in turn
+    :param corpus: Name of the corpus holding the puzzle
+    :param puzzle: 81-character puzzle
+    :param repeat: Timed solves per tier, the fastest of which is kept
+    :return: Rating and route times of the puzzle
+    """
+    rating = Solver(Board.from_string(puzzle), "auto").rate_difficulty()
+
+    route_times = []
+    for tier in TIERS:
+        router = FixedTierRouter(tier)
+        best = None
+        for _ in range(repeat):
+            solver = Solver(Board.from_string(puzzle), "auto", router=router)
+            start = time.perf_counter()
+            solver.solve_board()
+            seconds = time.perf_counter() - start
+            best = seconds if best is None else min(best, seconds)
+        route_times.append(best)
+
+    return PuzzleTimings(corpus, rating, tuple(route_times))
+
+
+def get_total_time(timings: List[PuzzleTimings], easy_max_score: float, medium_max_score: float) -> float:
+    """
+    Add up the time the auto engine takes over the measured puzzles with the given thresholds
+    :param timings: Measured puzzles
+    :param easy_max_score: Highest rating score routed to the "easy" tier
+    :param medium_max_score: Highest rating score routed to the "medium" tier
+    :return: Seconds
+    """
+    router = DifficultyRouter(easy_max_score, medium_max_score)
+    return sum(timing.route_times[TIERS.index(router.get_tier(timing.rating))] for timing in timings)
+
+
+def sweep_thresholds(timings: List[PuzzleTimings], step: float) -> List[ThresholdResult]:
+    """
+    Try every pair of thresholds on a grid and rank them by the total time of the auto engine
+    :param timings: Measured puzzles
+    :param step: Spacing of the grid of thresholds between 0 and 1
+    :return: Every pair tried, fastest first. Ties keep the smaller thresholds first
+    """
+    grid = [round(index * step, 6) for index in range(int(round(1 / step)) + 1)]
+    results = [ThresholdResult(easy_max_score, medium_max_score,
+                               get_total_time(timings, easy_max_score, medium_max_score))
+               for medium_index, medium_max_score in enumerate(grid) for easy_max_score in grid[:medium_index + 1]]
+
+    return sorted(results, key=lambda result: result.seconds)
+
+
+def summarize_tiers(timings: List[PuzzleTimings], easy_max_score: float,
+                    medium_max_score: float) -> List[List[object]]:
+    """
+    Describe how every corpus is routed with the given thresholds
+    :param timings: Measured puzzles
+    :param easy_max_score: Highest rating score routed to the "easy" tier
+    :param medium_max_score: Highest rating score routed to the "medium" tier
+    :return: One table row per corpus: puzzles sent to each tier, then the average milliseconds per puzzle
+    """
+    router = DifficultyRouter(easy_max_score, medium_max_score)
+
+    rows = []
+    for corpus in CORPORA:
+        corpus_timings = [timing for timing in timings if timing.corpus == corpus]
+        if not corpus_timings:
+            continue
+
+        tiers = [router.get_tier(timing.rating) for timing in corpus_timings]
+        seconds = sum(timing.route_times[TIERS.index(tier)] for timing, tier in zip(corpus_timings, tiers))
+        rows.append([corpus, *(tiers.count(tier) for tier in TIERS), seconds / len(corpus_timings) * 1000])
+
+    return rows
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Time every route of the auto engine on the bundled corpora and "
+                                                 "find the routing thresholds that solve them fastest")
+    parser.add_argument("--corpora", nargs="+", choices=CORPORA, default=CORPORA)
+    parser.add_argument("--repeat", type=int, default=5, help="timed solves per puzzle and tier")
+    parser.add_argument("--step", type=float, default=0.01, help="spacing of the thresholds tried")
+    parser.add_argument("--top", type=int, default=10, help="number of threshold pairs listed")
+    arguments = parser.parse_args(argv)
+
+    timings = [measure_puzzle(corpus, puzzle, arguments.repeat)
+               for corpus in arguments.corpora for puzzle in load_corpus(corpus)]
+    results = sweep_thresholds(timings, arguments.step)
+
+    print(tabulate([[result.easy_max_score, result.medium_max_score, result.seconds * 1000]
+                    for result in results[:arguments.top]],
+                   headers=["easy max", "medium max", "total ms"], floatfmt=".3f"))
+
+    headers = ["corpus", *TIERS, "ms / puzzle"]
+    for label, easy_max_score, medium_max_score in (
+            ("Best", results[0].easy_max_score, results[0].medium_max_score),
+            ("Defaults", DEFAULT_EASY_MAX_SCORE, DEFAULT_MEDIUM_MAX_SCORE)):
+        total = get_total_time(timings, easy_max_score, medium_max_score)
+        print(f"\n{label}: easy max {easy_max_score}, medium max {medium_max_score}, {total * 1000:.3f} ms total")
+        print(tabulate(summarize_tiers(timings, easy_max_score, medium_max_score), headers=headers, floatfmt=".3f"))
+
+    print("\nEvery puzzle in one tier:")
+    print(tabulate([[tier, sum(timing.route_times[index] for timing in timings) * 1000]
+                    for index, tier in enumerate(TIERS)], headers=["tier", "total ms"], floatfmt=".3f"))
+
+
+if __name__ == '__main__':
+    main()
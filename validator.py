@@ -0,0 +1,272 @@
+from typing import TYPE_CHECKING, List, NamedTuple, Optional, Set, Tuple
+
+if TYPE_CHECKING:
+    from board import Board
+
+Cell = Tuple[int, int]
+
+
+class Move(NamedTuple):
+    """
+    One change of a cell recorded in the validator history
+    """
+    row: int
+    column: int
+    # Digits before and after the change, 0 for blank
+    previous: int
+    digit: int
+
+
+class IncrementalValidator:
+    """
+    Class used to validate a board incrementally for interactive play. The validator keeps, for every row, column, and
+    box, the cells holding each digit, and is updated by the board on every insert and remove. Conflict checks for a
+    move, completeness, and the candidates of a cell are answered without rescanning the board.
+    Create it with Board.attach_validator
+    """
+
+    def __init__(self, board: "Board") -> None:
+        """
+        Initialize the validator from the current contents of the board
+        :param board: Board to validate
+        """
+        self.board = board
+        self.layout = board.layout
+
+        size = self.layout.size
+        # Index into layout.units of the row, column, and box of each cell
+        self.units_of_cell = [(self.layout.row_of_cell[cell], size + self.layout.column_of_cell[cell],
+                               2 * size + self.layout.box_of_cell[cell]) for cell in range(self.layout.cell_count)]
+
+        self.values = []
+        self.digit_cells = []
+        self.unit_masks = []
+        self.filled_count = 0
+        self.conflicts = set()
+
+        self.history = []
+        self.redo_stack = []
+        self._is_replaying = False
+
+        self.rebuild()
+
+    def rebuild(self) -> None:
+        """
+        Rebuild every count from the board and clear the undo and redo history
+        :return: None
+        """
+        size = self.layout.size
+        unit_count = len(self.layout.units)
+
+        self.values = [0] * self.layout.cell_count
+        # Cells holding each digit in each unit, indexed [unit][digit]
+        self.digit_cells = [[set() for _ in range(size + 1)] for _ in range(unit_count)]
+        # Mask of the digits present in each unit
+        self.unit_masks = [0] * unit_count
+        self.filled_count = 0
+        # (unit, digit) pairs where the digit appears more than once
+        self.conflicts = set()
+
+        self.history = []
+        self.redo_stack = []
+
+        for cell, digit in enumerate(self.board.get_cell_values()):
+            if digit:
+                self._add(cell, digit)
+
+    def update(self, row_index: int, column_index: int, previous: int, digit: int) -> None:
+        """
+        Record a change of one cell. Called by the board on every insert and remove
+        :param row_index: Row of the cell
+        :param column_index: Column of the cell
+        :param previous: Digit in the cell before the change, 0 for blank
+        :param digit: Digit in the cell after the change, 0 for blank
+        :return: None
+        """
+        if previous == digit:
+            return
+
+        cell = row_index * self.layout.size + column_index
+        if previous:
+            self._remove(cell, previous)
+        if digit:
+            self._add(cell, digit)
+
+        if not self._is_replaying:
+            self.history.append(Move(row_index, column_index, previous, digit))
+            self.redo_stack.clear()
+
+    def _add(self, cell: int, digit: int) -> None:
+        """
+        Helper function used to count a digit placed in a cell
+        :param cell: Index of the cell
+        :param digit: Digit placed
+        :return: None
+        """
+        self.values[cell] = digit
+        self.filled_count += 1
+
+        bit = 1 << (digit - 1)
+        for unit in self.units_of_cell[cell]:
+            cells = self.digit_cells[unit][digit]
+            cells.add(cell)
+            self.unit_masks[unit] |= bit
+            if len(cells) == 2:
+                self.conflicts.add((unit, digit))
+
+    def _remove(self, cell: int, digit: int) -> None:
+        """
+        Helper function used to stop counting a digit removed from a cell
+        :param cell: Index of the cell
+        :param digit: Digit removed
+        :return: None
+        """
+        self.values[cell] = 0
+        self.filled_count -= 1
+
+        bit = 1 << (digit - 1)
+        for unit in self.units_of_cell[cell]:
+            cells = self.digit_cells[unit][digit]
+            cells.discard(cell)
+            if not cells:
+                self.unit_masks[unit] &= ~bit
+            elif len(cells) == 1:
+                self.conflicts.discard((unit, digit))
+
+    def get_move_conflicts(self, row_index: int, column_index: int, number: str) -> List[Cell]:
+        """
+        Find the cells a move would conflict with, without making it
+        :param row_index: Row of the cell
+        :param column_index: Column of the cell
+        :param number: Number to place
+        :return: Coordinates of the other cells in the same row, column, or box already holding the number
+        """
+        bit = self.layout.digit_to_bit.get(number)
+        if bit is None:
+            return []
+
+        digit = bit.bit_length()
+        cell = row_index * self.layout.size + column_index
+
+        conflicting_cells = set()
+        for unit in self.units_of_cell[cell]:
+            conflicting_cells.update(self.digit_cells[unit][digit])
+        conflicting_cells.discard(cell)
+
+        return sorted(divmod(conflicting_cell, self.layout.size) for conflicting_cell in conflicting_cells)
+
+    def is_move_valid(self, row_index: int, column_index: int, number: str) -> bool:
+        """
+        Check whether placing a number would leave its row, column, and box without duplicates
+        :param row_index: Row of the cell
+        :param column_index: Column of the cell
+        :param number: Number to place
+        :return: True if the number is not already used elsewhere in the row, column, or box, False otherwise
+        """
+        bit = self.layout.digit_to_bit.get(number)
+        if bit is None:
+            return False
+
+        cell = row_index * self.layout.size + column_index
+        if self.values[cell] == bit.bit_length():
+            return not self.has_conflicts_at(row_index, column_index)
+
+        return bool(self.get_candidate_mask(row_index, column_index) & bit)
+
+    def has_conflicts_at(self, row_index: int, column_index: int) -> bool:
+        """
+        Check whether the digit in a cell is duplicated in its row, column, or box
+        :param row_index: Row of the cell
+        :param column_index: Column of the cell
+        :return: True if the digit appears elsewhere in the row, column, or box, False otherwise
+        """
+        cell = row_index * self.layout.size + column_index
+        digit = self.values[cell]
+        return bool(digit) and any((unit, digit) in self.conflicts for unit in self.units_of_cell[cell])
+
+    def has_conflicts(self) -> bool:
+        """
+        Check whether any row, column, or box holds a digit more than once
+        :return: True if there are duplicates, False otherwise
+        """
+        return bool(self.conflicts)
+
+    def get_conflicting_cells(self) -> Set[Cell]:
+        """
+        Return every cell holding a duplicated digit
+        :return: Coordinates of the cells involved in a duplicate
+        """
+        return {divmod(cell, self.layout.size) for unit, digit in self.conflicts
+                for cell in self.digit_cells[unit][digit]}
+
+    def is_complete(self) -> bool:
+        """
+        Check whether every cell is filled and no row, column, or box holds a digit more than once
+        :return: True if the board is solved, False otherwise
+        """
+        return self.filled_count == self.layout.cell_count and not self.conflicts
+
+    def get_candidate_mask(self, row_index: int, column_index: int) -> int:
+        """
+        Return the mask of digits not yet used in the row, column, or box of the given cell
+        :param row_index: Row of the cell
+        :param column_index: Column of the cell
+        :return: Mask of the digits that can still be placed in the cell
+        """
+        row_unit, column_unit, box_unit = self.units_of_cell[row_index * self.layout.size + column_index]
+        used = self.unit_masks[row_unit] | self.unit_masks[column_unit] | self.unit_masks[box_unit]
+        return ~used & self.layout.full_mask
+
+    def get_candidates(self, row_index: int, column_index: int) -> List[str]:
+        """
+        Return the digits not yet used in the row, column, or box of the given cell
+        :param row_index: Row of the cell
+        :param column_index: Column of the cell
+        :return: Digits that can still be placed in the cell
+        """
+        return self.layout.mask_to_digits[self.get_candidate_mask(row_index, column_index)]
+
+    def undo(self) -> Optional[Move]:
+        """
+        Revert the most recent change of the board
+        :return: The change reverted, or None if there is nothing to undo
+        """
+        if not self.history:
+            return None
+
+        move = self.history.pop()
+        self._apply(move.row, move.column, move.previous)
+        self.redo_stack.append(move)
+
+        return move
+
+    def redo(self) -> Optional[Move]:
+        """
+        Reapply the most recently undone change of the board
+        :return: The change reapplied, or None if there is nothing to redo
+        """
+        if not self.redo_stack:
+            return None
+
+        move = self.redo_stack.pop()
+        self._apply(move.row, move.column, move.digit)
+        self.history.append(move)
+
+        return move
+
+    def _apply(self, row_index: int, column_index: int, digit: int) -> None:
+        """
+        Helper function used to set a cell on the board without recording the change in the history
+        :param row_index: Row of the cell
+        :param column_index: Column of the cell
+        :param digit: Digit to set, 0 for blank
+        :return: None
+        """
+        self._is_replaying = True
+        try:
+            if digit:
+                self.board.insert_number_into_board(row_index, column_index, self.layout.symbols[digit - 1])
+            else:
+                self.board.remove_number_from_board(row_index, column_index)
+        finally:
+            self._is_replaying = False